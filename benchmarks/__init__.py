@@ -0,0 +1 @@
+"""Benchmarks for visie's matchers and dictionary pipeline; run them with `python -m benchmarks --help`"""
@@ -0,0 +1,85 @@
+import argparse
+import json
+import platform
+import sys
+from typing import Dict, Optional
+
+from visie import ENGINES
+
+from .cases import FAMILIES, all_cases
+from .runner import DATA_DIR, Result, TOLERANCE, compare, parse_size, run
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks visie against synthetic dictionaries, reporting throughput, peak memory usage, and "
+                    "time to first result. Results can be saved as a baseline, and later runs compared against it."
+    )
+    arg_parser.add_argument("--sizes", "-s", type=str, default="10k,100k",
+                            help="comma-separated numbers of words in the synthetic dictionaries, e.g., "
+                                 "10k,100k,1m,5m (default=10k,100k)")
+    arg_parser.add_argument("--family", "-f", action="append", choices=sorted(FAMILIES.keys()),
+                            help="only run this family of constraints; may be given multiple times (default=all)")
+    arg_parser.add_argument("--engine", "-e", type=str, default="recursive", choices=sorted(ENGINES.keys()),
+                            help="the matching engine to benchmark (default=recursive)")
+    arg_parser.add_argument("--min-length", "-m", type=int, default=4, help="minimum acronym length (default=4)")
+    arg_parser.add_argument("--repeat", "-r", type=int, default=3,
+                            help="number of times to run each case, keeping the best (default=3)")
+    arg_parser.add_argument("--timeout", "-t", type=float, default=300,
+                            help="number of seconds after which a case is abandoned (default=300)")
+    arg_parser.add_argument("--data-dir", type=str, default=DATA_DIR,
+                            help=f"directory in which to cache the synthetic dictionaries (default={DATA_DIR})")
+    arg_parser.add_argument("--save", type=str, help="save the results as a baseline to this JSON file")
+    arg_parser.add_argument("--compare", type=str,
+                            help="compare the results against the baseline in this JSON file, exiting with a "
+                                 "non-zero status if any of them regressed")
+    arg_parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                            help="the fraction by which a result can be worse than its baseline before it is "
+                                 f"considered a regression (default={TOLERANCE})")
+
+    args = arg_parser.parse_args(argv[1:])
+
+    baseline: Optional[Dict[str, Result]] = None
+    if args.compare is not None:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)["results"]
+
+    families = set(args.family or FAMILIES.keys())
+    cases = [case for case in all_cases() if any(case.name.startswith(f"{family}-") for family in families)]
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+
+    results = run(
+        cases, sizes, data_dir=args.data_dir, min_length=args.min_length, engine=args.engine, repeat=args.repeat,
+        timeout=args.timeout
+    )
+
+    if args.save is not None:
+        with open(args.save, "w") as f:
+            json.dump({
+                "environment": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "engine": args.engine,
+                    "min_length": args.min_length,
+                },
+                "results": results
+            }, f, indent=2)
+        sys.stderr.write(f"Saved the results to {args.save}\n")
+
+    if baseline is not None:
+        regressions = compare(baseline, results, args.tolerance)
+        if regressions:
+            sys.stderr.write(f"\n{len(regressions)} REGRESSION{'S' if len(regressions) > 1 else ''} compared to "
+                             f"{args.compare}:\n")
+            for regression in regressions:
+                sys.stderr.write(f"    {regression}\n")
+            exit(1)
+        sys.stderr.write(f"\nNo regressions compared to {args.compare}\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
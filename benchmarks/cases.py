@@ -0,0 +1,65 @@
+from typing import Callable, Dict, List, NamedTuple
+
+# words with distinct, common initials, from which the constraints of each family are built
+WORDS = (
+    "pleasing", "orange", "home", "noise", "expeller", "simple", "recursive", "acronym", "initialism", "name",
+    "tiny", "lexicon", "generator", "dictionary",
+)
+
+
+class Case(NamedTuple):
+    name: str
+    constraint: str
+    use_variants: bool = False
+
+
+def wide_all_of(n: int) -> Case:
+    """`[...]` of `n` words, which must all occur in any order"""
+    return Case(f"all-of-{n}", f"[{' '.join(WORDS[:n])}]")
+
+
+def wide_any_of(n: int) -> Case:
+    """`{...}` of `n` words, any of which can occur in any order"""
+    return Case(f"any-of-{n}", f"{{{' '.join(WORDS[:n])}}}")
+
+
+def deep_ordered(n: int) -> Case:
+    """`n` levels of nested `<...>`, each with an optional word and a choice of two words"""
+    constraint = ""
+    for i in range(n, 0, -1):
+        optional = WORDS[i % len(WORDS)]
+        choice = f"({WORDS[(2 * i) % len(WORDS)]} {WORDS[(2 * i + 1) % len(WORDS)]})"
+        constraint = f"<{optional}? {choice} {constraint}>" if constraint else f"<{optional}? {choice}>"
+    return Case(f"ordered-depth-{n}", constraint)
+
+
+def recursive_acronym(n: int) -> Case:
+    """A wildcard-led recursive acronym over `n` words"""
+    return Case(f"recursive-{n}", f"<. is? a? [{' '.join(WORDS[:n])}]>")
+
+
+def variants(n: int) -> Case:
+    """`n` words, any of which can occur in any order, matched against the variants of the dictionary words"""
+    return Case(f"variants-{n}", " ".join(WORDS[:n]), use_variants=True)
+
+
+# each family of constraints, and the sizes at which it is benchmarked
+FAMILIES: Dict[str, Callable[[int], Case]] = {
+    "all-of": wide_all_of,
+    "any-of": wide_any_of,
+    "ordered": deep_ordered,
+    "recursive": recursive_acronym,
+    "variants": variants,
+}
+
+SIZES: Dict[str, List[int]] = {
+    "all-of": [4, 6, 8],
+    "any-of": [4, 6, 8],
+    "ordered": [2, 4, 6],
+    "recursive": [4, 6, 8],
+    "variants": [3, 5],
+}
+
+
+def all_cases() -> List[Case]:
+    return [family(n) for name, family in FAMILIES.items() for n in SIZES[name]]
@@ -0,0 +1,220 @@
+"""
+Differential fuzzing of visie's matching engines: random constraint trees are matched against random dictionaries
+by every engine in `visie.ENGINES`, and the results are compared to those of the reference recursive engine.
+
+Run it with `python -m benchmarks.fuzz --help`.
+
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from visie import ENGINES
+from visie.visie import (
+    AllOfConstraint, AnyOfConstraint, AnyOrderedConstraint, Constraint, DictionaryWord, ExactlyOneConstraint,
+    OptionalConstraint, OrderedConstraint, Wildcard
+)
+
+REFERENCE = "recursive"
+
+# The letters of the random dictionaries and constraints. Few letters make matches common, so that the engines
+# disagree on words that match and not just on those that do not.
+ALPHABET = "abcd"
+
+SEED = 0
+
+# the kinds of inner nodes of the random constraint trees
+CONTAINERS: Tuple[Callable[[List[Constraint]], Constraint], ...] = (
+    OrderedConstraint, AllOfConstraint, AnyOfConstraint, ExactlyOneConstraint, OptionalConstraint,
+    AnyOrderedConstraint
+)
+
+# the results of an engine: each word for which it found matches, with the expansions of those matches
+Results = List[Tuple[str, List[str]]]
+
+
+class Mismatch(NamedTuple):
+    engine: str
+    seed: int
+    trial: int
+    constraint: str
+    word: Optional[str]
+    expected: List[str]
+    actual: List[str]
+
+    def __str__(self):
+        return f"{self.engine} (seed {self.seed}, trial {self.trial}): {self.constraint} on {self.word!r}: " \
+               f"expected {self.expected!r} but got {self.actual!r}"
+
+
+def random_dictionary(rng: random.Random, num_words: int, max_length: int = 7, alphabet: str = ALPHABET) -> List[str]:
+    """Returns `num_words` random words, in random order, about one in ten of which is capitalized"""
+    words = []
+    for _ in range(num_words):
+        word = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, max_length)))
+        if rng.random() < 0.1:
+            word = word.capitalize()
+        words.append(word)
+    return words
+
+
+def random_constraint(
+        rng: random.Random, depth: int = 3, max_children: int = 4, alphabet: str = ALPHABET
+) -> Constraint:
+    """
+    Returns a random constraint tree at most `depth` levels deep.
+
+    The trees include the cases in which the engines are most likely to disagree: containers with no children,
+    optional children, wildcards, and children that occur more than once.
+
+    """
+    if depth <= 0 or rng.random() < 0.3:
+        if rng.random() < 0.15:
+            return Wildcard()
+        return DictionaryWord(f"{rng.choice(alphabet)}{rng.choice('xyz')}")
+    container = rng.choice(CONTAINERS)
+    if container is OptionalConstraint:
+        num_children = rng.choice((1, 1, 1, 2))
+    elif container is ExactlyOneConstraint:
+        num_children = rng.randint(1, max_children)
+    else:
+        num_children = rng.randint(0, max_children)
+    children = [random_constraint(rng, depth - 1, max_children, alphabet) for _ in range(num_children)]
+    if children and rng.random() < 0.3:
+        children.append(children[0])
+    return container(children)
+
+
+def run_engine(engine: str, constraint: Constraint, words: Iterable[str]) -> Results:
+    """Returns every match that `engine` finds for `constraint` in `words`"""
+    results: Results = []
+    for word, matches in ENGINES[engine](constraint, words):
+        expansions = [str(match) for match in matches]
+        if expansions:
+            results.append((word, expansions))
+    return results
+
+
+def first_difference(expected: Results, actual: Results) -> Tuple[Optional[str], List[str], List[str]]:
+    """Returns the first word for which `expected` and `actual` differ, and the expansions of each for that word"""
+    expected_matches, actual_matches = dict(expected), dict(actual)
+    for word, _ in sorted(expected + actual, key=lambda result: result[0]):
+        if expected_matches.get(word) != actual_matches.get(word):
+            return word, expected_matches.get(word, []), actual_matches.get(word, [])
+    # the same words matched, just in a different order
+    return None, [word for word, _ in expected], [word for word, _ in actual]
+
+
+class FuzzReport:
+    """The mismatches that a fuzzing run found, and how long each engine took"""
+
+    def __init__(self, engines: Sequence[str]):
+        self.engines: Sequence[str] = engines
+        self.trials: int = 0
+        self.seconds: Dict[str, float] = {engine: 0.0 for engine in engines}
+        self.mismatches: List[Mismatch] = []
+
+    def speedup(self, engine: str) -> float:
+        """Returns how many times faster than the reference `engine` was, over all trials"""
+        seconds = self.seconds[engine]
+        return self.seconds[REFERENCE] / seconds if seconds > 0 else float("inf")
+
+    def engine_mismatches(self, engine: str) -> List[Mismatch]:
+        return [mismatch for mismatch in self.mismatches if mismatch.engine == engine]
+
+    def format(self) -> str:
+        lines = []
+        for engine in self.engines:
+            num_mismatches = len(self.engine_mismatches(engine))
+            line = f"{engine:<12} {self.seconds[engine]:9.3f}s"
+            if engine != REFERENCE:
+                line = f"{line} {self.speedup(engine):7.2f}x  {num_mismatches} mismatch" \
+                       f"{'' if num_mismatches == 1 else 'es'}"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def fuzz(
+        trials: int = 100,
+        seed: int = SEED,
+        num_words: int = 1000,
+        engines: Optional[Sequence[str]] = None,
+        depth: int = 3,
+        max_children: int = 4
+) -> FuzzReport:
+    """
+    Matches `trials` random constraints against random dictionaries of `num_words` words with each of `engines`
+    (default=all of them), comparing their results to those of the reference engine and timing them. The same seed
+    always produces the same constraints and dictionaries.
+    """
+    if engines is None:
+        engines = [engine for engine in ENGINES if engine != REFERENCE]
+    for engine in engines:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES.keys())}")
+    report = FuzzReport([REFERENCE] + [engine for engine in engines if engine != REFERENCE])
+    rng = random.Random(seed)
+    for trial in range(trials):
+        constraint = random_constraint(rng, depth, max_children)
+        words = random_dictionary(rng, num_words)
+        start = time.perf_counter()
+        expected = run_engine(REFERENCE, constraint, words)
+        report.seconds[REFERENCE] += time.perf_counter() - start
+        for engine in report.engines[1:]:
+            start = time.perf_counter()
+            try:
+                actual = run_engine(engine, constraint, words)
+            except Exception as e:
+                report.mismatches.append(Mismatch(
+                    engine, seed, trial, repr(constraint), None, [word for word, _ in expected], [repr(e)]
+                ))
+                continue
+            finally:
+                report.seconds[engine] += time.perf_counter() - start
+            if actual != expected:
+                word, expected_matches, actual_matches = first_difference(expected, actual)
+                report.mismatches.append(Mismatch(
+                    engine, seed, trial, repr(constraint), word, expected_matches, actual_matches
+                ))
+        report.trials += 1
+    return report
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.fuzz",
+        description="Matches random constraints against random dictionaries with every engine, reporting each "
+                    f"mismatch with the reference {REFERENCE} engine, and how much faster than it each engine was."
+    )
+    arg_parser.add_argument("--trials", "-n", type=int, default=100,
+                            help="number of random constraints to try (default=100)")
+    arg_parser.add_argument("--seed", "-s", type=int, default=SEED, help=f"random seed (default={SEED})")
+    arg_parser.add_argument("--words", "-w", type=int, default=1000,
+                            help="number of words in each random dictionary (default=1000)")
+    arg_parser.add_argument("--engine", "-e", action="append", choices=sorted(ENGINES.keys()),
+                            help="only check this engine; may be given multiple times (default=all)")
+    arg_parser.add_argument("--depth", "-d", type=int, default=3,
+                            help="maximum depth of the random constraints (default=3)")
+    arg_parser.add_argument("--max-children", type=int, default=4,
+                            help="maximum number of children of each node of the random constraints (default=4)")
+
+    args = arg_parser.parse_args(argv[1:])
+
+    report = fuzz(
+        trials=args.trials, seed=args.seed, num_words=args.words, engines=args.engine, depth=args.depth,
+        max_children=args.max_children
+    )
+    for mismatch in report.mismatches:
+        sys.stderr.write(f"{mismatch}\n")
+    sys.stdout.write(f"{report.format()}\n")
+    if report.mismatches:
+        exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,159 @@
+import multiprocessing
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .cases import Case
+from .synthetic import synthetic_dictionary
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+
+# how much worse than its baseline a measurement can be before it is considered a regression
+TOLERANCE = 0.2
+
+# differences in running time or time to first result smaller than this many seconds are just noise
+MIN_TIME_DIFFERENCE = 0.05
+
+Result = Dict[str, Any]
+
+
+def parse_size(size: str) -> int:
+    """Parses a dictionary size like `10000`, `10k`, or `5m`"""
+    size = size.strip().lower()
+    for suffix, multiplier in (("k", 1000), ("m", 1000000)):
+        if size.endswith(suffix):
+            return int(float(size[:-len(suffix)]) * multiplier)
+    return int(size)
+
+
+def _peak_rss_mib() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # macOS reports bytes rather than kibibytes
+        peak //= 1024
+    return peak / 1024
+
+
+def _measure(case: Case, dict_path: str, min_length: int, engine: str, queue):
+    from visie import generate
+    from visie.parser import Parser
+
+    start = time.perf_counter()
+    first_result: Optional[float] = None
+    results = 0
+    for _ in generate(
+            Parser(case.constraint).parse(), min_length=min_length, use_variants=case.use_variants,
+            dict_path=dict_path, engine=engine
+    ):
+        if first_result is None:
+            first_result = time.perf_counter() - start
+        results += 1
+    seconds = time.perf_counter() - start
+    queue.put({
+        "seconds": seconds,
+        "first_result_seconds": first_result,
+        "results": results,
+        "peak_rss_mib": _peak_rss_mib(),
+    })
+
+
+def measure(case: Case, dict_path: str, num_words: int, min_length: int, engine: str, timeout: float) -> Result:
+    """Runs a single case in a fresh process, so that its peak memory usage is its own"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(case, dict_path, min_length, engine, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return {"timeout": True}
+    elif process.exitcode != 0:
+        raise RuntimeError(f"Benchmark {case.name} failed with exit code {process.exitcode}")
+    result = queue.get()
+    result["words_per_second"] = num_words / result["seconds"] if result["seconds"] > 0 else float("inf")
+    return result
+
+
+def best_of(results: List[Result]) -> Result:
+    """Combines repeated measurements of a case, keeping the best of each, since the rest is noise"""
+    if any(result.get("timeout") for result in results):
+        return {"timeout": True}
+    best = dict(min(results, key=lambda r: r["seconds"]))
+    first_results = [r["first_result_seconds"] for r in results if r["first_result_seconds"] is not None]
+    best["first_result_seconds"] = min(first_results) if first_results else None
+    rss = [r["peak_rss_mib"] for r in results if r["peak_rss_mib"] is not None]
+    best["peak_rss_mib"] = min(rss) if rss else None
+    return best
+
+
+def run(
+        cases: Iterable[Case],
+        sizes: Iterable[int],
+        data_dir: str = DATA_DIR,
+        min_length: int = 4,
+        engine: str = "recursive",
+        repeat: int = 3,
+        timeout: float = 300
+) -> Dict[str, Result]:
+    results: Dict[str, Result] = {}
+    cases = list(cases)
+    for num_words in sizes:
+        dict_path = synthetic_dictionary(num_words, data_dir)
+        for case in cases:
+            key = f"{case.name}@{num_words}"
+            result = best_of([
+                measure(case, dict_path, num_words, min_length, engine, timeout) for _ in range(repeat)
+            ])
+            results[key] = result
+            sys.stdout.write(f"{format_result(key, result)}\n")
+            sys.stdout.flush()
+    return results
+
+
+def format_result(key: str, result: Result) -> str:
+    if result.get("timeout"):
+        return f"{key:<32} TIMEOUT"
+    first_result = result["first_result_seconds"]
+    first_result = "-" if first_result is None else f"{first_result:.3f}s"
+    rss = result["peak_rss_mib"]
+    rss = "-" if rss is None else f"{rss:.1f}MiB"
+    return f"{key:<32} {result['seconds']:9.3f}s {result['words_per_second']:12.0f} words/s  " \
+           f"first result {first_result:>8}  peak RSS {rss:>9}  {result['results']} results"
+
+
+def compare(baseline: Dict[str, Result], results: Dict[str, Result], tolerance: float = TOLERANCE) -> List[str]:
+    """Returns a description of each way in which `results` regressed from `baseline`"""
+    regressions: List[str] = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None or expected.get("timeout"):
+            continue
+        elif result.get("timeout"):
+            regressions.append(f"{key}: timed out, but took {expected['seconds']:.3f}s in the baseline")
+            continue
+        if result["results"] != expected["results"]:
+            regressions.append(f"{key}: {result['results']} results, but {expected['results']} in the baseline")
+        if result["words_per_second"] < expected["words_per_second"] * (1 - tolerance) \
+                and result["seconds"] - expected["seconds"] > MIN_TIME_DIFFERENCE:
+            regressions.append(
+                f"{key}: {result['words_per_second']:.0f} words/s, down from {expected['words_per_second']:.0f}"
+            )
+        if result["peak_rss_mib"] is not None and expected["peak_rss_mib"] is not None \
+                and result["peak_rss_mib"] > expected["peak_rss_mib"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: peak RSS of {result['peak_rss_mib']:.1f}MiB, up from {expected['peak_rss_mib']:.1f}MiB"
+            )
+        first_result, expected_first_result = result["first_result_seconds"], expected["first_result_seconds"]
+        if first_result is not None and expected_first_result is not None \
+                and first_result > expected_first_result * (1 + tolerance) \
+                and first_result - expected_first_result > MIN_TIME_DIFFERENCE:
+            regressions.append(
+                f"{key}: first result after {first_result:.3f}s, up from {expected_first_result:.3f}s"
+            )
+    return regressions
@@ -0,0 +1,56 @@
+import os
+import random
+from typing import Iterator
+
+# approximate frequencies of letters in English words, so that synthetic words have realistic initials
+LETTER_FREQUENCIES = {
+    "a": 8.2, "b": 1.5, "c": 2.8, "d": 4.3, "e": 12.7, "f": 2.2, "g": 2.0, "h": 6.1, "i": 7.0, "j": 0.15,
+    "k": 0.77, "l": 4.0, "m": 2.4, "n": 6.7, "o": 7.5, "p": 1.9, "q": 0.095, "r": 6.0, "s": 6.3, "t": 9.1,
+    "u": 2.8, "v": 0.98, "w": 2.4, "x": 0.15, "y": 2.0, "z": 0.074,
+}
+
+# the relative frequencies of word lengths, from 1 to 16 letters, roughly following /usr/share/dict/words
+LENGTH_FREQUENCIES = (0.1, 0.5, 2, 4, 7, 10, 12, 13, 12, 11, 9, 7, 5, 3, 2, 1)
+
+# the letters of the classic "etaoin shrdlu" ordering, from which a fraction of the words are built exclusively, so
+# that there are enough matches for realistic constraints
+COMMON_LETTERS = "etaoinshrdlu"
+COMMON_FRACTION = 0.2
+
+SEED = 0
+
+
+def synthetic_words(num_words: int, seed: int = SEED) -> Iterator[str]:
+    """
+    Yields `num_words` pseudorandom words, which are always the same for a given seed.
+
+    Letters are drawn with roughly their frequencies in English, except that `COMMON_FRACTION` of the words only use
+    `COMMON_LETTERS`. Words are not deduplicated, just like real word lists, and about one in ten is capitalized.
+
+    """
+    rng = random.Random(seed)
+    letters = list(LETTER_FREQUENCIES.keys())
+    letter_weights = list(LETTER_FREQUENCIES.values())
+    lengths = range(1, len(LENGTH_FREQUENCIES) + 1)
+    for _ in range(num_words):
+        length = rng.choices(lengths, LENGTH_FREQUENCIES)[0]
+        if rng.random() < COMMON_FRACTION:
+            word = "".join(rng.choices(COMMON_LETTERS, k=length))
+        else:
+            word = "".join(rng.choices(letters, letter_weights, k=length))
+        if rng.random() < 0.1:
+            word = word.capitalize()
+        yield word
+
+
+def synthetic_dictionary(num_words: int, data_dir: str, seed: int = SEED) -> str:
+    """Returns the path to a synthetic word list of `num_words` words, generating and caching it if necessary"""
+    path = os.path.join(data_dir, f"words-{num_words}-{seed}.txt")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            for word in synthetic_words(num_words, seed):
+                f.write(f"{word}\n")
+        os.replace(tmp_path, path)
+    return path
@@ -15,11 +15,12 @@ setup(
     url='https://github.com/ESultanik/visie',
     author='Evan Sultanik',
     version='0.1.1',
-    packages=find_packages(exclude=["test"]),
+    packages=find_packages(exclude=["test", "benchmarks"]),
     python_requires='>=3.6',
     install_requires=[],
     extras_require={
-        "dev": ["flake8", "pytest", "twine", "mypy>=0.812"]
+        "dev": ["flake8", "pytest", "twine", "mypy>=0.812"],
+        "numpy": ["numpy"]
     },
     entry_points={
         'console_scripts': [
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# the tests must never write to the user's real cache directory
+_CACHE_HOME = tempfile.TemporaryDirectory()
+os.environ["XDG_CACHE_HOME"] = _CACHE_HOME.name
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from visie import SearchBudget, aio, budget, generate
+from visie.parser import Parser
+
+from .test_visie import LOCAL_DICT_PATH
+
+# matches almost every word in the dictionary, so searching all of it takes far longer than the tests' deadlines
+SLOW = "{a b c d e f g h i j k l m n o p q r s t u v w x y z .}"
+
+
+class TestAio(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_search(self):
+        test = "pleasing orange home noise expeller"
+        expected = [str(a) for a in generate(Parser(test).parse(), dict_path=LOCAL_DICT_PATH)]
+        result = self.loop.run_until_complete(aio.search(Parser(test).parse(), dict_path=LOCAL_DICT_PATH))
+        self.assertTrue(result.finished)
+        self.assertIsNone(result.stop_reason)
+        self.assertEqual([str(a) for a in result.acronyms], expected)
+        result = self.loop.run_until_complete(
+            aio.search(Parser(test).parse(), max_results=2, dict_path=LOCAL_DICT_PATH)
+        )
+        self.assertFalse(result.finished)
+        self.assertEqual(result.stop_reason, budget.MAX_RESULTS)
+        self.assertEqual([str(a) for a in result.acronyms], expected[:2])
+
+    def test_deadline(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                start = time.monotonic()
+                result = self.loop.run_until_complete(
+                    aio.search(Parser(SLOW).parse(), timeout=0.2, dict_path=LOCAL_DICT_PATH, jobs=jobs)
+                )
+                self.assertLess(time.monotonic() - start, 5.0)
+                self.assertFalse(result.finished)
+                self.assertEqual(result.stop_reason, budget.DEADLINE)
+
+    def test_cancel(self):
+        search_budget = SearchBudget()
+
+        async def first_results():
+            acronyms = []
+            results = aio.agenerate(Parser(SLOW).parse(), search_budget, dict_path=LOCAL_DICT_PATH)
+            async for acronym in results:
+                acronyms.append(acronym)
+                if len(acronyms) == 3:
+                    break
+            await results.aclose()
+            return acronyms
+
+        self.assertEqual(len(self.loop.run_until_complete(first_results())), 3)
+        self.assertTrue(search_budget.cancelled)
+
+        # a search that got far enough ahead to fill the queue still stops once the iteration is closed
+        search_budget = SearchBudget()
+
+        async def first_result():
+            results = aio.agenerate(Parser(SLOW).parse(), search_budget, dict_path=LOCAL_DICT_PATH)
+            acronym = await results.__anext__()
+            await asyncio.sleep(0.5)
+            await results.aclose()
+            return acronym
+
+        self.loop.run_until_complete(first_result())
+        # the search waited for the iteration rather than queueing every result
+        self.assertLessEqual(search_budget.results, aio.QUEUE_SIZE + 2)
+        deadline = time.monotonic() + 5.0
+        while any(t.name == "visie-search" for t in threading.enumerate()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(any(t.name == "visie-search" for t in threading.enumerate()))
+        # an exception raised by the search is raised by the iteration
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(aio.search(Parser(SLOW).parse(), engine="none"))
+
+    def test_budget(self):
+        search_budget = SearchBudget(max_results=2)
+        self.assertEqual(list(search_budget.limit(iter("abc"))), ["a", "b"])
+        self.assertFalse(search_budget.finished)
+        search_budget = SearchBudget.after(60.0)
+        self.assertEqual(list(search_budget.limit(search_budget.words("abc"))), ["a", "b", "c"])
+        self.assertTrue(search_budget.finished)
+        self.assertGreater(search_budget.remaining(), 0.0)
+        search_budget.cancel()
+        self.assertEqual(list(SearchBudget(deadline=0.0).words("abc")), [])
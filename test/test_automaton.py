@@ -0,0 +1,33 @@
+import unittest
+
+from visie import generate
+from visie.automaton import Automaton
+from visie.parser import Parser
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestAutomaton(unittest.TestCase):
+    def test_accepts(self):
+        for test, words in (
+                ("[pleasing orange home <noise expeller>]", ("phone", "PHONE", "hope", "phones", "ph")),
+                ("<. is? a? [pleasing orange home noise expeller]>", ("diaphone", "wanhope", "dphone", "iaphone")),
+                ("pleasing home ({orange noise} expeller)", ("phon", "phone", "hope", "ophn")),
+                ("<a? b?>", ("a", "b", "ab", "ba")),
+        ):
+            constraint = Parser(test).parse()
+            automaton = Automaton(constraint)
+            for word in words:
+                self.assertEqual(automaton.accepts(word), any(True for _ in constraint.matches(word)), word)
+
+    def test_generate(self):
+        for test in (
+                "pleasing orange home <noise expeller>",
+                "<diaphone is? a? [pleasing orange home noise expeller]>",
+                "<. is? a? [pleasing orange home noise expeller]>",
+        ):
+            constraint = Parser(test).parse()
+            self.assertEqual(
+                [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH, engine="automaton")],
+                [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH)]
+            )
@@ -0,0 +1,53 @@
+import unittest
+
+from benchmarks.cases import all_cases
+from benchmarks.fuzz import fuzz
+from benchmarks.runner import compare, parse_size
+from benchmarks.synthetic import synthetic_words
+from visie import ENGINES
+from visie.parser import Parser
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_synthetic_words(self):
+        words = list(synthetic_words(1000, seed=1))
+        self.assertEqual(len(words), 1000)
+        self.assertEqual(words, list(synthetic_words(1000, seed=1)))
+        self.assertNotEqual(words, list(synthetic_words(1000, seed=2)))
+
+    def test_cases(self):
+        for case in all_cases():
+            Parser(case.constraint).parse()
+
+    def test_compare(self):
+        self.assertEqual(parse_size("5m"), 5000000)
+        self.assertEqual(parse_size("10k"), 10000)
+        baseline = {"case@10": {
+            "seconds": 1.0, "words_per_second": 10.0, "first_result_seconds": 0.5, "peak_rss_mib": 10.0, "results": 3
+        }}
+        self.assertEqual(compare(baseline, baseline), [])
+        slower = {"case@10": dict(baseline["case@10"], seconds=2.0, words_per_second=5.0, results=2)}
+        self.assertEqual(len(compare(baseline, slower)), 2)
+        self.assertEqual(len(compare(baseline, {"case@10": {"timeout": True}})), 1)
+
+    def test_fuzz(self):
+        report = fuzz(trials=30, seed=1, num_words=200)
+        self.assertEqual(report.trials, 30)
+        self.assertEqual(report.mismatches, [])
+        self.assertEqual(set(report.seconds.keys()), set(ENGINES.keys()))
+
+        def first_only(constraint, words):
+            # an engine that wrongly stops after the first match of each word
+            for word, matches in ENGINES["recursive"](constraint, words):
+                yield word, list(matches)[:1]
+
+        ENGINES["first-only"] = first_only
+        try:
+            report = fuzz(trials=30, seed=1, num_words=200, engines=["first-only"])
+        finally:
+            del ENGINES["first-only"]
+        self.assertTrue(report.mismatches)
+        mismatch = report.mismatches[0]
+        self.assertEqual(mismatch.engine, "first-only")
+        self.assertEqual(mismatch.actual, mismatch.expected[:1])
+        self.assertGreater(len(mismatch.expected), 1)
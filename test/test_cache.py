@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from visie import SearchBudget, generate
+from visie.cache import ResultCache
+from visie.parser import parse_constraints
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dict_path = os.path.join(self.tmpdir.name, "words")
+        with open(LOCAL_DICT_PATH, "r") as src, open(self.dict_path, "w") as dst:
+            dst.writelines(src.readlines()[::4])
+        self.cache = ResultCache(os.path.join(self.tmpdir.name, "cache"))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_cache(self):
+        constraint = parse_constraints(["{a b c d e f .}"])
+        expected = [str(a) for a in generate(constraint, dict_path=self.dict_path)]
+        for _ in range(2):
+            self.assertEqual([str(a) for a in self.cache.generate(constraint, dict_path=self.dict_path)], expected)
+        self.assertEqual((self.cache.misses, self.cache.hits), (1, 1))
+        # the results depend on the minimum length
+        list(self.cache.generate(constraint, min_length=4, dict_path=self.dict_path))
+        self.assertEqual(self.cache.misses, 2)
+        # and on the deduplication mode, since approximate deduplication can drop results
+        list(self.cache.generate(constraint, dict_path=self.dict_path, dedupe_mode="fingerprint"))
+        self.assertEqual(self.cache.misses, 3)
+        self.assertEqual([str(a) for a in self.cache.generate(constraint, dict_path=self.dict_path)], expected)
+        self.assertEqual(self.cache.misses, 3)
+        # and are not reused once the dictionary changes
+        with open(self.dict_path, "a") as f:
+            f.write("fabcdex\n")
+        os.utime(self.dict_path, ns=(0, 0))
+        results = [str(a) for a in self.cache.generate(constraint, dict_path=self.dict_path)]
+        self.assertEqual(self.cache.misses, 4)
+        self.assertEqual(results, [str(a) for a in generate(constraint, dict_path=self.dict_path)])
+        self.assertNotEqual(results, expected)
+
+    def test_incomplete(self):
+        constraint = parse_constraints(["{a b c d e f .}"])
+        budget = SearchBudget(max_results=2)
+        self.assertEqual(len(list(self.cache.generate(constraint, dict_path=self.dict_path, budget=budget))), 2)
+        self.assertEqual(self.cache.size(), 0)
+        # results that are not read to the end are not saved either
+        results = self.cache.generate(constraint, dict_path=self.dict_path)
+        next(results)
+        results.close()
+        self.assertEqual(self.cache.size(), 0)
+        self.assertEqual(os.listdir(self.cache.directory), [])
+
+    def test_eviction(self):
+        tests = ["{a b c d e f .}", "pleasing orange home noise expeller", "{a b c d e .}"]
+        for test in tests:
+            list(self.cache.generate(parse_constraints([test]), dict_path=self.dict_path))
+        sizes = [os.path.getsize(path) for _, _, path in sorted(self.cache._entries())]
+        self.assertEqual(len(sizes), 3)
+        # make the first search the most recently used
+        list(self.cache.generate(parse_constraints([tests[0]]), dict_path=self.dict_path))
+        self.cache.max_bytes = self.cache.size() - 1
+        self.cache.evict()
+        self.assertEqual(self.cache.size(), sum(sizes) - sizes[1])
+        self.cache.clear()
+        self.assertEqual(self.cache.size(), 0)
+        # the letter frequencies of the dictionary are kept with the results, not next to the dictionary
+        frequencies_directory = os.path.dirname(self.cache.frequency_path(self.dict_path))
+        self.assertEqual(os.path.dirname(frequencies_directory), self.cache.directory)
+        self.assertFalse(os.path.exists(frequencies_directory))
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from visie import dedupe, generate
+from visie.parser import Parser
+from visie.stats import SearchStats
+
+WORDS = ["hope", "phone", "Hope", "nope", "HOPE", "open", "phone", "pone", "nope", "hone"]
+
+
+class TestDedupe(unittest.TestCase):
+    def test_seen_sets(self):
+        for mode in ("exact", "fingerprint"):
+            with self.subTest(mode=mode):
+                seen = dedupe.seen_set(mode)
+                for i in range(1000):
+                    seen.add(f"word{i}")
+                seen.add("word0")
+                self.assertEqual(len(seen), 1000)
+                self.assertIn("word999", seen)
+                self.assertNotIn("word1000", seen)
+                self.assertGreater(seen.memory_bytes, 0)
+                limited = dedupe.seen_set(mode, max_bytes=1024)
+                with self.assertRaises(dedupe.DedupeMemoryError):
+                    for i in range(1000):
+                        limited.add(f"word{i}")
+        self.assertRaises(ValueError, lambda: dedupe.seen_set("external"))
+
+    def test_parse_bytes(self):
+        self.assertEqual(dedupe.parse_bytes("1024"), 1024)
+        self.assertEqual(dedupe.parse_bytes("512k"), 512 << 10)
+        self.assertEqual(dedupe.parse_bytes("64MB"), 64 << 20)
+        self.assertEqual(dedupe.parse_bytes("1.5G"), 3 << 29)
+        self.assertRaises(ValueError, lambda: dedupe.parse_bytes("lots"))
+
+    def test_external_sorter(self):
+        sorter = dedupe.ExternalSorter(key=lambda record: record, max_bytes=10)
+        for i in (5, 3, 9, 1, 7, 2):
+            sorter.add(i, 4)
+        self.assertEqual(list(sorter.sorted()), [1, 2, 3, 5, 7, 9])
+
+    def test_modes(self):
+        constraint = "pleasing orange home noise expeller"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dict_path = os.path.join(tmpdir, "words")
+            with open(dict_path, "w") as f:
+                f.write("\n".join(WORDS))
+            expected = [str(a) for a in generate(Parser(constraint).parse(), dict_path=dict_path)]
+            self.assertEqual(len(expected), 6)
+            for mode in dedupe.MODES:
+                for max_bytes in (None, 256):
+                    if mode != "external" and max_bytes is not None:
+                        continue
+                    with self.subTest(mode=mode, max_bytes=max_bytes):
+                        search_stats = SearchStats()
+                        results = generate(
+                            Parser(constraint).parse(), dict_path=dict_path, search_stats=search_stats,
+                            dedupe_mode=mode, dedupe_memory=max_bytes
+                        )
+                        self.assertEqual([str(a) for a in results], expected)
+                        self.assertEqual(search_stats.words_matched, 6)
+                        self.assertEqual(search_stats.duplicates, 4)
+                        self.assertGreater(search_stats.dedupe_bytes, 0)
+            with self.assertRaises(dedupe.DedupeMemoryError):
+                list(generate(Parser(constraint).parse(), dict_path=dict_path, dedupe_memory=1))
+            self.assertRaises(ValueError, lambda: list(generate(Parser(constraint).parse(), dedupe_mode="none")))
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from visie import generate
+from visie.incremental import IncrementalSearch
+from visie.optimizer import optimize
+from visie.parser import parse_constraints
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestIncremental(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.dict_path = os.path.join(cls.tmpdir.name, "words")
+        with open(LOCAL_DICT_PATH, "r") as src, open(cls.dict_path, "w") as dst:
+            dst.writelines(src.readlines()[::4])
+        cls.search = IncrementalSearch(cls.dict_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def test_generate(self):
+        for test in (
+                "pleasing orange home noise expeller",
+                "<. is? a? [pleasing orange home noise expeller]>",
+                "<. is? a? (pleasing orange home noise expeller) (pleasing orange home noise expeller)>",
+                "{a b c d e f .}",
+                "<(efficient simple magical) recursive? (acronym initialism) (name word)? (generator enumerator)>",
+                "<. . . . .>?",
+                "x",
+        ):
+            constraint = optimize(parse_constraints([test]))
+            with self.subTest(test=test):
+                self.assertEqual(
+                    [str(a) for a in self.search.generate(constraint, min_length=3)],
+                    [str(a) for a in generate(constraint, min_length=3, dict_path=self.dict_path)]
+                )
+
+    def test_edits(self):
+        test = "<. is? a? [pleasing orange home noise expeller]>"
+        list(self.search.generate(optimize(parse_constraints([test]))))
+        edited = optimize(parse_constraints(["<. is? a? the? [pleasing orange home noise expeller]>"]))
+        self.assertEqual(
+            [str(a) for a in self.search.generate(edited)],
+            [str(a) for a in generate(edited, dict_path=self.dict_path)]
+        )
+        # only the new optional word had to be evaluated
+        self.assertEqual(self.search.evaluated, 1)
+        self.assertEqual(self.search.reused, 3)
+
+    def test_max_spans(self):
+        search = IncrementalSearch(self.dict_path, max_spans=10)
+        for test in (
+                "<. is? a? (pleasing orange home noise expeller) (pleasing orange home noise expeller)>",
+                "<. a? (pleasing orange home noise expeller) (pleasing orange home noise expeller)>",
+        ):
+            constraint = optimize(parse_constraints([test]))
+            # the spans of the least recently used subtrees are forgotten before the next constraint is searched
+            self.assertLessEqual(sum(relation.remembered() for relation in search._cache.values()), 10)
+            with self.subTest(test=test):
+                self.assertEqual(
+                    [str(a) for a in search.generate(constraint)],
+                    [str(a) for a in generate(constraint, dict_path=self.dict_path)]
+                )
+            self.assertGreater(sum(relation.remembered() for relation in search._cache.values()), 10)
+            search._forget_spans()
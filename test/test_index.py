@@ -0,0 +1,49 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from visie import generate
+from visie.index import build_index, DictionaryIndex, InvalidIndexException, is_index
+from visie.parser import Parser
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestIndex(unittest.TestCase):
+    def test_index(self):
+        with TemporaryDirectory() as tmpdir:
+            index_path = os.path.join(tmpdir, "words.idx")
+            self.assertEqual(build_index(("foo", "Bar", "bar", "  baz\n", "", "quux", "BAR"), index_path), 4)
+            self.assertTrue(is_index(index_path))
+            with DictionaryIndex(index_path) as index:
+                self.assertEqual(len(index), 4)
+                self.assertEqual(list(index), ["foo", "Bar", "baz", "quux"])
+                self.assertEqual(list(index.words(4, 10)), ["quux"])
+                self.assertEqual(list(index.words(0, 2)), [])
+                self.assertEqual(list(index.words(start=1, end=3)), ["Bar", "baz"])
+                self.assertEqual(index.bucket(3), (0, 3))
+                self.assertEqual(index.word(2), "baz")
+            build_index(("kiwi", "fig", "apple", "Fig", "date", "banana"), index_path)
+            with DictionaryIndex(index_path) as index:
+                # words are bucketed by length, but yielded in the order of the word list
+                self.assertEqual(index.bucket(3), (0, 1))
+                self.assertEqual(list(index), ["kiwi", "fig", "apple", "date", "banana"])
+                self.assertEqual(list(index.words(4, 5)), ["kiwi", "apple", "date"])
+                self.assertEqual(list(index.words(4, 6, start=2, end=4)), ["apple", "date"])
+
+    def test_invalid_index(self):
+        self.assertFalse(is_index(LOCAL_DICT_PATH))
+        self.assertRaises(InvalidIndexException, lambda: DictionaryIndex(LOCAL_DICT_PATH))
+
+    def test_generate(self):
+        with TemporaryDirectory() as tmpdir:
+            index_path = os.path.join(tmpdir, "words.idx")
+            with open(LOCAL_DICT_PATH, "r") as words:
+                build_index(words, index_path)
+            for test in ("pleasing orange home noise expeller", "pleasing home ({orange noise} expeller)"):
+                constraint = Parser(test).parse()
+                # the results are in the order of the word list, not grouped by length
+                self.assertEqual(
+                    [str(a) for a in generate(constraint, min_length=4, dict_path=index_path)],
+                    [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH)]
+                )
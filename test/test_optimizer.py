@@ -0,0 +1,44 @@
+import unittest
+
+from visie import generate
+from visie.optimizer import optimize, plan, structural_key
+from visie.parser import Parser, parse_constraints
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestOptimizer(unittest.TestCase):
+    def test_optimize(self):
+        for test, expected in (
+                ("<a <b c>>", "<a b c>"),
+                ("<a <>>", "<a <>>"),
+                ("((a b) (c a))", "(a b c)"),
+                ("<a> [b] (c)", "{a b c}"),
+                ("{a}", "a"),
+                ("<b {a}>", "<b {a}>"),
+                ("<b {{a c}}>", "<b {a c}>"),
+                ("a??", "a?"),
+                ("<a b>?", "<a b>?"),
+        ):
+            self.assertEqual(plan(optimize(Parser(test).parse())), expected)
+        self.assertEqual(plan(optimize(parse_constraints(["a b", "c d"]))), "({a b} {c d})")
+
+    def test_structural_key(self):
+        self.assertEqual(structural_key(Parser("<a (b c)>").parse()), structural_key(Parser("<a (b c)>").parse()))
+        self.assertNotEqual(structural_key(Parser("<a (b c)>").parse()), structural_key(Parser("<a (c b)>").parse()))
+        self.assertNotEqual(structural_key(Parser("apple").parse()), structural_key(Parser("avocado").parse()))
+
+    def test_generate(self):
+        for test in (
+                ["pleasing orange home <noise expeller>"],
+                ["<. is? a? [<pleasing> orange home noise expeller]>"],
+                ["pleasing home", "orange noise expeller", "home noise"],
+                ["<<(pleasing (pleasing home)) (orange orange)> noise?? expeller?>"],
+        ):
+            constraint = parse_constraints(test)
+            expected = [str(a) for a in generate(constraint, min_length=3, dict_path=LOCAL_DICT_PATH)]
+            # the original constraint may produce duplicate matches, but the optimized one never does
+            self.assertEqual(
+                [str(a) for a in generate(optimize(constraint), min_length=3, dict_path=LOCAL_DICT_PATH)],
+                list(dict.fromkeys(expected))
+            )
@@ -0,0 +1,51 @@
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from visie import generate
+from visie.index import build_index
+from visie.parallel import shards
+from visie.parser import Parser
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestParallel(unittest.TestCase):
+    def test_shards(self):
+        text_shards = shards(LOCAL_DICT_PATH, 7)
+        self.assertEqual(text_shards[0][0], 0)
+        self.assertEqual(text_shards[-1][1], os.path.getsize(LOCAL_DICT_PATH))
+        for (_, end), (start, _) in zip(text_shards, text_shards[1:]):
+            self.assertEqual(end, start)
+
+    def test_generate(self):
+        constraint = Parser("pleasing orange home <noise expeller>").parse()
+        expected = [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH)]
+        self.assertEqual(
+            [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH, jobs=2)], expected
+        )
+        self.assertEqual(
+            sorted(str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH, jobs=2, ordered=False)),
+            sorted(expected)
+        )
+        with TemporaryDirectory() as tmpdir:
+            index_path = os.path.join(tmpdir, "words.idx")
+            with open(LOCAL_DICT_PATH, "r") as words:
+                build_index(words, index_path)
+            self.assertEqual(
+                [str(a) for a in generate(constraint, min_length=4, dict_path=index_path, jobs=2)], expected
+            )
+
+    def test_min_length_zero(self):
+        # a constraint that can match nothing at all must not be matched against blank lines
+        constraint = Parser("<ax?>").parse()
+        with TemporaryDirectory() as tmpdir:
+            dict_path = os.path.join(tmpdir, "words")
+            with open(LOCAL_DICT_PATH, "r") as src, open(dict_path, "w") as dst:
+                lines = src.readlines()[:2000]
+                dst.writelines(lines[:1000] + ["\n", "ax\n"] + lines[1000:])
+            expected = [str(a) for a in generate(constraint, min_length=0, dict_path=dict_path)]
+            self.assertEqual(expected, ["ax"])
+            self.assertEqual(
+                [str(a) for a in generate(constraint, min_length=0, dict_path=dict_path, jobs=2)], expected
+            )
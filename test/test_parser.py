@@ -1,6 +1,7 @@
 import unittest
 
 import visie
+from visie.optimizer import optimize, plan
 from visie.parser import Parser, ParseException, Token, tokenize
 
 
@@ -20,3 +21,26 @@ class TestParser(unittest.TestCase):
         self.assertIsInstance(Parser("(foo bar)").parse(), visie.ExactlyOneConstraint)
         self.assertIsInstance(Parser("foo?").parse(), visie.OptionalConstraint)
         self.assertIsInstance(Parser(".").parse(), visie.Wildcard)
+
+    def test_deep_nesting(self):
+        depth = 10000
+        constraint = Parser(f"{'<' * depth}foo bar{'>' * depth}").parse()
+        for _ in range(depth - 1):
+            self.assertIsInstance(constraint, visie.OrderedConstraint)
+            constraint = constraint.children[0]
+        self.assertEqual([str(child) for child in constraint.children], ["foo", "bar"])
+        # simplifying the constraint does not recurse either, and flattens the nested groups
+        self.assertEqual(plan(optimize(Parser(f"{'<' * depth}foo bar{'>' * depth}").parse())), "<foo bar>")
+        self.assertRaises(Exception, lambda: Parser(f"{'<' * depth}foo{'>' * (depth - 1)}").parse())
+
+    def test_long_constraint(self):
+        words = [f"w{'a' * (i % 7)}{chr(ord('a') + i % 26)}" for i in range(50000)]
+        constraint = Parser(f"<{' '.join(words)}>?").parse()
+        self.assertIsInstance(constraint, visie.OptionalConstraint)
+        self.assertEqual(len(constraint.children[0].children), len(words))
+
+    def test_errors(self):
+        self.assertRaisesRegex(Exception, "closing delimiter", lambda: Parser("<foo bar").parse())
+        self.assertRaises(ParseException, lambda: Parser("foo!").parse())
+        self.assertRaisesRegex(Exception, "Unexpected '\\?' token", lambda: Parser("?").parse())
+        self.assertRaisesRegex(Exception, "No tokens found", lambda: Parser(" \n").parse())
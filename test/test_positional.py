@@ -0,0 +1,50 @@
+import unittest
+
+from visie import positional
+from visie.parser import Parser
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestPositional(unittest.TestCase):
+    def test_position_letters(self):
+        constraint = Parser("<. is? a? [pleasing orange home noise expeller]>").parse()
+        spans = positional.leaf_spans(constraint)
+        letters = positional.position_letters(spans, 7)
+        self.assertIsNone(letters[0])
+        # a seven-letter word has room for only one of `is` and `a`
+        self.assertEqual(letters[1], frozenset("ia"))
+        self.assertEqual(letters[2:], [frozenset("phone")] * 5)
+        self.assertEqual(positional.position_letters(spans, 8)[1:3], [frozenset("i"), frozenset("a")])
+        # no word longer than the constraint can match it
+        self.assertIn(frozenset(), positional.position_letters(spans, 9))
+
+    def test_filter(self):
+        with open(LOCAL_DICT_PATH, "r") as f:
+            words = [line.strip() for line in f][::7] + ["Émile", "o'ph", "phone"]
+        index = positional.PositionalIndex(words)
+        for test in (
+                "pleasing orange home noise expeller",
+                "<. is? a? [pleasing orange home noise expeller]>",
+                "<. . (kilo coal) . .>",
+                "<(efficient simple magical) recursive? (acronym initialism) (name word)? (generator enumerator)>",
+        ):
+            constraint = Parser(test).parse()
+            min_length, max_length = max(constraint.min_length(), 1), constraint.max_length()
+            position_filter = positional.PositionFilter(constraint, min_length, max_length)
+            self.assertTrue(position_filter)
+            candidates = [word for word in words if min_length <= len(word) <= max_length]
+            admitted = list(position_filter.filter(candidates))
+            self.assertEqual(list(index.words_for(constraint, min_length, max_length)), admitted)
+            word_ids = index.candidates(constraint, min_length, max_length)
+            self.assertEqual(
+                index.candidates(constraint, min_length, max_length, 1000, 20000),
+                [word_id for word_id in word_ids if 1000 <= word_id < 20000]
+            )
+            self.assertLess(len(admitted), len(candidates))
+            admitted_set = set(admitted)
+            for word in candidates:
+                if word not in admitted_set:
+                    self.assertFalse(any(True for _ in constraint.matches(word)), word)
+                    # words containing non-ASCII characters are never rejected
+                    self.assertNotEqual(word, "Émile")
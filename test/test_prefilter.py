@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from visie import frequencies, prefilter, wordlist
+from visie.frequencies import LetterFrequencies
+from visie.parser import Parser
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestPrefilter(unittest.TestCase):
+    def test_letter_bounds(self):
+        mins, maxs = Parser("<. (orange open) [pleasing home]? {noise expeller}>").parse().letter_bounds()
+        self.assertEqual(mins[prefilter.column("o")], 1)
+        self.assertEqual(maxs[prefilter.column("o")], 2)
+        self.assertEqual((mins[prefilter.column("p")], maxs[prefilter.column("p")]), (0, 2))
+        self.assertEqual((mins[prefilter.column("z")], maxs[prefilter.column("z")]), (0, 1))
+        self.assertEqual(maxs[prefilter.OTHER], 1)
+
+    def test_filter(self):
+        with open(LOCAL_DICT_PATH, "r") as f:
+            words = [line.strip() for line in f][::7] + ["Émile", "o'ph", "phone"]
+        for test in (
+                "pleasing orange home noise expeller",
+                "<. is? a? [pleasing orange home noise expeller]>",
+                "<. . (kilo coal) . .>",
+        ):
+            constraint = Parser(test).parse()
+            letter_filter = prefilter.LetterFilter(constraint, constraint.max_length(), block_size=1000)
+            self.assertTrue(letter_filter)
+            admitted = list(letter_filter.filter(words))
+            self.assertEqual(admitted, [word for word in words if letter_filter.admits(word)])
+            self.assertIn("Émile", admitted)
+            self.assertLess(len(admitted), len(words))
+            admitted_set = set(admitted)
+            for word in words:
+                if word not in admitted_set:
+                    self.assertFalse(any(True for _ in constraint.matches(word)), word)
+
+    def test_frequencies(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dict_path = os.path.join(tmpdir, "words")
+            with open(dict_path, "w") as f:
+                f.write("\n".join(("apple", "Banana", "cherry", "date", "elderberry", "fig", "Émile", "o'ph")))
+            path = os.path.join(tmpdir, "words.freq")
+            self.assertIsNone(frequencies.load(path, dict_path, 0, 10))
+            words = list(wordlist.iter_words(dict_path, 0, 10))
+            self.assertEqual(list(frequencies.counting(path, dict_path, iter(words), 0, 10)), words)
+            letter_frequencies = frequencies.load(path, dict_path, 0, 10)
+            self.assertEqual(letter_frequencies.words, 8)
+            self.assertEqual(letter_frequencies.containing["a"], 3)
+            self.assertEqual(letter_frequencies.containing["e"], 5)
+            self.assertEqual(LetterFrequencies.count(words).to_dict(), letter_frequencies.to_dict())
+            # the frequencies of any lengths within the ones counted can be reused, but not of any others
+            self.assertEqual(
+                frequencies.load(path, dict_path, 4, 5).to_dict(),
+                LetterFrequencies.count(word for word in words if 4 <= len(word) <= 5).to_dict()
+            )
+            self.assertIsNone(frequencies.load(path, dict_path, 0, 11))
+
+        constraint = Parser("pleasing orange home noise expeller").parse()
+        letter_filter = prefilter.LetterFilter(constraint, constraint.max_length(), frequencies=letter_frequencies)
+        # the most common letters that cannot occur are checked first
+        self.assertEqual([letter for letter, _, _ in letter_filter._letter_checks[:2]], ["a", "l"])
+        with open(LOCAL_DICT_PATH, "r") as f:
+            words = [line.strip() for line in f][::29]
+        unordered_filter = prefilter.LetterFilter(constraint, constraint.max_length())
+        self.assertEqual(
+            [word for word in words if letter_filter.admits(word)],
+            [word for word in words if unordered_filter.admits(word)]
+        )
@@ -0,0 +1,77 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from visie import Acronym, generate, index, ranking, wordlist
+from visie.__main__ import main
+from visie.optimizer import optimize
+from visie.parser import parse_constraints
+
+from .test_visie import LOCAL_DICT_PATH
+
+CONSTRAINTS = ["<. is? a? [pleasing orange home noise expeller]>", "pleasing orange home noise expeller"]
+
+
+class TestRanking(unittest.TestCase):
+    def test_scorers(self):
+        constraint = optimize(parse_constraints(CONSTRAINTS))
+        acronym = Acronym("d", "is", "a", "pleasing", "home", "orange", "noise", "expeller")
+        self.assertEqual(ranking.LengthScorer(constraint).score(acronym), 8)
+        self.assertEqual(ranking.CoverageScorer(constraint).score(acronym), 1.0)
+        self.assertEqual(
+            ranking.CoverageScorer(constraint).score(Acronym("pleasing", "home", "orange", "noise", "expeller")), 5 / 7
+        )
+        self.assertEqual(ranking.CoverageScorer(constraint).bound(3), 3 / 7)
+        self.assertEqual(ranking.PronounceabilityScorer(constraint).score(acronym), 1.0)
+        self.assertEqual(ranking.PronounceabilityScorer(constraint).score(Acronym(*"strngth")), 1 - 5 / 7)
+        frequency_list = ranking.FrequencyList(["the 100", "phone 50", "The 10", "hone 5"])
+        scorer = ranking.FrequencyScorer(constraint, frequency_list)
+        self.assertEqual(scorer.score(Acronym("pleasing", "home", "orange", "noise", "expeller")), 1 - 1 / 3)
+        self.assertEqual(scorer.score(acronym), 0.0)
+        self.assertRaises(ValueError, lambda: ranking.FrequencyScorer(constraint))
+
+    def test_top(self):
+        constraint = optimize(parse_constraints(CONSTRAINTS[1:]))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dict_path = os.path.join(tmpdir, "words")
+            with open(LOCAL_DICT_PATH, "r") as src, open(dict_path, "w") as dst:
+                dst.writelines(src.readlines()[::2])
+            index_path = os.path.join(tmpdir, "words.idx")
+            index.build_index(wordlist.iter_words(dict_path), index_path)
+            acronyms = list(generate(constraint, min_length=3, dict_path=dict_path))
+            self.assertGreater(len(acronyms), 3)
+            for name, scorer_type in ranking.SCORERS.items():
+                scorer = scorer_type(constraint, ranking.FrequencyList(["hone", "phone", "wanhope"]))
+                expected = sorted(
+                    ((scorer.score(a), a) for a in acronyms),
+                    key=lambda result: (result[0], len(result[1].name())),
+                    reverse=True
+                )[:3]
+                for path in (dict_path, index_path):
+                    with self.subTest(scorer=name, dict_path=path):
+                        results = ranking.top(constraint, 3, scorer, min_length=3, dict_path=path)
+                        self.assertEqual(
+                            [(score, str(a)) for score, a in results], [(score, str(a)) for score, a in expected]
+                        )
+        self.assertEqual(ranking.top(constraint, 0, ranking.LengthScorer(constraint), dict_path=LOCAL_DICT_PATH), [])
+
+    def test_top_min_length_zero(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dict_path = os.path.join(tmpdir, "words")
+            with open(dict_path, "w") as f:
+                f.write("apple\n\na\nb\n")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                main(["visie", "--dict", dict_path, "-m", "0", "--top", "3", "<ax?>"])
+            # the blank line is not a word, even with no minimum length
+            self.assertEqual(output.getvalue(), "A: ax\n")
+
+    def test_top_k(self):
+        best = ranking.TopK(2)
+        for score, word in ((1, "one"), (3, "three"), (2, "two"), (3, "tie")):
+            best.add(score, Acronym(word))
+        self.assertEqual([(score, str(a)) for score, a in best.results()], [(3, "three"), (3, "tie")])
+        self.assertFalse(best.can_improve(3, 1))
+        self.assertTrue(best.can_improve(3, 2))
@@ -0,0 +1,66 @@
+import asyncio
+import multiprocessing
+import os
+from tempfile import TemporaryDirectory
+import threading
+import time
+import unittest
+
+from visie import generate
+from visie.parser import Parser
+from visie.server import QueryServer, ServerException, query
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestServer(unittest.TestCase):
+    def test_query(self):
+        with TemporaryDirectory() as tmpdir:
+            dict_path = os.path.join(tmpdir, "words")
+            socket_path = os.path.join(tmpdir, "visie.sock")
+            with open(LOCAL_DICT_PATH, "r") as src, open(dict_path, "w") as dst:
+                dst.writelines(src.readlines()[::5])
+            query_server = QueryServer(dict_path, jobs=2)
+            loop = asyncio.new_event_loop()
+            server = loop.run_until_complete(query_server.start(socket_path))
+            thread = threading.Thread(target=loop.run_forever)
+            thread.start()
+            try:
+                test = "pleasing orange home noise expeller"
+                self.assertEqual(
+                    [str(a) for a in query([test], min_length=4, socket_path=socket_path)],
+                    [str(a) for a in generate(Parser(test).parse(), min_length=4, dict_path=dict_path)]
+                )
+                self.assertRaises(ServerException, lambda: list(query(["(foo"], socket_path=socket_path)))
+                # malformed fields are reported rather than dropping the connection
+                for min_length in (None, [4], "4"):
+                    with self.assertRaisesRegex(ServerException, "min_length"):
+                        list(query([test], min_length=min_length, socket_path=socket_path))
+                with self.assertRaisesRegex(ServerException, "use_variants"):
+                    list(query([test], use_variants=None, socket_path=socket_path))
+                # the word list is reloaded when it changes
+                with open(dict_path, "a") as f:
+                    f.write("Hopen\n")
+                self.assertIn("HOPEN", [a.name() for a in query([test], min_length=5, socket_path=socket_path)])
+                # the current snapshot is still served while the word list is being replaced
+                os.rename(dict_path, f"{dict_path}.new")
+                self.assertIn("HOPEN", [a.name() for a in query([test], min_length=5, socket_path=socket_path)])
+                os.rename(f"{dict_path}.new", dict_path)
+                # and the workers of the old snapshot are shut down once it is replaced
+                deadline = time.monotonic() + 30
+                while len(multiprocessing.active_children()) > 2 and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                self.assertEqual(len(multiprocessing.active_children()), 2)
+            finally:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                # let the handlers of the closed connections finish
+                all_tasks = getattr(asyncio, "all_tasks", None) or asyncio.Task.all_tasks  # Python 3.6
+                tasks = all_tasks(loop)
+                if tasks:
+                    # gathering nothing would create a future on the default event loop instead
+                    loop.run_until_complete(asyncio.gather(*tasks))
+                server.close()
+                loop.run_until_complete(server.wait_closed())
+                loop.close()
+                query_server.close()
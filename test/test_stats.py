@@ -0,0 +1,39 @@
+import io
+import unittest
+
+from visie import generate
+from visie.parser import Parser
+from visie.stats import SearchStats
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestStats(unittest.TestCase):
+    def test_stats(self):
+        test = "<. is? a? [pleasing orange home noise expeller]>"
+        constraint = Parser(test).parse()
+        search_stats = SearchStats()
+        self.assertEqual(
+            [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH, search_stats=search_stats)],
+            [str(a) for a in generate(Parser(test).parse(), min_length=4, dict_path=LOCAL_DICT_PATH)]
+        )
+        # the constraint is no longer instrumented once the search finishes
+        self.assertNotIn("match", vars(constraint))
+        stats = search_stats.to_dict()
+        self.assertEqual(stats["words"]["matched"], 2)
+        with open(LOCAL_DICT_PATH, "r") as f:
+            num_lines = sum(1 for _ in f)
+        # every line is counted, including those that the word list reader drops for their length
+        self.assertEqual(stats["words"]["read"], num_lines)
+        self.assertGreater(stats["words"]["dropped_by_length"], stats["words"]["dropped_by_letters"])
+        self.assertEqual(
+            sum(stats["words"][f"dropped_by_{stage}"] for stage in ("length", "letters", "positions")),
+            num_lines - search_stats.words_of_positions
+        )
+        root = stats["constraints"]
+        self.assertEqual(root["constraint"], "OrderedConstraint")
+        self.assertEqual(root["matches"], 2)
+        self.assertEqual([child["constraint"] for child in root["children"]][0], ".")
+        report = io.StringIO()
+        search_stats.report(report)
+        self.assertIn("└── expeller", report.getvalue())
@@ -0,0 +1,31 @@
+import unittest
+
+from visie import generate
+from visie.parser import Parser
+from visie.trie import Trie
+
+from .test_visie import LOCAL_DICT_PATH
+
+
+class TestTrie(unittest.TestCase):
+    def test_search(self):
+        trie = Trie(("hope", "Hone", "open", "pen", "hop"))
+        self.assertEqual(len(trie), 5)
+        self.assertEqual(
+            sorted(trie.search(Parser("[home orange <noise expeller>]").parse())), [(1, "Hone")]
+        )
+        self.assertEqual(
+            sorted(trie.search(Parser("<. (orange pleasing) expeller? noise?>").parse())), [(2, "open")]
+        )
+
+    def test_generate(self):
+        for test in (
+                "pleasing orange home noise expeller",
+                "[pleasing orange home <noise expeller>]",
+                "<. is? a? [pleasing orange home noise expeller]>",
+        ):
+            constraint = Parser(test).parse()
+            self.assertEqual(
+                [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH, engine="trie")],
+                [str(a) for a in generate(constraint, min_length=4, dict_path=LOCAL_DICT_PATH)]
+            )
@@ -0,0 +1,22 @@
+import unittest
+
+from visie.automaton import Automaton
+from visie.parser import Parser
+from visie.variants import generate_variants, matching_variants
+
+
+class TestVariants(unittest.TestCase):
+    def test_matching_variants(self):
+        for test in ("<. . . . . . .?>", "<. . (kilo coal) . . . . .?>", "{. . . . . . . . . .}", "<. . (apple ogre)>"):
+            constraint = Parser(test).parse()
+            automaton = Automaton(constraint)
+            for word in ("cake", "Kookaburra", "shui", "jay", "squeeze", "", "ok"):
+                for min_length, max_length in ((0, None), (4, 8), (7, 7)):
+                    expected = [
+                        variant for variant in generate_variants(word)
+                        if min_length <= len(variant) <= (max_length or len(variant))
+                        and any(True for _ in constraint.matches(variant))
+                    ]
+                    self.assertEqual(
+                        list(matching_variants(word, automaton, min_length, max_length)), expected, (test, word)
+                    )
@@ -1,7 +1,8 @@
+import math
 from pathlib import Path
 import unittest
 
-from visie import generate
+from visie import Acronym, AllOfConstraint, AnyOfConstraint, DictionaryWord, count, generate, generate_many
 from visie.parser import Parser
 
 
@@ -69,3 +70,91 @@ class TestVisie(unittest.TestCase):
                 r = (f"\n    {a!r}," for a in sorted(actual))
                 print(f"Actual result:\n{{{''.join(r)}\n}}\n")
             self.assertSetEqual(actual, expected)
+
+    def test_many_ambiguous_words(self):
+        # these would take factorial time without memoizing infeasible subsets of children
+        words = [f"a{i}" for i in range(14)]
+        for constraint_type in (AnyOfConstraint, AllOfConstraint):
+            constraint = constraint_type([DictionaryWord(w) for w in words])
+            self.assertEqual(list(constraint.matches("a" * 13 + "z")), [])
+        constraint = AnyOfConstraint([DictionaryWord(w) for w in words])
+        self.assertEqual(len(list(constraint.matches("aa"))), 14 * 13)
+
+    def test_count(self):
+        for test, word in (
+                ("pleasing orange home noise expeller", "phone"),
+                ("<. is? a? [pleasing orange home noise expeller]>", "diaphone"),
+                ("{a b c . . (apple <b a>)}", "cabbage"),
+                ("<a? a? [. a?]>", "aa"),
+                ("{. . . . . .}", "abcdef"),
+        ):
+            constraint = Parser(test).parse()
+            with self.subTest(test=test):
+                for i in range(1, len(word) + 1):
+                    self.assertEqual(constraint.count(word[:i]), len(list(constraint.matches(word[:i]))))
+        # the matches of each subset of the children are only counted once
+        words = [f"a{i}" for i in range(14)]
+        self.assertEqual(AnyOfConstraint([DictionaryWord(w) for w in words]).count("a" * 13), math.factorial(14))
+        for test in ("{a b c d e f .}", "<. is? a? [pleasing orange home noise expeller]>"):
+            results = list(generate(Parser(test).parse(), min_length=4, dict_path=LOCAL_DICT_PATH))
+            self.assertEqual(
+                count(Parser(test).parse(), min_length=4, dict_path=LOCAL_DICT_PATH),
+                (len({a.name() for a in results}), len(results))
+            )
+
+    def test_initials(self):
+        self.assertEqual(Parser("(orange <home noise> [pleasing expeller])").parse().initials(), frozenset("ohpe"))
+        self.assertEqual(Parser("{orange home}").parse().initials(), frozenset("oh"))
+        self.assertEqual(Parser("<is? a? [orange home]>").parse().initials(), frozenset("iaoh"))
+        # constraints that can match no letters, or any letter, do not restrict the first letter
+        self.assertIsNone(Parser("<is? a?>").parse().initials())
+        self.assertIsNone(Parser("<. orange>").parse().initials())
+        self.assertEqual(Parser("()").parse().initials(), frozenset())
+
+    def test_lengths(self):
+        def lengths(text):
+            bitset = Parser(text).parse().lengths()
+            return [k for k in range(bitset.bit_length()) if bitset >> k & 1]
+
+        self.assertEqual(lengths("<orange [home noise]>"), [3])
+        self.assertEqual(lengths("{orange <home noise>}"), [1, 2, 3])
+        self.assertEqual(lengths("{<a b c> <d e f>}"), [3, 6])
+        self.assertEqual(lengths("<. is? a? [pleasing orange home noise expeller]>"), [6, 7, 8])
+        self.assertEqual(lengths("(<a b> <c d e f>)"), [2, 4])
+        self.assertEqual(Parser("{<a b c> <d e f>}").parse().shortest(), 3)
+        # the lengths in between the shortest and longest matches are never searched
+        self.assertEqual(
+            [str(a) for a in generate(Parser("{<a b c> <d e f>}").parse(), min_length=4, dict_path=LOCAL_DICT_PATH)],
+            [str(a) for a in generate(Parser("<d e f>").parse(), min_length=4, dict_path=LOCAL_DICT_PATH)]
+        )
+        self.assertEqual(
+            Parser("<. is? a? [pleasing orange home noise expeller]>").parse().mandatory_children(), frozenset({0, 3})
+        )
+        self.assertEqual(Parser("{orange home}").parse().mandatory_children(), frozenset())
+
+    def test_acronym(self):
+        acronym = Acronym(remainder="abc")
+        for word in ("apple", "banana", "cherry"):
+            acronym = acronym + Acronym(word, remainder=acronym.remainder[1:]) + Acronym(remainder=acronym.remainder[1:])
+        self.assertEqual(tuple(acronym), ("apple", "banana", "cherry"))
+        self.assertFalse(acronym.is_partial())
+        self.assertEqual(acronym.name(), "ABC")
+        self.assertEqual(str(Acronym("apple") + Acronym("banana", remainder="c")), "apple banana@c")
+        self.assertEqual(repr(acronym), "Acronym(('apple', 'banana', 'cherry'))")
+
+    def test_generate_many(self):
+        tests = (
+            "pleasing orange home noise expeller",
+            "<. is? a? [pleasing orange home noise expeller]>",
+            "[pleasing orange home <noise expeller>]",
+            "<. . (kilo coal) .>",
+        )
+        expected = [
+            [str(a) for a in generate(Parser(test).parse(), min_length=4, dict_path=LOCAL_DICT_PATH)] for test in tests
+        ]
+        actual = [[] for _ in tests]
+        for query_id, acronym in generate_many(
+                (Parser(test).parse() for test in tests), min_length=4, dict_path=LOCAL_DICT_PATH
+        ):
+            actual[query_id].append(str(acronym))
+        self.assertEqual(actual, expected)
@@ -0,0 +1,34 @@
+import bz2
+import gzip
+import lzma
+import os
+from tempfile import TemporaryDirectory
+import unittest
+
+from visie.wordlist import is_streamed, iter_words
+
+
+WORDS = "apple\n  banana \nfig\r\n\ncherry\nkiwi"
+
+
+class TestWordList(unittest.TestCase):
+    def test_iter_words(self):
+        with TemporaryDirectory() as tmpdir:
+            paths = []
+            for extension, opener in (("", open), (".gz", gzip.open), (".bz2", bz2.open), (".xz", lzma.open)):
+                path = os.path.join(tmpdir, f"words.txt{extension}")
+                with opener(path, "wt") as f:  # type: ignore
+                    f.write(WORDS)
+                paths.append(path)
+            for path in paths:
+                self.assertEqual(is_streamed(path), not path.endswith(".txt"))
+                self.assertEqual(list(iter_words(path)), ["apple", "banana", "fig", "", "cherry", "kiwi"])
+                # small chunks split words across chunk boundaries
+                self.assertEqual(list(iter_words(path, 4, 5, chunk_size=3)), ["apple", "kiwi"])
+                self.assertEqual(list(iter_words(path, 6)), ["banana", "cherry"])
+                # every line is counted as it is read, even those of the wrong length
+                lines_read = []
+                self.assertEqual(
+                    list(iter_words(path, 6, chunk_size=3, lines_read=lines_read.append)), ["banana", "cherry"]
+                )
+                self.assertEqual(sum(lines_read), 6)
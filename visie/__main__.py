@@ -1,14 +1,292 @@
 import argparse
+import json
 import os
 import sys
+import time
+from typing import List, Optional, Tuple
 
-from . import visie, parser
+from . import budget, dedupe, index, optimizer, visie, parser, ranking, stats, wordlist
+
+
+def index_main(argv):
+    arg_parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(argv[0])} index",
+        description='Precompiles a word list into a memory-mapped dictionary index. The index can be passed to '
+                    '`--dict` in place of the word list, making startup time independent of the dictionary size.'
+    )
+    arg_parser.add_argument('OUTPUT', type=str, help='path to which to save the index')
+    arg_parser.add_argument('--dict', '-d', type=str, default=visie.DICT_PATH,
+                            help=f"path to the dictionary file to index (default={visie.DICT_PATH})")
+
+    args = arg_parser.parse_args(argv[2:])
+
+    if not wordlist.exists(args.dict):
+        sys.stderr.write(f"{args.dict} does not exist!\n")
+        exit(1)
+
+    num_words = index.build_index(wordlist.iter_words(args.dict), args.OUTPUT)
+    sys.stderr.write(f"Indexed {num_words} words to {args.OUTPUT}\n")
+
+
+def serve_main(argv):
+    # imported here, since asyncio and multiprocessing slow down the startup of every other command
+    from . import server
+
+    arg_parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(argv[0])} serve",
+        description='Runs a server that keeps the dictionary loaded and answers queries from `visie query`, so '
+                    'that each query does not pay for loading the dictionary. The word list is reloaded whenever it '
+                    'changes.'
+    )
+    arg_parser.add_argument('--dict', '-d', type=str, default=visie.DICT_PATH,
+                            help=f"path to the dictionary file (default={visie.DICT_PATH})")
+    add_server_arguments(arg_parser)
+    arg_parser.add_argument('--jobs', '-j', type=int, default=None,
+                            help='number of worker processes with which to search the dictionary (default=the '
+                                 'number of CPUs)')
+
+    args = arg_parser.parse_args(argv[2:])
+
+    check_dict(args.dict)
+
+    try:
+        server.serve(args.dict, socket_path=args.socket, port=args.port, jobs=args.jobs)
+    except server.ServerException as e:
+        sys.stderr.write(f"{e}\n")
+        exit(1)
+    except KeyboardInterrupt:
+        exit(130)
+
+
+def query_main(argv):
+    # imported here, since asyncio and multiprocessing slow down the startup of every other command
+    from . import server
+
+    arg_parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(argv[0])} query",
+        description='Searches for constraints using a running `visie serve`. The output is the same as visie\'s.'
+    )
+    arg_parser.add_argument('CONSTRAINT', type=str, nargs='+', help='a constraint (see `visie --help`)')
+    arg_parser.add_argument('--use-variants', '-u', action='store_true', help='use variants of the dictionary entries')
+    arg_parser.add_argument('--min-length', '-m', type=int, default=4, help='minimum acronym length (default=4)')
+    add_server_arguments(arg_parser)
+
+    args = arg_parser.parse_args(argv[2:])
+
+    try:
+        # constraints are parsed here first so that syntax errors are reported exactly as they are by visie
+        parser.parse_constraints(args.CONSTRAINT)
+        for acronym in server.query(
+                args.CONSTRAINT,
+                min_length=args.min_length,
+                use_variants=args.use_variants,
+                socket_path=args.socket,
+                port=args.port
+        ):
+            sys.stdout.write(f"{acronym.name()}: {' '.join(acronym)}\n")
+    except parser.ParseException as e:
+        sys.stderr.write(str(e))
+        exit(1)
+    except ConnectionError:
+        sys.stderr.write("Could not connect to the server; is `visie serve` running?\n")
+        exit(1)
+    except server.ServerException as e:
+        sys.stderr.write(f"{e}\n")
+        exit(1)
+    except KeyboardInterrupt:
+        exit(130)
+
+
+def repl_main(argv):
+    from . import incremental
+
+    arg_parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(argv[0])} repl",
+        description='Keeps the dictionary loaded and reads constraints from STDIN, one per line, printing the results '
+                    'of each. The parts of a constraint that were already searched for are remembered, so editing '
+                    'one part of a constraint only searches again for that part. Lines starting with a colon are '
+                    'commands: `:min-length N` changes the minimum acronym length, and `:quit` exits.'
+    )
+    arg_parser.add_argument('--dict', '-d', type=str, default=visie.DICT_PATH,
+                            help=f"path to the dictionary file, which may be compressed (.gz, .bz2, or .xz) or a "
+                                 f"dictionary index (default={visie.DICT_PATH})")
+    arg_parser.add_argument('--min-length', '-m', type=int, default=4, help='minimum acronym length (default=4)')
+
+    args = arg_parser.parse_args(argv[2:])
+
+    if args.dict == wordlist.STDIN:
+        arg_parser.error("the dictionary cannot be read from STDIN, which is used for constraints")
+    check_dict(args.dict)
+
+    interactive = sys.stdin.isatty()
+    try:
+        search = incremental.IncrementalSearch(args.dict)
+        if interactive:
+            sys.stderr.write(f"Loaded {len(search.words)} words. Enter a constraint, or :quit to exit.\n")
+        min_length = args.min_length
+        while True:
+            try:
+                line = input("visie> " if interactive else "").strip()
+            except EOFError:
+                break
+            if not line:
+                continue
+            elif line in (":q", ":quit"):
+                break
+            elif line.startswith(":min-length"):
+                try:
+                    min_length = int(line[len(":min-length"):])
+                except ValueError:
+                    sys.stderr.write("Usage: :min-length N\n")
+                continue
+            elif line.startswith(":"):
+                sys.stderr.write(f"Unknown command {line.split()[0]}\n")
+                continue
+            try:
+                constraints = optimizer.optimize(parser.Parser(line).parse())
+            except Exception as e:
+                # a typo should not end the session, whatever the parser raises for it
+                sys.stderr.write(f"{str(e).rstrip()}\n")
+                continue
+            start = time.perf_counter()
+            results = 0
+            for acronym in search.generate(constraints, min_length=min_length):
+                sys.stdout.write(f"{acronym.name()}: {' '.join(acronym)}\n")
+                results += 1
+            sys.stdout.flush()
+            if interactive:
+                sys.stderr.write(
+                    f"{results} results in {1000 * (time.perf_counter() - start):.1f}ms; reused {search.reused} of "
+                    f"{search.reused + search.evaluated} cached subtrees\n"
+                )
+    except KeyboardInterrupt:
+        exit(130)
+
+
+def add_server_arguments(arg_parser: argparse.ArgumentParser):
+    from . import server
+
+    arg_parser.add_argument('--socket', '-s', type=str, default=None,
+                            help=f"path of the server's Unix socket (default={server.DEFAULT_SOCKET_PATH})")
+    arg_parser.add_argument('--port', '-p', type=int, default=None,
+                            help='use this localhost TCP port instead of a Unix socket')
+
+
+def read_batch(path: str) -> List[Tuple[int, str]]:
+    """Reads the (line number, constraint) pairs of a batch file, skipping blank lines and # comments"""
+    if path == wordlist.STDIN:
+        lines = sys.stdin.readlines()
+    else:
+        with open(path, "r") as f:
+            lines = f.readlines()
+    return [
+        (line_number, line.strip()) for line_number, line in enumerate(lines, start=1)
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+
+
+def read_constraint(path: str) -> str:
+    """Reads a single constraint, such as a large machine-generated one, from a file"""
+    if path == wordlist.STDIN:
+        return sys.stdin.read()
+    with open(path, "r") as f:
+        return f.read()
+
+
+def top_main(args, constraints: visie.Constraint):
+    frequency_list: Optional[ranking.FrequencyList] = None
+    if args.frequency_list is not None:
+        try:
+            frequency_list = ranking.FrequencyList.load(args.frequency_list)
+        except OSError as e:
+            sys.stderr.write(f"Error reading {args.frequency_list}: {e}\n")
+            exit(1)
+    scorer = ranking.SCORERS[args.score](constraints, frequency_list)
+    try:
+        for _, acronym in ranking.top(
+                constraints,
+                args.top,
+                scorer,
+                min_length=args.min_length,
+                use_variants=args.use_variants,
+                dict_path=args.dict,
+                engine=args.engine
+        ):
+            sys.stdout.write(f"{acronym.name()}: {' '.join(acronym)}\n")
+    except KeyboardInterrupt:
+        exit(130)
+
+
+def count_main(args, constraints: visie.Constraint):
+    try:
+        acronyms, expansions = visie.count(
+            constraints, min_length=args.min_length, use_variants=args.use_variants, dict_path=args.dict
+        )
+    except KeyboardInterrupt:
+        exit(130)
+    sys.stdout.write(f"{acronyms} acronyms, {expansions} results\n")
+
+
+def check_dict(path: str):
+    if not wordlist.exists(path):
+        sys.stderr.write(f"{path} does not exist!\n\nEnsure that a word list is installed.\nOn most Linux "
+                         f"distributions, try:\n    `apt-cache search wordlist|grep ^w|sort`\n\n")
+        exit(1)
+
+
+def batch_main(args):
+    try:
+        queries = read_batch(args.batch)
+    except OSError as e:
+        sys.stderr.write(f"Error reading {args.batch}: {e}\n")
+        exit(1)
+    constraints = []
+    for line_number, text in queries:
+        try:
+            constraints.append(optimizer.optimize(parser.Parser(text).parse()))
+        except parser.ParseException as e:
+            sys.stderr.write(f"{args.batch}:{line_number}: {e}\n")
+            exit(1)
+        if args.show_plan:
+            sys.stderr.write(f"{args.batch}:{line_number}: {optimizer.plan(constraints[-1])}\n")
+
+    check_dict(args.dict)
+
+    try:
+        for query_id, acronym in visie.generate_many(
+                constraints,
+                min_length=args.min_length,
+                use_variants=args.use_variants,
+                dict_path=args.dict
+        ):
+            sys.stdout.write(f"{queries[query_id][0]}\t{acronym.name()}: {' '.join(acronym)}\n")
+    except KeyboardInterrupt:
+        exit(130)
+
+
+def memory_size(size: str) -> int:
+    try:
+        num_bytes = dedupe.parse_bytes(size)
+    except ValueError:
+        num_bytes = 0
+    if num_bytes <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size: {size!r}")
+    return num_bytes
 
 
 def main(argv=None):
     if argv is None:
         argv = sys.argv
 
+    if len(argv) > 1 and argv[1] == 'index':
+        return index_main(argv)
+    elif len(argv) > 1 and argv[1] == 'serve':
+        return serve_main(argv)
+    elif len(argv) > 1 and argv[1] == 'query':
+        return query_main(argv)
+    elif len(argv) > 1 and argv[1] == 'repl':
+        return repl_main(argv)
+
     arg_parser = argparse.ArgumentParser(
         formatter_class=argparse.RawTextHelpFormatter,
         description='Visie is a simple initialism enumerator. It helps you name things with acronyms.',
@@ -67,40 +345,221 @@ Finally, you can create recursive acronyms by using a period as a wildcard:
 The name `visie` was discovered this way:
 
   $ visie '<<. is? a?>? (efficient simple magical) recursive? (acronym initialism) (name word)? (generator enumerator)>'
+
+Large word lists can be precompiled into an index for faster startup:
+
+  $ visie index --dict /usr/share/dict/words words.idx
+  $ visie --dict words.idx pleasing orange home noise expeller
+
+Many constraints can be searched for in a single pass over the dictionary
+by listing them one per line in a batch file. Each result is prefixed by the
+line number of its constraint:
+
+  $ visie --batch queries.txt
+
+To answer many queries without reloading the dictionary each time, run a
+server and send it queries:
+
+  $ visie serve --dict words.idx &
+  $ visie query pleasing orange home noise expeller
+
+To refine a constraint interactively, run a REPL that keeps the dictionary
+loaded and only searches again for the parts of a constraint that changed:
+
+  $ visie repl --dict words.idx
 """)
-    arg_parser.add_argument('CONSTRAINT', type=str, nargs='+', help='a constraint (see below)')
+    arg_parser.add_argument('CONSTRAINT', type=str, nargs='*', help='a constraint (see below)')
+    arg_parser.add_argument('--batch', '-b', type=str,
+                            help='path to a file of constraints, one per line, to search for in a single pass over '
+                                 'the dictionary, or - to read them from STDIN')
+    arg_parser.add_argument('--constraint-file', '-f', type=str,
+                            help='path to a file containing a single constraint, which may span many lines, to '
+                                 'search for in addition to any CONSTRAINT arguments, or - to read it from STDIN')
     arg_parser.add_argument('--use-variants', '-u', action='store_true', help='use variants of the dictionary entries')
     arg_parser.add_argument('--min-length', '-m', type=int, default=4, help='minimum acronym length (default=4)')
-    
+    arg_parser.add_argument('--jobs', '-j', type=int, default=1,
+                            help='number of worker processes with which to search the dictionary (default=1)')
+    arg_parser.add_argument('--unordered', action='store_true',
+                            help='when using multiple jobs, output results as soon as they are found rather than in '
+                                 'dictionary order')
+    arg_parser.add_argument('--engine', '-e', type=str, default='recursive', choices=list(visie.ENGINES.keys()),
+                            help='the engine with which to match words against the constraint; all engines find '
+                                 'the same results (default=recursive)')
+
+    arg_parser.add_argument('--timeout', type=float, default=None, metavar='SECONDS',
+                            help='stop searching after this many seconds, printing the results found so far')
+    arg_parser.add_argument('--limit', '-l', type=int, default=None, metavar='N',
+                            help='stop searching after printing N results')
+    arg_parser.add_argument('--count', '-c', action='store_true',
+                            help='only print the number of matching acronyms and of the results that would be '
+                                 'printed for them, which is much faster than printing them')
+    arg_parser.add_argument('--top', '-t', type=int, default=None, metavar='K',
+                            help='only print the K best results according to --score, from best to worst')
+    arg_parser.add_argument('--score', type=str, default='length', choices=list(ranking.SCORERS.keys()),
+                            help='how to rank the results when using --top: by the length of the acronym, the '
+                                 'fraction of the constraint\'s words it uses, the frequency of the acronym in '
+                                 '--frequency-list, or how easy it is to pronounce (default=length)')
+    arg_parser.add_argument('--frequency-list', type=str, default=None,
+                            help='path to a list of words ordered from the most to the least frequent, for '
+                                 '--score frequency')
+    arg_parser.add_argument('--dedupe', type=str, default='exact', choices=dedupe.MODES,
+                            help='how to remember the results already printed: exactly, by a compact 64-bit '
+                                 'fingerprint that can very rarely suppress a new result, or externally in sorted '
+                                 'files on disk, which prints nothing until the search is complete (default=exact)')
+    arg_parser.add_argument('--dedupe-memory', type=memory_size, default=None, metavar='SIZE',
+                            help='the most memory to use for --dedupe, like 512k, 64M, or 2G; exact and fingerprint '
+                                 'deduplication fail if it is exceeded, while external deduplication spills to disk '
+                                 f'(default=unlimited, or {dedupe.format_bytes(dedupe.DEFAULT_EXTERNAL_MEMORY)} for '
+                                 'external)')
+    arg_parser.add_argument('--cache', action='store_true',
+                            help='save the results of complete searches, and reuse them for identical searches of an '
+                                 'unchanged dictionary, in $XDG_CACHE_HOME/visie/results (default=~/.cache/visie/'
+                                 'results)')
+    arg_parser.add_argument('--cache-size', type=memory_size, default=None, metavar='SIZE',
+                            help='the most disk space to use for --cache before deleting the least recently used '
+                                 'results (default=256M)')
+    arg_parser.add_argument('--show-plan', action='store_true',
+                            help='print the simplified constraint that will actually be searched for to STDERR')
+    arg_parser.add_argument('--stats', action='store_true',
+                            help='print statistics about the search, including how often each part of the '
+                                 'constraint was evaluated, to STDERR')
+    arg_parser.add_argument('--stats-json', type=str, default=None,
+                            help='save the statistics collected by --stats to this JSON file')
     arg_parser.add_argument('--dict', '-d', type=str, default=visie.DICT_PATH,
-                            help=f"path to the dictionary file (default={visie.DICT_PATH})")
-    
+                            help=f"path to the dictionary file, which may be compressed (.gz, .bz2, or .xz), a "
+                                 f"dictionary index, or - to read from STDIN (default={visie.DICT_PATH})")
+
     args = arg_parser.parse_args(argv[1:])
 
-    constraints = []
-    for arg in args.CONSTRAINT:
-        constraints.append(parser.Parser(arg).parse())
-    if len(constraints) == 1:
-        constraints = constraints[0]
-    else:
-        constraints = visie.AnyOfConstraint(constraints)
+    if args.batch is not None:
+        if args.CONSTRAINT or args.constraint_file is not None:
+            arg_parser.error("constraints cannot be passed as arguments when using --batch")
+        elif args.jobs > 1:
+            arg_parser.error("--jobs is not supported with --batch")
+        elif args.stats or args.stats_json is not None:
+            arg_parser.error("--stats is not supported with --batch")
+        elif args.top is not None:
+            arg_parser.error("--top is not supported with --batch")
+        elif args.dedupe != "exact" or args.dedupe_memory is not None:
+            arg_parser.error("--dedupe is not supported with --batch")
+        elif args.timeout is not None or args.limit is not None:
+            arg_parser.error("--timeout and --limit are not supported with --batch")
+        elif args.cache:
+            arg_parser.error("--cache is not supported with --batch")
+        elif args.count:
+            arg_parser.error("--count is not supported with --batch")
+        elif args.engine != "recursive":
+            arg_parser.error("--engine is not supported with --batch")
+        elif args.batch == wordlist.STDIN and args.dict == wordlist.STDIN:
+            arg_parser.error("the batch file and the dictionary cannot both be read from STDIN")
+        return batch_main(args)
+    elif args.constraint_file is not None:
+        if args.constraint_file == wordlist.STDIN and args.dict == wordlist.STDIN:
+            arg_parser.error("the constraint file and the dictionary cannot both be read from STDIN")
+        try:
+            args.CONSTRAINT.append(read_constraint(args.constraint_file))
+        except OSError as e:
+            sys.stderr.write(f"Error reading {args.constraint_file}: {e}\n")
+            exit(1)
+    if not args.CONSTRAINT:
+        arg_parser.error("at least one CONSTRAINT is required")
+    elif (args.stats or args.stats_json is not None) and args.jobs > 1:
+        arg_parser.error("--stats is not supported with multiple --jobs")
+    elif args.timeout is not None and args.timeout <= 0:
+        arg_parser.error("--timeout must be positive")
+    elif args.limit is not None and args.limit < 0:
+        arg_parser.error("--limit cannot be negative")
+    elif args.cache and (args.stats or args.stats_json is not None):
+        arg_parser.error("--stats is not supported with --cache")
+    elif args.count:
+        if args.jobs > 1:
+            arg_parser.error("--count is not supported with multiple --jobs")
+        elif args.stats or args.stats_json is not None:
+            arg_parser.error("--stats is not supported with --count")
+        elif args.top is not None:
+            arg_parser.error("--top is not supported with --count")
+        elif args.dedupe != "exact" or args.dedupe_memory is not None:
+            arg_parser.error("--dedupe is not supported with --count")
+        elif args.timeout is not None or args.limit is not None:
+            arg_parser.error("--timeout and --limit are not supported with --count")
+        elif args.cache:
+            arg_parser.error("--cache is not supported with --count")
+        elif args.engine != "recursive":
+            arg_parser.error("--engine is not supported with --count")
+    elif args.top is not None:
+        if args.jobs > 1:
+            arg_parser.error("--top is not supported with multiple --jobs")
+        elif args.stats or args.stats_json is not None:
+            arg_parser.error("--stats is not supported with --top")
+        elif args.dedupe != "exact" or args.dedupe_memory is not None:
+            arg_parser.error("--dedupe is not supported with --top")
+        elif args.timeout is not None or args.limit is not None:
+            arg_parser.error("--timeout and --limit are not supported with --top")
+        elif args.cache:
+            arg_parser.error("--cache is not supported with --top")
+        elif args.score == "frequency" and args.frequency_list is None:
+            arg_parser.error("--score frequency requires a --frequency-list")
+        elif args.frequency_list == wordlist.STDIN and args.dict == wordlist.STDIN:
+            arg_parser.error("the frequency list and the dictionary cannot both be read from STDIN")
 
-    if not os.path.exists(args.dict):
-        sys.stderr.write(f"{args.dict} does not exist!\n\nEnsure that a word list is installed.\nOn most Linux "
-                         f"distributions, try:\n    `apt-cache search wordlist|grep ^w|sort`\n\n")
-        exit(1)
+    search_stats: Optional[stats.SearchStats] = None
+    if args.stats or args.stats_json is not None:
+        search_stats = stats.SearchStats()
+
+    search_budget: Optional[visie.SearchBudget] = None
+    if args.timeout is not None or args.limit is not None:
+        search_budget = visie.SearchBudget.after(args.timeout, args.limit)
+
+    constraints = optimizer.optimize(parser.parse_constraints(args.CONSTRAINT))
+    if args.show_plan:
+        sys.stderr.write(f"{optimizer.plan(constraints)}\n")
+
+    check_dict(args.dict)
+
+    if args.count:
+        return count_main(args, constraints)
+    elif args.top is not None:
+        return top_main(args, constraints)
+
+    generate = visie.generate
+    if args.cache:
+        from . import cache
+
+        max_bytes = cache.DEFAULT_MAX_BYTES if args.cache_size is None else args.cache_size
+        generate = cache.ResultCache(max_bytes=max_bytes).generate
 
     try:
-        for acronym in visie.generate(
+        for acronym in generate(
                 constraints,
                 min_length=args.min_length,
                 use_variants=args.use_variants,
-                dict_path=args.dict
+                dict_path=args.dict,
+                engine=args.engine,
+                jobs=args.jobs,
+                ordered=not args.unordered,
+                search_stats=search_stats,
+                dedupe_mode=args.dedupe,
+                dedupe_memory=args.dedupe_memory,
+                budget=search_budget
         ):
             sys.stdout.write(f"{acronym.name()}: {' '.join(acronym)}\n")
+        if search_budget is not None and search_budget.stop_reason == budget.DEADLINE:
+            sys.stdout.flush()
+            sys.stderr.write(f"Stopped searching after {args.timeout} seconds; the results are incomplete\n")
+        if search_stats is not None:
+            if args.stats:
+                sys.stdout.flush()
+                search_stats.report(sys.stderr)
+            if args.stats_json is not None:
+                with open(args.stats_json, "w") as f:
+                    json.dump(search_stats.to_dict(), f, indent=2)
     except parser.ParseException as e:
         sys.stderr.write(str(e))
         exit(1)
+    except dedupe.DedupeMemoryError as e:
+        sys.stdout.flush()
+        sys.stderr.write(f"Error: {e}\n")
+        exit(1)
     except KeyboardInterrupt:
         exit(130)  # see: https://tldp.org/LDP/abs/html/exitcodes.html#EXITCODESREF
 
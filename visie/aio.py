@@ -0,0 +1,110 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterator, List, Optional
+
+from . import visie
+from .budget import SearchBudget
+
+# marks the end of the results in the queue between the search thread and the event loop
+_DONE = object()
+
+# the most results that the search thread gets ahead of the iteration before it waits for them to be consumed
+QUEUE_SIZE = 256
+
+# how often, in seconds, the search thread checks whether the iteration or its event loop was closed while it waits
+# on a full queue
+_POLL_INTERVAL = 0.5
+
+
+class SearchResult:
+    """The results of a search that may have been stopped early by its budget"""
+
+    def __init__(self, acronyms: List[visie.Acronym], budget: SearchBudget):
+        self.acronyms: List[visie.Acronym] = acronyms
+        self.finished: bool = budget.finished
+        """whether the whole dictionary was searched"""
+        self.stop_reason: Optional[str] = budget.stop_reason
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(acronyms={self.acronyms!r}, finished={self.finished!r})"
+
+
+async def agenerate(
+        constraints: visie.Constraint, budget: Optional[SearchBudget] = None, **kwargs
+) -> AsyncIterator[visie.Acronym]:
+    """
+    Asynchronously yields the acronyms that `visie.generate` would yield with the same arguments.
+
+    The search runs in a separate thread, so it never blocks the event loop, and waits whenever it gets `QUEUE_SIZE`
+    results ahead of the iteration. It is cancelled as soon as the iteration stops, whether because it was exhausted,
+    closed with `aclose`, or the task running it was cancelled.
+    Once the iteration is exhausted, `budget.finished` says whether the whole dictionary was searched.
+
+    """
+    if budget is None:
+        budget = SearchBudget()
+    loop = (getattr(asyncio, "get_running_loop", None) or asyncio.get_event_loop)()  # Python 3.6
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(QUEUE_SIZE)
+    closed = threading.Event()
+
+    def put(item: Any):
+        if closed.is_set():
+            return
+        try:
+            queued = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    queued.result(_POLL_INTERVAL)
+                    return
+                except concurrent.futures.TimeoutError:
+                    # the iteration may have been closed while its event loop is not running to queue the result
+                    if closed.is_set():
+                        return
+                    elif loop.is_closed():
+                        break
+        except (RuntimeError, concurrent.futures.CancelledError):
+            pass
+        # the event loop was closed without closing the iteration first, so nobody is waiting for the results
+        budget.cancel()  # type: ignore
+
+    def search():
+        try:
+            for acronym in visie.generate(constraints, budget=budget, **kwargs):
+                put(acronym)
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    # the thread is a daemon so that a search abandoned along with its event loop cannot keep the process alive
+    thread = threading.Thread(target=search, name="visie-search", daemon=True)
+    thread.start()
+    try:
+        while True:
+            result = await queue.get()
+            if result is _DONE:
+                return
+            elif isinstance(result, BaseException):
+                raise result
+            yield result
+    finally:
+        budget.cancel()
+        closed.set()
+        # make room for a result that the search thread may be waiting to queue, so that it can see it should stop
+        while not queue.empty():
+            queue.get_nowait()
+
+
+async def search(
+        constraints: visie.Constraint,
+        timeout: Optional[float] = None,
+        max_results: Optional[int] = None,
+        **kwargs
+) -> SearchResult:
+    """
+    Returns the acronyms that `visie.generate` would yield with the same arguments, stopping after `timeout`
+    seconds or `max_results` results if either is provided, along with whether the search finished.
+    """
+    budget = SearchBudget.after(timeout, max_results)
+    acronyms = [acronym async for acronym in agenerate(constraints, budget, **kwargs)]
+    return SearchResult(acronyms, budget)
@@ -0,0 +1,83 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .visie import Acronym, Constraint, MatchState
+
+
+class Automaton:
+    """
+    A constraint lowered into a deterministic finite automaton over letters.
+
+    The states of the underlying nondeterministic automaton are the leaves of the constraint tree together with the
+    stack of their enclosing constraints, including the set of children that `AllOfConstraint`s and
+    `AnyOfConstraint`s have already consumed (see `MatchState`). The DFA is built lazily by subset construction:
+    each transition is computed the first time it is taken and cached thereafter, so only the states reachable by
+    actual dictionary words are ever built. Transitions are keyed by the letter as it appears in the word, so words
+    do not even need to be lowercased once their prefixes have been seen.
+
+    """
+
+    DEAD: int = 0
+    """The state from which no word is accepted"""
+
+    def __init__(self, constraint: "Constraint"):
+        self.constraint: "Constraint" = constraint
+        self._states: List[Optional["MatchState"]] = [None]
+        self._state_ids: Dict["MatchState", int] = {}
+        self._transitions: List[Dict[str, int]] = [_DeadTransitions()]
+        self._accepting: List[bool] = [False]
+        self.initial: int = self._intern(constraint.initial_state())
+
+    def _intern(self, state: "MatchState") -> int:
+        if not state.leaves and not state.accepting:
+            return Automaton.DEAD
+        state_id = self._state_ids.get(state)
+        if state_id is None:
+            state_id = len(self._states)
+            self._state_ids[state] = state_id
+            self._states.append(state)
+            # a state that cannot consume any more letters transitions to the dead state on every letter
+            self._transitions.append({} if state.leaves else _DeadTransitions())
+            self._accepting.append(state.accepting)
+        return state_id
+
+    def __len__(self):
+        """Returns the number of DFA states that have been built so far"""
+        return len(self._states)
+
+    def step(self, state: int, letter: str) -> int:
+        transitions = self._transitions[state]
+        next_state = transitions.get(letter)
+        if next_state is None:
+            next_state = self._intern(self._states[state].step(letter.lower()))  # type: ignore
+            transitions[letter] = next_state
+        return next_state
+
+    def is_accepting(self, state: int) -> bool:
+        return self._accepting[state]
+
+    def accepts(self, word: str) -> bool:
+        """Returns whether `constraint.matches(word)` is non-empty, in time linear in the length of the word"""
+        transitions = self._transitions
+        state = self.initial
+        for letter in word:
+            next_state = transitions[state].get(letter)
+            if next_state is None:
+                next_state = self.step(state, letter)
+            if next_state == Automaton.DEAD:
+                return False
+            state = next_state
+        return self._accepting[state]
+
+
+class _DeadTransitions(dict):
+    def get(self, letter, default=None):
+        return Automaton.DEAD
+
+
+def automaton_matches(constraint: "Constraint", words: Iterable[str]) -> Iterator[Tuple[str, Iterable["Acronym"]]]:
+    """Yields the words that `constraint` accepts; full expansions are only built for those words"""
+    accepts = Automaton(constraint).accepts
+    for word in words:
+        if accepts(word):
+            yield word, constraint.matches(word)
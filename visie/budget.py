@@ -0,0 +1,91 @@
+import threading
+import time
+from typing import Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# the reasons for which a search can be stopped before it finishes
+DEADLINE = "deadline"
+MAX_RESULTS = "max_results"
+CANCELLED = "cancelled"
+
+
+class SearchBudget:
+    """
+    Limits on how long a search can run and how many results it can yield.
+
+    `deadline` is a time in seconds on the `time.monotonic()` clock, and `max_results` is the number of results
+    after which the search stops. The search can also be stopped at any time, from any thread, by calling `cancel`.
+    The budget is checked between dictionary words and between results, so the matching of a single word is never
+    interrupted.
+
+    Once the search stops, `finished` is True if it searched the whole dictionary, and otherwise `stop_reason` is
+    one of `DEADLINE`, `MAX_RESULTS`, or `CANCELLED`. A budget can only be used for one search.
+
+    """
+
+    def __init__(self, deadline: Optional[float] = None, max_results: Optional[int] = None):
+        self.deadline: Optional[float] = deadline
+        self.max_results: Optional[int] = max_results
+        self.results: int = 0
+        """the number of results yielded so far"""
+        self.finished: bool = False
+        self.stop_reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    @staticmethod
+    def after(timeout: Optional[float] = None, max_results: Optional[int] = None) -> "SearchBudget":
+        """Returns a budget whose deadline is `timeout` seconds from now, or that has no deadline if it is None"""
+        return SearchBudget(None if timeout is None else time.monotonic() + timeout, max_results)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Returns the number of seconds until the deadline, or None if there is no deadline"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def exceeded(self) -> bool:
+        """Returns whether the search should stop, recording why in `stop_reason` if so"""
+        if self.stop_reason is not None:
+            return True
+        if self._cancelled.is_set():
+            self.stop_reason = CANCELLED
+        elif self.max_results is not None and self.results >= self.max_results:
+            self.stop_reason = MAX_RESULTS
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.stop_reason = DEADLINE
+        return self.stop_reason is not None
+
+    def words(self, words: Iterable[T]) -> Iterator[T]:
+        """Passes `words` through until the budget is exceeded"""
+        for word in words:
+            if self.exceeded():
+                return
+            yield word
+
+    def limit(self, results: Iterable[T]) -> Iterator[T]:
+        """
+        Passes the `results` of a search through, counting them, until the budget is exceeded. The search is
+        finished if `results` is exhausted without the budget having been exceeded, including by `words`.
+        """
+        results = iter(results)
+        try:
+            while not self.exceeded():
+                try:
+                    result = next(results)
+                except StopIteration:
+                    self.finished = self.stop_reason is None
+                    return
+                self.results += 1
+                yield result
+        finally:
+            close = getattr(results, "close", None)
+            if close is not None:
+                close()
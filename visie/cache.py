@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from . import frequencies, visie, wordlist
+from .optimizer import structural_key
+
+VERSION = 2
+
+EXTENSION = ".jsonl"
+
+# the most disk space used by cached results if no limit is given
+DEFAULT_MAX_BYTES = 256 << 20
+
+
+def cache_dir() -> str:
+    """Returns the directory in which visie caches data for the current user"""
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "visie")
+
+
+def default_directory() -> str:
+    return os.path.join(cache_dir(), "results")
+
+
+class ResultCache:
+    """
+    The results of previous searches, saved as files of JSON lines in `directory`.
+
+    Results are keyed by the structure of the constraint, the search options that affect them, and the path,
+    modification time, and size of the dictionary, so a result is never reused once the dictionary changes. Only
+    searches that run to completion are saved. When the files take up more than `max_bytes`, the least recently
+    used ones are deleted.
+
+    The letter frequencies of each dictionary searched through the cache are saved in its `frequencies`
+    subdirectory, which order the checks of `prefilter.LetterFilter` in later searches. There is one small file per
+    dictionary path, and they are only deleted by `clear`.
+
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory: str = default_directory() if directory is None else directory
+        self.max_bytes: int = max_bytes
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @staticmethod
+    def key(
+            constraints: visie.Constraint,
+            min_length: int,
+            use_variants: bool,
+            dict_path: str,
+            max_length: Optional[int] = None,
+            dedupe_mode: str = "exact"
+    ) -> Optional[str]:
+        """Returns the key of the results of a search, or None if they cannot be cached"""
+        if dict_path == wordlist.STDIN:
+            return None
+        try:
+            signature = wordlist.signature(dict_path)
+        except OSError:
+            return None
+        data = [
+            VERSION, repr(structural_key(constraints)), min_length, max_length, use_variants,
+            os.path.abspath(dict_path), list(signature),
+            # approximate deduplication can drop results, so they must never be served to an exact search
+            dedupe_mode
+        ]
+        return hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
+
+    def frequency_path(self, dict_path: str) -> Optional[str]:
+        """Returns the path at which the letter frequencies of the dictionary are saved, or None if they cannot be"""
+        if dict_path == wordlist.STDIN:
+            return None
+        digest = hashlib.sha1(os.path.abspath(dict_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "frequencies", f"{digest}{frequencies.EXTENSION}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{EXTENSION}")
+
+    def get(self, key: str) -> Optional[Iterator[visie.Acronym]]:
+        """Returns the cached results for `key`, or None if there are none"""
+        path = self._path(key)
+        try:
+            f = open(path, "r")
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            # the modification time orders the files from the least to the most recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return self._read(f)
+
+    @staticmethod
+    def _read(f) -> Iterator[visie.Acronym]:
+        with f:
+            for line in f:
+                yield visie.Acronym(*json.loads(line))
+
+    def store(
+            self, key: str, acronyms: Iterable[visie.Acronym], complete: Callable[[], bool] = lambda: True
+    ) -> Iterator[visie.Acronym]:
+        """
+        Passes `acronyms` through, saving them for `key` once they are exhausted if `complete()` is then True. The
+        results are not saved if they would take up more than `max_bytes`, or if the cache cannot be written to.
+        """
+        f: Any = None
+        tmp_path: Optional[str] = None
+        size = 0
+        try:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+                f = os.fdopen(fd, "w")
+            except OSError:
+                f = None
+            for acronym in acronyms:
+                if f is not None:
+                    line = f"{json.dumps(list(acronym))}\n"
+                    size += len(line)
+                    if size > self.max_bytes:
+                        f.close()
+                        f = None
+                    else:
+                        f.write(line)
+                yield acronym
+            if f is not None and complete():
+                f.close()
+                f = None
+                os.replace(tmp_path, self._path(key))  # type: ignore
+                tmp_path = None
+                self.evict()
+        finally:
+            if f is not None:
+                f.close()
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """Returns the number of bytes taken up by the cached results"""
+        try:
+            return sum(size for _, size, _ in self._entries())
+        except OSError:
+            return 0
+
+    def evict(self, max_bytes: Optional[int] = None):
+        """Deletes the least recently used results until they take up at most `max_bytes`, or `self.max_bytes`"""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        try:
+            entries = sorted(self._entries())
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        self.evict(0)
+        shutil.rmtree(os.path.join(self.directory, "frequencies"), ignore_errors=True)
+
+    def generate(
+            self,
+            constraints: visie.Constraint,
+            min_length: int = 3,
+            use_variants: bool = False,
+            dict_path: str = visie.DICT_PATH,
+            max_length: Optional[int] = None,
+            **kwargs
+    ) -> Iterator[visie.Acronym]:
+        """
+        Yields the acronyms that `visie.generate` would yield with the same arguments, from the cache if possible.
+
+        Results found with `ordered=False` are not saved, since they are not in dictionary order, and neither are
+        the results of searches stopped early by a `budget`.
+
+        """
+        key = self.key(constraints, min_length, use_variants, dict_path, max_length, kwargs.get("dedupe_mode", "exact"))
+        if key is not None:
+            cached = self.get(key)
+            if cached is not None:
+                search_budget = kwargs.get("budget")
+                if search_budget is None:
+                    yield from cached
+                else:
+                    yield from search_budget.limit(cached)
+                return
+        kwargs.setdefault("frequency_path", self.frequency_path(dict_path))
+        acronyms = visie.generate(
+            constraints, min_length=min_length, use_variants=use_variants, dict_path=dict_path,
+            max_length=max_length, **kwargs
+        )
+        if key is None or not kwargs.get("ordered", True):
+            yield from acronyms
+            return
+        search_budget = kwargs.get("budget")
+        yield from self.store(key, acronyms, lambda: search_budget is None or search_budget.finished)
@@ -0,0 +1,296 @@
+from abc import ABC, abstractmethod
+from array import array
+import heapq
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# The ways in which results can be deduplicated:
+#   exact: a set of the strings themselves
+#   fingerprint: a compact set of 64-bit hashes of the strings, which can very rarely mistake a new string for a
+#              duplicate
+#   external: results are spilled to sorted files on disk and deduplicated once the search is complete, so nothing
+#             is output until then
+MODES = ("exact", "fingerprint", "external")
+
+# the memory used by external deduplication if no limit is given
+DEFAULT_EXTERNAL_MEMORY = 64 << 20
+
+_UNITS: Dict[str, int] = {"k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+
+_MASK = (1 << 64) - 1
+
+# the fraction of a fingerprint table's slots that can be full before it is grown
+MAX_LOAD = 0.7
+
+
+class DedupeMemoryError(MemoryError):
+    pass
+
+
+def parse_bytes(size: str) -> int:
+    """Parses a number of bytes like `1048576`, `512k`, `64M`, or `2G`"""
+    size = size.strip().lower()
+    if size.endswith("b"):
+        size = size[:-1]
+    for suffix, multiplier in _UNITS.items():
+        if size.endswith(suffix):
+            return int(float(size[:-len(suffix)]) * multiplier)
+    return int(size)
+
+
+def format_bytes(size: int) -> str:
+    for suffix, multiplier in sorted(_UNITS.items(), key=lambda unit: unit[1], reverse=True):
+        if size >= multiplier:
+            return f"{size / multiplier:.1f}{suffix.upper()}iB"
+    return f"{size}B"
+
+
+class SeenSet(ABC):
+    """A set of the strings that have already been seen, whose memory use can be bounded and measured"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes: Optional[int] = max_bytes
+
+    @abstractmethod
+    def add(self, key: str):
+        raise NotImplementedError()
+
+    @abstractmethod
+    def __contains__(self, key: str) -> bool:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def memory_bytes(self) -> int:
+        """An estimate of the memory used by the set"""
+        raise NotImplementedError()
+
+    def _check_memory(self, required_bytes: int):
+        if self.max_bytes is not None and required_bytes > self.max_bytes:
+            raise DedupeMemoryError(
+                f"Deduplicating {len(self)} results requires more than the {format_bytes(self.max_bytes)} allowed; "
+                "allow more memory, or deduplicate by fingerprint or externally instead"
+            )
+
+
+class ExactSet(SeenSet):
+    """The strings themselves, in a Python set"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        super().__init__(max_bytes)
+        self._keys: Set[str] = set()
+        self._key_bytes: int = 0
+
+    def add(self, key: str):
+        if key not in self._keys:
+            key_bytes = sys.getsizeof(key)
+            self._check_memory(self.memory_bytes + key_bytes)
+            self._keys.add(key)
+            self._key_bytes += key_bytes
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self._keys) + self._key_bytes
+
+
+class FingerprintSet(SeenSet):
+    """
+    The 64-bit hashes of the strings, in an open-addressing hash table packed into an array.
+
+    Each string costs between 8 and 16 bytes regardless of its length, rather than the hundred or so bytes of a
+    string in a Python set. Two distinct strings have the same fingerprint with a probability of about 2^-64, in
+    which case the second is wrongly considered to have been seen; with a billion strings, this happens about once
+    in every 40 billion searches. Python's string hashes are randomized per process, so fingerprints are never
+    saved.
+
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, capacity: int = 16):
+        super().__init__(max_bytes)
+        size = 1
+        while size < capacity:
+            size <<= 1
+        # zero marks an empty slot, so no fingerprint is zero
+        self._slots: array = array("Q", bytes(8 * size))
+        self._mask: int = size - 1
+        self._count: int = 0
+
+    @staticmethod
+    def fingerprint(key: str) -> int:
+        return (hash(key) & _MASK) or 1
+
+    def _slot(self, fingerprint: int) -> int:
+        """Returns the slot that holds `fingerprint`, or the empty slot where it belongs"""
+        slots = self._slots
+        mask = self._mask
+        # the low bits of a hash are already uniformly distributed
+        i = fingerprint & mask
+        while True:
+            slot = slots[i]
+            if slot == fingerprint or slot == 0:
+                return i
+            i = (i + 1) & mask
+
+    def _grow(self):
+        old_slots = self._slots
+        size = 2 * len(old_slots)
+        self._check_memory(8 * size)
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        for fingerprint in old_slots:
+            if fingerprint:
+                self._slots[self._slot(fingerprint)] = fingerprint
+
+    def add(self, key: str):
+        fingerprint = self.fingerprint(key)
+        i = self._slot(fingerprint)
+        if self._slots[i]:
+            return
+        if self._count + 1 > MAX_LOAD * len(self._slots):
+            self._grow()
+            i = self._slot(fingerprint)
+        self._slots[i] = fingerprint
+        self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return self._slots[self._slot(self.fingerprint(key))] != 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self._slots)
+
+
+def seen_set(mode: str = "exact", max_bytes: Optional[int] = None) -> SeenSet:
+    """Returns an empty set for deduplicating in memory in the given mode, which must not be `external`"""
+    if mode == "exact":
+        return ExactSet(max_bytes)
+    elif mode == "fingerprint":
+        return FingerprintSet(max_bytes)
+    raise ValueError(f"Unknown deduplication mode {mode!r}; expected one of {', '.join(MODES[:2])}")
+
+
+class ExternalSorter:
+    """
+    Sorts JSON-serializable records using a bounded amount of memory.
+
+    Records are buffered until they would use more than `max_bytes`, and each full buffer is sorted and spilled to
+    a temporary file. The sorted records are then merged from the files.
+
+    """
+
+    def __init__(self, key: Callable[[Any], Any], max_bytes: int = DEFAULT_EXTERNAL_MEMORY):
+        self.key: Callable[[Any], Any] = key
+        self.max_bytes: int = max_bytes
+        self.peak_bytes: int = 0
+        self._buffer: List[Any] = []
+        self._buffer_bytes: int = 0
+        self._runs: List[str] = []
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+
+    def add(self, record: Any, record_bytes: int):
+        self._buffer.append(record)
+        self._buffer_bytes += record_bytes
+        self.peak_bytes = max(self.peak_bytes, self._buffer_bytes)
+        if self._buffer_bytes >= self.max_bytes:
+            self._spill()
+
+    def _spill(self):
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="visie-")
+        path = os.path.join(self._tmpdir.name, f"run{len(self._runs)}.jsonl")
+        self._buffer.sort(key=self.key)
+        with open(path, "w") as f:
+            for record in self._buffer:
+                f.write(json.dumps(record))
+                f.write("\n")
+        self._runs.append(path)
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[Any]:
+        with open(path, "r") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def sorted(self) -> Iterator[Any]:
+        """Yields all of the records in sorted order, after which the sorter is empty"""
+        try:
+            self._buffer.sort(key=self.key)
+            buffer, self._buffer, self._buffer_bytes = self._buffer, [], 0
+            yield from heapq.merge(buffer, *map(self._read_run, self._runs), key=self.key)
+        finally:
+            self._runs = []
+            if self._tmpdir is not None:
+                self._tmpdir.cleanup()
+                self._tmpdir = None
+
+
+# the memory used by a [name, word ordinal, match ordinal, words] record besides its strings: the two lists and the
+# two integers
+_RECORD_OVERHEAD = 200
+
+
+def _record_bytes(name: str, words: List[str]) -> int:
+    return sys.getsizeof(name) + sum(sys.getsizeof(word) for word in words) + _RECORD_OVERHEAD
+
+
+def external_deduplicate(
+        word_matches: Iterable[Tuple[str, Iterable[Any]]],
+        max_bytes: Optional[int] = None,
+        on_finish: Optional[Callable[[int, int, int], None]] = None
+) -> Iterator[Tuple[str, ...]]:
+    """
+    Yields the words of the matches of `word_matches` that `visie._deduplicate` would yield, in the same order, but
+    only once all of them have been found.
+
+    Every match is sorted by its name on disk, so that only the matches of the first word with each name are kept,
+    and the kept matches are then sorted back into the order in which they were found. If provided, `on_finish` is
+    called with the number of suppressed words, the number of matches kept, and the peak number of bytes buffered in
+    memory.
+
+    """
+    if max_bytes is None:
+        max_bytes = DEFAULT_EXTERNAL_MEMORY
+    # every match of a word has the same name, which is the word itself in upper case
+    by_name = ExternalSorter(key=lambda record: (record[0], record[1], record[2]), max_bytes=max_bytes)
+    for word_ordinal, (word, matches) in enumerate(word_matches):
+        for match_ordinal, match in enumerate(matches):
+            words = list(match)
+            name = match.name()
+            by_name.add([name, word_ordinal, match_ordinal, words], _record_bytes(name, words))
+    in_order = ExternalSorter(key=lambda record: (record[1], record[2]), max_bytes=max_bytes)
+    duplicates = 0
+    kept = 0
+    first_name: Optional[str] = None
+    first_ordinal = -1
+    for record in by_name.sorted():
+        name, word_ordinal, _, words = record
+        if name != first_name:
+            first_name, first_ordinal = name, word_ordinal
+        elif word_ordinal != first_ordinal:
+            if record[2] == 0:
+                duplicates += 1
+            continue
+        kept += 1
+        in_order.add(record, _record_bytes(name, words))
+    for record in in_order.sorted():
+        yield tuple(record[3])
+    if on_finish is not None:
+        on_finish(duplicates, kept, max(by_name.peak_bytes, in_order.peak_bytes))
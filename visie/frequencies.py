@@ -0,0 +1,130 @@
+import json
+import os
+from string import ascii_lowercase
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from . import wordlist
+
+VERSION = 2
+
+# the extension of the files in which the statistics of dictionaries are saved
+EXTENSION = ".freq"
+
+
+class LetterFrequencies:
+    """The number of words of a dictionary that contain each lowercase letter, regardless of case"""
+
+    def __init__(self, words: int, containing: Dict[str, int]):
+        self.words: int = words
+        self.containing: Dict[str, int] = containing
+
+    @staticmethod
+    def count(words: Iterable[str]) -> "LetterFrequencies":
+        frequencies = LetterFrequencies(0, dict.fromkeys(ascii_lowercase, 0))
+        for word in words:
+            frequencies.add(word)
+        return frequencies
+
+    def merge(self, other: "LetterFrequencies"):
+        self.words += other.words
+        for letter, count in other.containing.items():
+            self.containing[letter] = self.containing.get(letter, 0) + count
+
+    def add(self, word: str):
+        self.words += 1
+        containing = self.containing
+        for letter in set(word.lower()):
+            if letter in containing:
+                containing[letter] += 1
+
+    def fraction(self, letter: str) -> float:
+        """Returns the fraction of the words that contain `letter`"""
+        if not self.words:
+            return 0.0
+        return self.containing.get(letter, 0) / self.words
+
+    def rejection_rate(self, letter: str, lo: int, hi: int) -> float:
+        """
+        Estimates the fraction of the words that contain `letter` fewer than `lo` or more than `hi` times.
+
+        Only the number of words containing each letter is known, so this is exact when `lo` is one or `hi` is zero,
+        and otherwise only orders the bounds by how likely they are to reject a word.
+
+        """
+        fraction = self.fraction(letter)
+        if lo > 0:
+            return 1.0 - fraction
+        elif hi == 0:
+            return fraction
+        return 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"words": self.words, "containing": self.containing}
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "LetterFrequencies":
+        return LetterFrequencies(int(data["words"]), {letter: int(n) for letter, n in data["containing"].items()})
+
+
+def load(path: str, dict_path: str, min_length: int, max_length: int) -> Optional[LetterFrequencies]:
+    """
+    Returns the letter frequencies of the words of the dictionary at `dict_path` with lengths in the given bounds,
+    from the file at `path` saved by `counting`. Returns None if the file is missing, if the dictionary changed since
+    it was saved, or if the words that were counted do not include every permissible length.
+    """
+    if dict_path == wordlist.STDIN:
+        return None
+    try:
+        signature = list(wordlist.signature(dict_path))
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data["version"] != VERSION or data["signature"] != signature \
+                or data["min_length"] > min_length or data["max_length"] < max_length:
+            return None
+        frequencies = LetterFrequencies(0, dict.fromkeys(ascii_lowercase, 0))
+        for length, counts in data["lengths"].items():
+            if min_length <= int(length) <= max_length:
+                frequencies.merge(LetterFrequencies.from_dict(counts))
+        return frequencies
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def counting(path: str, dict_path: str, words: Iterable[str], min_length: int, max_length: int) -> Iterator[str]:
+    """
+    Passes through the `words` of the dictionary at `dict_path` with lengths in the given bounds, counting their
+    letters, and saves the frequencies to `path` for `load` once they are exhausted.
+
+    The frequencies are counted from the words that a search reads anyway, rather than by reading the dictionary
+    again. They are counted separately for each length, so that a later search of any lengths within the bounds can
+    reuse them.
+
+    """
+    if dict_path == wordlist.STDIN:
+        yield from words
+        return
+    try:
+        # the signature is taken before reading, so that the frequencies are not saved for a dictionary changed since
+        signature = list(wordlist.signature(dict_path))
+    except OSError:
+        yield from words
+        return
+    lengths: Dict[int, LetterFrequencies] = {}
+    for word in words:
+        frequencies = lengths.get(len(word))
+        if frequencies is None:
+            frequencies = lengths[len(word)] = LetterFrequencies(0, dict.fromkeys(ascii_lowercase, 0))
+        frequencies.add(word)
+        yield word
+    data = {
+        "version": VERSION, "signature": signature, "min_length": min_length, "max_length": max_length,
+        "lengths": {str(length): frequencies.to_dict() for length, frequencies in lengths.items()}
+    }
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
@@ -0,0 +1,408 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from . import positional, prefilter, visie, wordlist
+from .optimizer import structural_key
+from .visie import (
+    AllOfConstraint, AnyOfConstraint, AnyOrderedConstraint, Constraint, DictionaryWord, ExactlyOneConstraint,
+    OptionalConstraint, OrderedConstraint, Wildcard
+)
+
+# the number of subtrees whose relations are kept, evicting the least recently used
+MAX_SUBTREES = 1024
+
+# the number of words whose spans are remembered over all of the kept subtrees, between constraints
+MAX_SPANS = 1 << 20
+
+# For each offset `i` of a word, a bitmask of the offsets `j > i` at which a match of a subtree starting at `i` can
+# end, i.e., the subtree can consume exactly the letters `word[i:j]`.
+Ends = Tuple[int, ...]
+
+
+class Relation:
+    """
+    The spans of the dictionary words that a constraint subtree can match.
+
+    `candidates` is a bitmap of the ids of the words of which the subtree may consume at least one letter, which is
+    computed from the candidates of its children without looking at any words. The spans of a word are only
+    computed when they are first needed, from the spans of the children, and are then remembered. If `empty` is
+    set, the subtree can also consume no letters at every offset of every word except its end, which is not
+    recorded in the spans.
+
+    """
+
+    def __init__(self, empty: bool, candidates: int, num_words: int):
+        self.empty: bool = empty
+        self.candidates: int = candidates
+        # a copy of the bitmap whose bits can be tested without shifting the whole integer
+        self._candidate_bytes: bytes = candidates.to_bytes((num_words + 7) // 8, "little")
+        self.computed: int = 0
+        """the number of words whose spans have been computed"""
+
+    def is_candidate(self, word_id: int) -> bool:
+        return bool(self._candidate_bytes[word_id >> 3] >> (word_id & 7) & 1)
+
+    def get(self, word_id: int, word: str) -> Ends:
+        raise NotImplementedError()
+
+    def remembered(self) -> int:
+        """Returns the number of words whose spans are remembered"""
+        return 0
+
+    def forget(self):
+        """Forgets the spans of every word, which are computed again when they are next needed"""
+        pass
+
+
+class _NodeRelation(Relation):
+    def __init__(
+            self, combine: "_Combine", children: List[Relation], empty: bool, candidates: int, num_words: int
+    ):
+        super().__init__(empty, candidates, num_words)
+        self.combine: _Combine = combine
+        self.children: List[Relation] = children
+        self._ends: Dict[int, Ends] = {}
+
+    def get(self, word_id: int, word: str) -> Ends:
+        ends = self._ends.get(word_id)
+        if ends is None:
+            if not self.is_candidate(word_id):
+                return (0,) * len(word)
+            positions = self.combine(
+                [(child.get(word_id, word), child.empty) for child in self.children], len(word), range(len(word))
+            )
+            # consuming no letters is recorded by `empty` rather than in the spans
+            ends = tuple(p & ~(1 << i) for i, p in enumerate(positions))
+            self._ends[word_id] = ends
+            self.computed += 1
+        return ends
+
+    def remembered(self) -> int:
+        return len(self._ends)
+
+    def forget(self):
+        self._ends = {}
+
+
+class _LeafRelation(Relation):
+    """The relation of a `DictionaryWord` or `Wildcard`, whose spans are cheaper to compute than to remember"""
+
+    def __init__(self, letter: Optional[str], candidates: int, num_words: int):
+        super().__init__(False, candidates, num_words)
+        self.letter: Optional[str] = letter
+
+    def get(self, word_id: int, word: str) -> Ends:
+        if self.letter is None:
+            return _wildcard_ends(len(word))
+        letter = self.letter
+        lowered = word.lower()
+        if len(lowered) != len(word) or len(letter) != 1:
+            # lowercasing changed the offsets of the letters
+            return tuple(1 << (i + 1) if c.lower() == letter else 0 for i, c in enumerate(word))
+        i = lowered.find(letter)
+        if i < 0:
+            return (0,) * len(word)
+        ends = [0] * len(word)
+        while i >= 0:
+            ends[i] = 1 << (i + 1)
+            i = lowered.find(letter, i + 1)
+        return tuple(ends)
+
+
+_WILDCARD_ENDS: Dict[int, Ends] = {}
+
+
+def _wildcard_ends(length: int) -> Ends:
+    ends = _WILDCARD_ENDS.get(length)
+    if ends is None:
+        ends = _WILDCARD_ENDS[length] = tuple(1 << (i + 1) for i in range(length))
+    return ends
+
+
+def _positions_after(positions: int, ends: Ends, empty: bool) -> int:
+    """Returns the offsets at which a subtree can stop after starting at any of `positions`"""
+    after = positions if empty else 0
+    for i in _small_bits(positions):
+        after |= ends[i]
+    return after
+
+
+def _small_bits(bitmap: int) -> Iterator[int]:
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+def _sequence(children: Sequence[Tuple[Ends, bool]], n: int, starts: Sequence[int]) -> List[int]:
+    # `OrderedConstraint._match`: each child starts where the previous one stopped, and only the last child may
+    # consume the rest of the word
+    complete = 1 << n
+    last = len(children) - 1
+    result = []
+    for start in starts:
+        positions = 1 << start
+        for t, (ends, empty) in enumerate(children):
+            positions = _positions_after(positions, ends, empty)
+            if t != last:
+                positions &= ~complete
+            if not positions:
+                break
+        result.append(positions)
+    return result
+
+
+def _all_of(children: Sequence[Tuple[Ends, bool]], n: int, starts: Sequence[int]) -> List[int]:
+    # `AllOfConstraint._match`: every child is used once, in any order, and only the last may consume the rest of
+    # the word
+    complete = 1 << n
+    memo: Dict[Tuple[int, int], int] = {}
+
+    def reach(start: int, remaining: int) -> int:
+        key = (start, remaining)
+        positions = memo.get(key)
+        if positions is not None:
+            return positions
+        positions = 0
+        for b in _small_bits(remaining):
+            ends, empty = children[b]
+            after = ends[start] | ((1 << start) if empty else 0)
+            if remaining == 1 << b:
+                positions |= after
+            else:
+                for j in _small_bits(after & ~complete):
+                    positions |= reach(j, remaining & ~(1 << b))
+        memo[key] = positions
+        return positions
+
+    return [reach(start, (1 << len(children)) - 1) for start in starts]
+
+
+def _any_of(children: Sequence[Tuple[Ends, bool]], n: int, starts: Sequence[int]) -> List[int]:
+    # `AnyOfConstraint._match`: each child is used at most once, in any order, and only matches that consume the rest
+    # of the word are produced
+    complete = 1 << n
+    infeasible = set()
+
+    def completes(start: int, remaining: int) -> bool:
+        if (start, remaining) in infeasible:
+            return False
+        for b in _small_bits(remaining):
+            ends, empty = children[b]
+            after = ends[start] | ((1 << start) if empty else 0)
+            if after & complete:
+                return True
+            elif remaining != 1 << b:
+                for j in _small_bits(after):
+                    if completes(j, remaining & ~(1 << b)):
+                        return True
+        infeasible.add((start, remaining))
+        return False
+
+    return [complete if completes(start, (1 << len(children)) - 1) else 0 for start in starts]
+
+
+def _exactly_one(children: Sequence[Tuple[Ends, bool]], n: int, starts: Sequence[int]) -> List[int]:
+    result = []
+    for start in starts:
+        positions = 0
+        for ends, _ in children:
+            positions |= ends[start]
+        result.append(positions)
+    return result
+
+
+# how the spans of each type of constraint are computed from the spans of its children
+_Combine = Callable[[Sequence[Tuple[Ends, bool]], int, Sequence[int]], List[int]]
+_COMBINE: Dict[type, _Combine] = {
+    OrderedConstraint: _sequence,
+    AnyOrderedConstraint: _sequence,
+    OptionalConstraint: _sequence,
+    AllOfConstraint: _all_of,
+    AnyOfConstraint: _any_of,
+    ExactlyOneConstraint: _exactly_one,
+}
+
+
+def _is_empty(constraint: Constraint, children: Sequence[Relation]) -> bool:
+    """Returns whether `constraint` can consume no letters, given whether each of its children can"""
+    if type(constraint) is OptionalConstraint:
+        return True
+    elif type(constraint) in (OrderedConstraint, AnyOrderedConstraint, AllOfConstraint):
+        return bool(children) and all(child.empty for child in children)
+    elif type(constraint) is ExactlyOneConstraint:
+        return any(child.empty for child in children)
+    return False
+
+
+def _candidates(constraint: Constraint, children: Sequence[Relation]) -> int:
+    """Returns a bitmap of the words of which `constraint` may consume at least one letter"""
+    if not children:
+        return 0
+    if type(constraint) in (AnyOfConstraint, ExactlyOneConstraint) or all(child.empty for child in children):
+        words = 0
+        for child in children:
+            words |= child.candidates
+        return words
+    words = -1
+    for child in children:
+        if not child.empty:
+            words &= child.candidates
+    return words
+
+
+class IncrementalSearch:
+    """
+    Searches a dictionary held in memory, reusing the work done for the subtrees of previous constraints.
+
+    For every subtree of a constraint, the search keeps a `Relation`: the spans of the words that the subtree can
+    match. A subtree's spans only depend on the spans of its children, so relations are cached by the subtree's
+    structural key, and when a constraint is edited, only the subtrees that changed and their ancestors have to be
+    evaluated again. The words that each subtree may match are kept as bitmaps of word ids, so the root only
+    examines the words that all of its required children may match, and that have letters at positions at which the
+    root can consume them (see `positional.PositionalIndex`). The spans of a word are only computed for the
+    subtrees that the root actually asks about, and at most `max_spans` of them are remembered between constraints,
+    forgetting those of the least recently used subtrees first. The results are exactly those of `visie.generate`,
+    in the same order. Variants are not supported.
+
+    """
+
+    def __init__(self, dict_path: str = visie.DICT_PATH, max_subtrees: int = MAX_SUBTREES, max_spans: int = MAX_SPANS):
+        self.words: List[str] = [word for word in wordlist.iter_words(dict_path) if word]
+        self.max_subtrees: int = max_subtrees
+        self.max_spans: int = max_spans
+        lengths: Dict[int, List[int]] = {}
+        letters: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(self.words):
+            lengths.setdefault(len(word), []).append(word_id)
+            for letter in set(word):
+                letters.setdefault(letter.lower(), []).append(word_id)
+        self._lengths: Dict[int, int] = {length: self._bitmap(ids) for length, ids in lengths.items()}
+        self._letters: Dict[str, int] = {letter: self._bitmap(ids) for letter, ids in letters.items()}
+        self._positions = positional.PositionalIndex(self.words)
+        self._wildcard = _LeafRelation(None, (1 << len(self.words)) - 1, len(self.words))
+        self._cache: "OrderedDict[Hashable, Relation]" = OrderedDict()
+        self.evaluated: int = 0
+        """the number of subtrees of the last constraint that had to be evaluated, rather than reused"""
+        self.reused: int = 0
+        """the number of subtrees of the last constraint whose cached relations were reused"""
+        self.examined: int = 0
+        """the number of words whose spans were examined at the root for the last constraint"""
+
+    def _bitmap(self, word_ids: List[int]) -> int:
+        # setting the bits of an integer one at a time would copy it every time
+        data = bytearray((len(self.words) + 7) // 8)
+        for word_id in word_ids:
+            data[word_id >> 3] |= 1 << (word_id & 7)
+        return int.from_bytes(data, "little")
+
+    def lengths(self, min_length: int, max_length: int) -> int:
+        """Returns a bitmap of the words of the given lengths"""
+        words = 0
+        for length, ids in self._lengths.items():
+            if min_length <= length <= max_length:
+                words |= ids
+        return words
+
+    def excluded(self, constraint: Constraint) -> int:
+        """Returns a bitmap of the words containing a letter that no leaf of `constraint` can consume"""
+        _, maxs = constraint.letter_bounds()
+        words = 0
+        for letter, ids in self._letters.items():
+            # like `prefilter.LetterFilter`, only ASCII characters are ever rejected
+            if len(letter) == 1 and letter < "\x80" and maxs[prefilter.column(letter)] == 0:
+                words |= ids
+        return words
+
+    def _relation(self, node: Constraint, children: List[Relation], key: Hashable) -> Relation:
+        relation = self._cache.get(key)
+        if relation is None:
+            self.evaluated += 1
+            relation = _NodeRelation(
+                _COMBINE[type(node)], children, _is_empty(node, children), _candidates(node, children),
+                len(self.words)
+            )
+        else:
+            self.reused += 1
+        self._cache[key] = relation
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_subtrees:
+            # a parent that is still kept may refer to the evicted relation
+            self._cache.popitem(last=False)[1].forget()
+        return relation
+
+    def _forget_spans(self):
+        """Forgets the spans of the least recently used subtrees until at most `max_spans` words' spans are left"""
+        remembered = sum(relation.remembered() for relation in self._cache.values())
+        for relation in self._cache.values():
+            if remembered <= self.max_spans:
+                break
+            remembered -= relation.remembered()
+            relation.forget()
+
+    def _leaf(self, node: Constraint) -> Relation:
+        if isinstance(node, DictionaryWord):
+            letter = node.word[0].lower()
+            return _LeafRelation(letter, self._letters.get(letter, 0), len(self.words))
+        return self._wildcard
+
+    def _children(self, root: Constraint) -> List[Relation]:
+        """Returns the relations of the children of `root`"""
+        # the tree is traversed with an explicit stack, so that it can be arbitrarily deep
+        stack: List[Tuple[Constraint, bool]] = [(child, False) for child in reversed(root.children)]
+        results: List[Tuple[Hashable, Relation]] = []
+        while stack:
+            node, children_done = stack.pop()
+            if isinstance(node, (DictionaryWord, Wildcard)):
+                results.append((structural_key(node), self._leaf(node)))
+            elif children_done:
+                num_children = len(node.children)
+                children = results[len(results) - num_children:]
+                del results[len(results) - num_children:]
+                key = (type(node).__name__,) + tuple(child_key for child_key, _ in children)
+                results.append((key, self._relation(node, [relation for _, relation in children], key)))
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+        return [relation for _, relation in results]
+
+    def matching_words(self, constraints: Constraint, min_length: int = 3) -> Iterator[str]:
+        """Yields the dictionary words, in order, for which `constraints.matches` is non-empty"""
+        self.evaluated = self.reused = self.examined = 0
+        min_length = max(constraints.min_length(), min_length)
+        max_length = constraints.max_length()
+        words = self.lengths(min_length, max_length) & ~self.excluded(constraints)
+        if type(constraints) in _COMBINE:
+            children = self._children(constraints)
+            # the subtrees of this constraint are now the most recently used
+            self._forget_spans()
+            words &= _candidates(constraints, children)
+            combine = _COMBINE[type(constraints)]
+        else:
+            leaf = self._leaf(constraints)
+            children = [leaf]
+            words &= leaf.candidates
+            combine = _exactly_one
+        # the positions of the letters rule out most of the words that a wildcard at the root would otherwise admit
+        candidates = words.to_bytes((len(self.words) + 7) // 8, "little")
+        word_ids = [
+            word_id for word_id in self._positions.candidates(constraints, min_length, max_length)
+            if candidates[word_id >> 3] >> (word_id & 7) & 1
+        ]
+        letter_filter = prefilter.LetterFilter(constraints, max_length)
+        if letter_filter:
+            word_ids = [word_id for word_id in word_ids if letter_filter.admits(self.words[word_id])]
+        for word_id in word_ids:
+            word = self.words[word_id]
+            n = len(word)
+            self.examined += 1
+            # only whole words matter at the root, so its spans are only computed from the start of each word, and
+            # are not cached
+            if combine([(child.get(word_id, word), child.empty) for child in children], n, (0,))[0] >> n & 1:
+                yield word
+
+    def generate(self, constraints: Constraint, min_length: int = 3) -> Iterator[visie.Acronym]:
+        """Yields the acronyms that `visie.generate` would yield for the same dictionary"""
+        yield from visie._deduplicate(
+            (word, constraints.matches(word)) for word in self.matching_words(constraints, min_length)
+        )
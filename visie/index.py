@@ -0,0 +1,201 @@
+from bisect import bisect_left
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+MAGIC = b"VISIEIDX"
+VERSION = 2
+
+# magic, version, number of words, longest word length
+HEADER = struct.Struct("<8sIIQ")
+
+# the number of words decoded from the blob at a time when streaming a bucket
+CHUNK_SIZE = 1 << 16
+
+
+class InvalidIndexException(Exception):
+    pass
+
+
+def is_index(path: str) -> bool:
+    """Returns whether the file at `path` is a precompiled dictionary index"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def _write_uint64s(stream: BinaryIO, values: Iterable[int]):
+    data = array("Q", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    stream.write(data.tobytes())
+
+
+def build_index(words: Iterable[str], output_path: str) -> int:
+    """
+    Builds a dictionary index from `words` and saves it to `output_path`.
+
+    Words are stripped, bucketed by length, and deduplicated case-insensitively. The first spelling of each word is
+    the one that is kept; since matching is case-insensitive, this yields exactly the same results as scanning the
+    original word list. The position of each word in the word list is saved too, so that the buckets can be merged
+    back into the order of the word list.
+
+    Returns the number of words in the index.
+
+    """
+    buckets: Dict[int, List[str]] = {}
+    positions: Dict[int, List[int]] = {}
+    seen: Set[str] = set()
+    for word in words:
+        word = word.strip()
+        if not word:
+            continue
+        key = f"{len(word)}:{word.upper()}"
+        if key in seen:
+            continue
+        positions.setdefault(len(word), []).append(len(seen))
+        seen.add(key)
+        buckets.setdefault(len(word), []).append(word)
+    del seen
+
+    max_length = max(buckets.keys(), default=0)
+    bucket_starts: List[int] = [0]
+    for length in range(max_length + 1):
+        bucket_starts.append(bucket_starts[-1] + len(buckets.get(length, ())))
+    num_words = bucket_starts[-1]
+
+    encoded: List[bytes] = [
+        f"{word}\n".encode("utf-8") for length in range(max_length + 1) for word in buckets.get(length, ())
+    ]
+    offsets: List[int] = [0]
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, num_words, max_length))
+        _write_uint64s(f, bucket_starts)
+        _write_uint64s(f, offsets)
+        _write_uint64s(f, (position for length in range(max_length + 1) for position in positions.get(length, ())))
+        for e in encoded:
+            f.write(e)
+    os.replace(tmp_path, output_path)
+    return num_words
+
+
+class DictionaryIndex:
+    """A read-only, memory-mapped dictionary index created by `build_index`"""
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap cannot map empty files
+            self._file.close()
+            raise InvalidIndexException(f"{path} is not a valid dictionary index")
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise InvalidIndexException(f"{path} is not a valid dictionary index")
+        magic, version, self.num_words, self.max_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise InvalidIndexException(f"{path} is not a valid dictionary index")
+        elif version != VERSION:
+            self.close()
+            raise InvalidIndexException(f"{path} has unsupported index version {version}")
+        offset = HEADER.size
+        self._bucket_starts = self._uint64s(offset, self.max_length + 2)
+        offset += 8 * (self.max_length + 2)
+        self._offsets = self._uint64s(offset, self.num_words + 1)
+        offset += 8 * (self.num_words + 1)
+        # the position of each word in the original word list, which increases within each bucket
+        self._positions = self._uint64s(offset, self.num_words)
+        self._blob_start: int = offset + 8 * self.num_words
+
+    def _uint64s(self, offset: int, count: int):
+        view = memoryview(self._mmap)[offset:offset + 8 * count]
+        if sys.byteorder == "little":
+            return view.cast("Q")
+        values = array("Q", view)
+        values.byteswap()
+        return values
+
+    def close(self):
+        if self._mmap is not None:
+            # the memoryviews over the mapping must be released before it can be closed
+            self._bucket_starts = self._offsets = self._positions = None
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "DictionaryIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.num_words
+
+    def bucket(self, length: int) -> Tuple[int, int]:
+        """Returns the half-open range of word ordinals whose words have the given length"""
+        if length < 0 or length > self.max_length:
+            return 0, 0
+        return self._bucket_starts[length], self._bucket_starts[length + 1]
+
+    def word(self, ordinal: int) -> str:
+        start = self._blob_start + self._offsets[ordinal]
+        end = self._blob_start + self._offsets[ordinal + 1] - 1
+        return self._mmap[start:end].decode("utf-8")
+
+    def words_in_range(self, start: int, end: int) -> Iterator[str]:
+        """Yields the words with ordinals in the half-open range [start, end)"""
+        for chunk_start in range(start, end, CHUNK_SIZE):
+            chunk_end = min(chunk_start + CHUNK_SIZE, end)
+            blob = self._mmap[self._blob_start + self._offsets[chunk_start]:self._blob_start + self._offsets[chunk_end]]
+            words = blob.decode("utf-8").split("\n")
+            words.pop()
+            yield from words
+
+    def words(
+            self, min_length: int = 0, max_length: Optional[int] = None, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        Yields the words whose lengths are within the given bounds, in the order of the original word list, skipping
+        all other length buckets. Only the words at positions in the half-open range [start, end) of the word list
+        are yielded.
+        """
+        if max_length is None or max_length > self.max_length:
+            max_length = self.max_length
+        if end is None:
+            end = self.num_words
+        ranges = []
+        for length in range(max(min_length, 0), max_length + 1):
+            bucket_start, bucket_end = self.bucket(length)
+            if bucket_start == bucket_end:
+                continue
+            # positions increase within a bucket, so those in [start, end) are a contiguous range of it
+            positions = self._positions[bucket_start:bucket_end]
+            first, last = bisect_left(positions, start), bisect_left(positions, end)
+            if first < last:
+                ranges.append((bucket_start + first, bucket_start + last))
+        if len(ranges) == 1:
+            yield from self.words_in_range(*ranges[0])
+            return
+        # each bucket is already in the order of the word list, so they only need to be merged
+        for _, word in heapq.merge(*(
+                zip(self._positions[range_start:range_end], self.words_in_range(range_start, range_end))
+                for range_start, range_end in ranges
+        )):
+            yield word
+
+    def __iter__(self) -> Iterator[str]:
+        return self.words()
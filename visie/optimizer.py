@@ -0,0 +1,142 @@
+from typing import Callable, Hashable, List, TypeVar
+
+from .visie import (
+    AnyOfConstraint, AnyOrderedConstraint, AllOfConstraint, Constraint, DictionaryWord, ExactlyOneConstraint,
+    OptionalConstraint, OrderedConstraint, Wildcard
+)
+
+
+T = TypeVar("T")
+
+
+def _fold(constraint: Constraint, combine: Callable[[Constraint, List[T]], T]) -> T:
+    """
+    Returns `combine(constraint, results)`, where `results` are the results of folding each of the constraint's
+    children in the same way.
+
+    The tree is traversed with an explicit stack rather than by recursion, so that it can be arbitrarily deep.
+
+    """
+    stack = [(constraint, False)]
+    results: List[T] = []
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            num_children = len(node.children)
+            children = results[len(results) - num_children:]
+            del results[len(results) - num_children:]
+            results.append(combine(node, children))
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(node.children))
+    return results[0]
+
+
+def structural_key(constraint: Constraint) -> Hashable:
+    """Returns a hashable key that is equal for two constraints if and only if they have the same structure"""
+    def key(node: Constraint, children: List[Hashable]) -> Hashable:
+        if isinstance(node, DictionaryWord):
+            return type(node).__name__, node.word
+        return (type(node).__name__,) + tuple(children)
+
+    return _fold(constraint, key)
+
+
+def is_complete_only(constraint: Constraint) -> bool:
+    """Returns whether `constraint` can only ever produce complete matches, i.e., matches with no remainder"""
+    if type(constraint) is AnyOfConstraint:
+        return True
+    elif type(constraint) is ExactlyOneConstraint:
+        return all(is_complete_only(child) for child in constraint.children)
+    return False
+
+
+def _flatten(constraint_type: type, children: List[Constraint]) -> List[Constraint]:
+    flattened: List[Constraint] = []
+    for child in children:
+        # an empty group matches nothing, so it cannot be flattened away
+        if type(child) is constraint_type and child.children:
+            flattened.extend(child.children)
+        else:
+            flattened.append(child)
+    return flattened
+
+
+def _optimize(constraint_type: type, children: List[Constraint], is_root: bool) -> Constraint:
+    """Simplifies a constraint of type `constraint_type` whose `children` have already been simplified"""
+    if constraint_type is OptionalConstraint:
+        if len(children) == 1 and type(children[0]) is OptionalConstraint:
+            # x?? matches exactly what x? matches, but produces every match of x? twice
+            return children[0]
+        return OptionalConstraint(_flatten(OrderedConstraint, children))
+    elif constraint_type is OrderedConstraint:
+        children = _flatten(OrderedConstraint, children)
+    elif constraint_type is ExactlyOneConstraint:
+        # duplicate alternatives only produce duplicate matches
+        seen = set()
+        unique_children: List[Constraint] = []
+        for child in _flatten(ExactlyOneConstraint, children):
+            key = structural_key(child)
+            if key not in seen:
+                seen.add(key)
+                unique_children.append(child)
+        children = unique_children
+    elif constraint_type is AnyOfConstraint:
+        if children and all(is_complete_only(child) for child in children):
+            # An `AnyOfConstraint` only continues matching after a child's partial matches, so if its children cannot
+            # produce any, it is just a choice between them. This is always the case for the constraint that joins
+            # multiple command line arguments that each contain multiple words.
+            return _optimize(ExactlyOneConstraint, children, is_root)
+        elif len(children) == 1 and is_root:
+            # partial matches are discarded at the root anyway
+            return _optimize_root(children[0])
+    if len(children) == 1 and constraint_type in (
+            OrderedConstraint, AllOfConstraint, ExactlyOneConstraint, AnyOrderedConstraint
+    ):
+        # a group of one is equivalent to its only member
+        if is_root:
+            # the member is now the root, which may allow it to be simplified further
+            return _optimize_root(children[0])
+        return children[0]
+    return constraint_type(children)
+
+
+def optimize(constraint: Constraint) -> Constraint:
+    """
+    Returns a simplified constraint that matches the same acronyms as `constraint`.
+
+    Nested groups of the same kind are flattened, groups of one are replaced by their only member, and redundant
+    optionals and alternatives are removed. The simplified constraint produces its matches in the same order, but
+    never produces the same match more than once where `constraint` did.
+
+    """
+    return _optimize_root(_fold(
+        constraint,
+        lambda node, children: _optimize(type(node), children, False) if node.children else node
+    ))
+
+
+def _optimize_root(constraint: Constraint) -> Constraint:
+    # the children of `constraint` have already been simplified, but some rules only apply at the root
+    if not constraint.children:
+        return constraint
+    return _optimize(type(constraint), list(constraint.children), True)
+
+
+def plan(constraint: Constraint) -> str:
+    """Returns the constraint in the syntax of `parser.Parser`"""
+    def render(node: Constraint, rendered_children: List[str]) -> str:
+        if isinstance(node, DictionaryWord):
+            return node.word
+        elif isinstance(node, Wildcard):
+            return "."
+        children = " ".join(rendered_children)
+        if isinstance(node, OptionalConstraint):
+            if len(node.children) == 1:
+                return f"{children}?"
+            return f"<{children}>?"
+        elif isinstance(node, (OrderedConstraint, AllOfConstraint, AnyOfConstraint, ExactlyOneConstraint)):
+            return f"{node.BEGIN_DELIM}{children}{node.END_DELIM}"
+        return f"{type(node).__name__}({children})"
+
+    return _fold(constraint, render)
@@ -0,0 +1,190 @@
+import itertools
+import locale
+import mmap
+from multiprocessing import Pool, TimeoutError
+from multiprocessing.pool import IMapIterator
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import index, visie, wordlist
+from .budget import SearchBudget
+from .frequencies import LetterFrequencies
+
+# (start, end) positions in the word list of a dictionary index, or (start, end) byte offsets for a plain word list
+Shard = Tuple[int, int]
+
+# the number of shards per worker; using more shards than workers balances the load when some shards are slower
+SHARDS_PER_JOB = 4
+
+# the number of words sent to a worker at a time for word lists that cannot be memory-mapped
+BATCH_SIZE = 1 << 14
+
+# the longest time to wait for a worker before checking whether the search has been cancelled
+POLL_SECONDS = 0.1
+
+# the per-process state of a worker, set by `_initialize`
+_worker: Dict[str, Any] = {}
+
+
+def _index_shards(dict_path: str, count: int) -> List[Shard]:
+    with index.DictionaryIndex(dict_path) as dictionary:
+        end = len(dictionary)
+    if end == 0:
+        return []
+    step = max((end + count - 1) // count, 1)
+    return [(s, min(s + step, end)) for s in range(0, end, step)]
+
+
+def _text_shards(dict_path: str, count: int) -> List[Shard]:
+    size = os.path.getsize(dict_path)
+    if size == 0:
+        return []
+    shards: List[Shard] = []
+    with open(dict_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        step = max(size // count, 1)
+        while start < size:
+            # shards must end on a line boundary
+            end = mm.find(b"\n", min(start + step, size - 1))
+            end = size if end < 0 else end + 1
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def shards(dict_path: str, count: int) -> List[Shard]:
+    """Splits the dictionary into at most `count` contiguous shards, in dictionary order"""
+    if index.is_index(dict_path):
+        return _index_shards(dict_path, count)
+    else:
+        return _text_shards(dict_path, count)
+
+
+def _initialize(
+        constraints: visie.Constraint,
+        dict_path: str,
+        min_length: int,
+        max_length: int,
+        use_variants: bool,
+        engine: str,
+        letter_frequencies: Optional[LetterFrequencies]
+):
+    _worker.update(
+        constraints=constraints, min_length=min_length, max_length=max_length, use_variants=use_variants,
+        engine=engine, letter_frequencies=letter_frequencies
+    )
+    # The dictionary is memory-mapped rather than sent to the workers, so they all share the OS's page cache
+    if wordlist.is_streamed(dict_path):
+        return
+    elif index.is_index(dict_path):
+        _worker["index"] = index.DictionaryIndex(dict_path)
+    else:
+        f = open(dict_path, "rb")
+        _worker["mmap"] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        f.close()
+
+
+def _shard_words(shard: Shard) -> Iterator[str]:
+    start, end = shard
+    dictionary: Optional[index.DictionaryIndex] = _worker.get("index")
+    if dictionary is not None:
+        yield from dictionary.words(
+            *visie._word_length_bounds(_worker["min_length"], _worker["max_length"], _worker["use_variants"]),
+            start=start, end=end
+        )
+    else:
+        text = _worker["mmap"][start:end].decode(locale.getpreferredencoding(False))
+        # blank lines, including the one after the final newline of the shard, are not words
+        yield from (word for word in (line.strip() for line in text.split("\n")) if word)
+
+
+def _search(words: Iterable[str]) -> List[Tuple[str, List[Tuple[str, ...]]]]:
+    results: List[Tuple[str, List[Tuple[str, ...]]]] = []
+    for word, matches in visie._word_matches(
+            _worker["constraints"], words, _worker["min_length"], _worker["max_length"], _worker["use_variants"],
+            _worker["engine"], letter_frequencies=_worker["letter_frequencies"]
+    ):
+        match_words = [tuple(match) for match in matches]
+        if match_words:
+            results.append((word, match_words))
+    return results
+
+
+def _search_shard(shard: Shard) -> List[Tuple[str, List[Tuple[str, ...]]]]:
+    return _search(_shard_words(shard))
+
+
+def _batches(words: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        batch = list(itertools.islice(words, size))
+        if not batch:
+            break
+        yield batch
+
+
+def _within_budget(results: IMapIterator, budget: SearchBudget) -> Iterator[List[Tuple[str, List[Tuple[str, ...]]]]]:
+    while not budget.exceeded():
+        remaining = budget.remaining()
+        try:
+            yield results.next(POLL_SECONDS if remaining is None else min(remaining, POLL_SECONDS))
+        except TimeoutError:
+            continue
+        except StopIteration:
+            return
+
+
+def generate(
+        constraints: visie.Constraint,
+        min_length: int,
+        max_length: int,
+        use_variants: bool,
+        dict_path: str,
+        engine: str,
+        jobs: int,
+        ordered: bool = True,
+        letter_frequencies: Optional[LetterFrequencies] = None,
+        deduplicate: Callable[[Iterable[Tuple[str, Iterable[visie.Acronym]]]], Iterator[visie.Acronym]] = visie._deduplicate,
+        budget: Optional[SearchBudget] = None
+) -> Iterator[visie.Acronym]:
+    """
+    Searches the dictionary using a pool of `jobs` worker processes.
+
+    Each worker memory-maps the dictionary itself and searches the shards it is assigned, returning the matching
+    words and their expansions. The results are deduplicated here exactly as `visie.generate` does. If `ordered`
+    is True, results are yielded in dictionary order; otherwise they are yielded as each shard completes.
+
+    Word lists that cannot be memory-mapped, i.e., stdin and compressed files, are instead read here and sent to
+    the workers in batches.
+
+    If a `budget` is provided, it is checked at least every `POLL_SECONDS` while waiting for the workers, and the
+    workers are terminated as soon as it is exceeded.
+
+    """
+    tasks: Iterable[Any]
+    search: Callable[[Any], List[Tuple[str, List[Tuple[str, ...]]]]]
+    if wordlist.is_streamed(dict_path):
+        tasks = _batches(visie._dictionary_words(dict_path, min_length, max_length, use_variants), BATCH_SIZE)
+        search = _search
+    else:
+        dictionary_shards = shards(dict_path, jobs * SHARDS_PER_JOB)
+        if not dictionary_shards:
+            return
+        jobs = min(jobs, len(dictionary_shards))
+        tasks = dictionary_shards
+        search = _search_shard
+    with Pool(
+            jobs,
+            initializer=_initialize,
+            initargs=(constraints, dict_path, min_length, max_length, use_variants, engine, letter_frequencies)
+    ) as pool:
+        if ordered:
+            results = pool.imap(search, tasks)
+        else:
+            results = pool.imap_unordered(search, tasks)
+        if budget is not None:
+            results = _within_budget(results, budget)
+        yield from deduplicate(
+            (word, (visie.Acronym(*words) for words in matches))
+            for shard_results in results
+            for word, matches in shard_results
+        )
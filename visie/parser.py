@@ -1,4 +1,6 @@
-from typing import Iterable, Iterator, List, Optional, Type, TypeVar, Union
+from collections import deque
+import re
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar, Union
 
 from . import visie
 
@@ -21,25 +23,21 @@ class Token:
         return f"{type(self).__name__}(token={self.token!r}, offset={self.offset!r}, fulltext={self.fulltext!r})"
 
 
+# each token is a run of letters or a single delimiter; runs of whitespace separate tokens
+_TOKEN = re.compile(
+    r"(?P<word>[A-Za-z\u212a]+)|(?P<delimiter>[()\[\]{}<>?.])|(?P<space>[ \t\n\r]+)|(?P<illegal>.)", re.DOTALL
+)
+
+
 def tokenize(text: str) -> Iterator[Token]:
-    word = ''
-    for i, c in enumerate(text):
-        if c in ('(', ')', '[', ']', '{', '}', '<', '>', '?', '.'):
-            if word:
-                yield Token(word, i - len(word), text)
-                word = ''
-            yield Token(c, i, text)
-        elif c == ' ' or c == '\t' or c == '\n' or c == '\r':
-            if word:
-                yield Token(word, i - len(word), text)
-                word = ''
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == "space":
             continue
-        elif ord('a') <= ord(c.lower()) <= ord('z'):
-            word += c
-        else:
-            raise ParseException(f"{text}\n{' '*(len(text)-i)}^\nIllegal token \"{c}\"")
-    if word:
-        yield Token(word, len(text) - len(word), text)
+        elif kind == "illegal":
+            i = match.start()
+            raise ParseException(f"{text}\n{' '*(len(text)-i)}^\nIllegal token \"{text[i]}\"")
+        yield Token(match.group(), match.start(), text)
 
 
 class Tokenizer:
@@ -47,7 +45,7 @@ class Tokenizer:
         if isinstance(text, str):
             text = tokenize(text)
         self._tokens: Iterator[Token] = iter(text)
-        self._token_buffer: List[Token] = []
+        self._token_buffer: Deque[Token] = deque()
 
     def __iter__(self) -> Iterator[Token]:
         while True:
@@ -56,9 +54,7 @@ class Tokenizer:
     def pop(self) -> Token:
         if not self._token_buffer:
             return next(self._tokens)
-        ret = self._token_buffer[0]
-        self._token_buffer = self._token_buffer[1:]
-        return ret
+        return self._token_buffer.popleft()
 
     def peek(self) -> Optional[Token]:
         if not self._token_buffer:
@@ -69,7 +65,7 @@ class Tokenizer:
         return self._token_buffer[0]
 
     def push(self, token: Token):
-        self._token_buffer = [token] + self._token_buffer
+        self._token_buffer.appendleft(token)
 
     def expect(self, startswith: str) -> Token:
         try:
@@ -83,39 +79,55 @@ class Tokenizer:
 
 C = TypeVar("C", bound=visie.Constraint)
 
+GROUP_TYPES: Tuple[Type[visie.Constraint], ...] = (
+    visie.OrderedConstraint, visie.AllOfConstraint, visie.ExactlyOneConstraint, visie.AnyOfConstraint
+)
+
+_GROUPS_BY_BEGIN_DELIM: Dict[str, Type[visie.Constraint]] = {
+    constraint_type.BEGIN_DELIM: constraint_type for constraint_type in GROUP_TYPES
+}
+
+
+class _Group:
+    """A group whose closing delimiter has not yet been parsed"""
+
+    def __init__(self, constraint_type: Type[visie.Constraint], start: Optional[Token]):
+        self.constraint_type: Type[visie.Constraint] = constraint_type
+        self.start: Optional[Token] = start
+        # the top-level arguments are the only group without delimiters, and are ended only by the end of the text
+        self.until: Optional[str] = constraint_type.END_DELIM if start is not None else None
+        self.children: List[visie.Constraint] = []
+
 
 class Parser:
     def __init__(self, text: str):
         self._fulltext: str = text
         self._tokenizer: Tokenizer = Tokenizer(text)
 
-    def _parse(self, constraint_type: Type[C]) -> C:
-        start = self._tokenizer.expect(constraint_type.BEGIN_DELIM)
-        children = []
+    def _parse_arguments(self) -> List[visie.Constraint]:
+        # Groups are parsed with an explicit stack rather than by recursion, so that constraints can be nested
+        # arbitrarily deeply. The bottom of the stack holds the top-level arguments, which have no delimiters.
+        groups: List[_Group] = [_Group(visie.AnyOfConstraint, None)]
         while True:
+            group = groups[-1]
             next_token = self._tokenizer.peek()
-            if next_token is None or next_token.token.startswith(constraint_type.END_DELIM):
-                break
-            children += self._parse_arguments(until=constraint_type.END_DELIM)
-        try:
-            self._tokenizer.expect(constraint_type.END_DELIM)
-        except Exception as e:
-            raise Exception(f"{str(e)}\nwhen looking for the closing delimiter of\n{str(start)}\n")
-        return constraint_type(children)
-
-    def _parse_arguments(self, until: Optional[str] = None) -> List[visie.Constraint]:
-        children: List[visie.Constraint] = []
-        while True:
-            next_token = self._tokenizer.peek()
-            if next_token is None or next_token.token == until:
-                break
-            for constraint_type in (
-                    visie.OrderedConstraint, visie.AllOfConstraint, visie.ExactlyOneConstraint, visie.AnyOfConstraint
-            ):
-                if next_token.token == constraint_type.BEGIN_DELIM:
-                    children.append(self._parse(constraint_type))  # type: ignore
-                    break
+            if next_token is None or next_token.token == group.until:
+                if group.start is None:
+                    return group.children
+                try:
+                    self._tokenizer.expect(group.constraint_type.END_DELIM)
+                except Exception as e:
+                    raise Exception(
+                        f"{str(e)}\nwhen looking for the closing delimiter of\n{str(group.start)}\n"
+                    )
+                groups.pop()
+                groups[-1].children.append(group.constraint_type(group.children))
+                continue
+            constraint_type = _GROUPS_BY_BEGIN_DELIM.get(next_token.token)
+            if constraint_type is not None:
+                groups.append(_Group(constraint_type, self._tokenizer.pop()))
             else:
+                children = group.children
                 if next_token.token == '?':
                     if not children:
                         raise Exception(f"{str(next_token)}\nUnexpected '?' token")
@@ -126,7 +138,6 @@ class Parser:
                     children.append(visie.Wildcard())
                 else:
                     children.append(visie.DictionaryWord(self._tokenizer.pop().token))
-        return children
 
     def parse(self) -> visie.Constraint:
         """
@@ -143,3 +154,12 @@ class Parser:
             return children[0]
         else:
             return visie.AnyOfConstraint(children)
+
+
+def parse_constraints(texts: Iterable[str]) -> visie.Constraint:
+    """Parses each of `texts`, as passed on the command line, into a single constraint that matches any of them"""
+    constraints = [Parser(text).parse() for text in texts]
+    if len(constraints) == 1:
+        return constraints[0]
+    else:
+        return visie.AnyOfConstraint(constraints)
@@ -0,0 +1,253 @@
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .visie import Constraint
+
+# A leaf of a constraint: the lowercase letter that it consumes (None for a wildcard), and bounds on the number of
+# letters that a complete match of the whole constraint consumes before it and after it
+LeafSpan = Tuple[Optional[str], int, int, int, int]
+
+# for each position of a word of some length, the letters that can occur there (None for any letter)
+PositionLetters = List[Optional[FrozenSet[str]]]
+
+
+def leaf_spans(constraint: "Constraint") -> List[LeafSpan]:
+    """
+    Returns the distinct `LeafSpan`s of the leaves of `constraint`.
+
+    The bounds follow from the `min_length` and `max_length` of the siblings of each of a leaf's ancestors: the
+    children of an `OrderedConstraint` are matched one after the other, whereas those of an `AllOfConstraint` or
+    `AnyOfConstraint` can be matched in any order, so any of the siblings can come before or after the leaf.
+
+    """
+    from .visie import AnyOrderedConstraint, DictionaryWord, ExactlyOneConstraint, OrderedConstraint, Wildcard
+
+    spans: Set[LeafSpan] = set()
+    # the tree is traversed with an explicit stack, so that it can be arbitrarily deep
+    stack: List[Tuple["Constraint", int, int, int, int]] = [(constraint, 0, 0, 0, 0)]
+    while stack:
+        node, before_min, before_max, after_min, after_max = stack.pop()
+        if isinstance(node, DictionaryWord):
+            spans.add((node.word[0].lower(), before_min, before_max, after_min, after_max))
+        elif isinstance(node, Wildcard):
+            spans.add((None, before_min, before_max, after_min, after_max))
+        elif isinstance(node, ExactlyOneConstraint):
+            stack.extend((child, before_min, before_max, after_min, after_max) for child in node.children)
+        elif isinstance(node, OrderedConstraint):
+            mins = [child.min_length() for child in node.children]
+            maxs = [child.max_length() for child in node.children]
+            total_min, total_max = sum(mins), sum(maxs)
+            preceding_min = preceding_max = 0
+            for child, child_min, child_max in zip(node.children, mins, maxs):
+                stack.append((
+                    child,
+                    before_min + preceding_min,
+                    before_max + preceding_max,
+                    after_min + total_min - preceding_min - child_min,
+                    after_max + total_max - preceding_max - child_max
+                ))
+                preceding_min += child_min
+                preceding_max += child_max
+        else:
+            # the children of an `AnyOrderedConstraint` are in order, but may not all occur
+            ordered = isinstance(node, AnyOrderedConstraint)
+            maxs = [child.max_length() for child in node.children]
+            total_max = sum(maxs)
+            preceding_max = 0
+            for child, child_max in zip(node.children, maxs):
+                stack.append((
+                    child,
+                    before_min,
+                    before_max + (preceding_max if ordered else total_max - child_max),
+                    after_min,
+                    after_max + (total_max - preceding_max - child_max if ordered else total_max - child_max)
+                ))
+                preceding_max += child_max
+    return list(spans)
+
+
+def position_letters(spans: Iterable[LeafSpan], length: int) -> PositionLetters:
+    """
+    Returns the letters that can occur at each position of a word of `length` letters that is matched by the
+    constraint with the leaf `spans`. An empty set means that no word of that length can match at all.
+    """
+    letters: List[Optional[Set[str]]] = [set() for _ in range(length)]
+    for letter, before_min, before_max, after_min, after_max in spans:
+        for position in range(max(before_min, length - 1 - after_max), min(before_max, length - 1 - after_min) + 1):
+            allowed = letters[position]
+            if allowed is None:
+                continue
+            elif letter is None:
+                letters[position] = None
+            else:
+                allowed.add(letter)
+    return [None if allowed is None else frozenset(allowed) for allowed in letters]
+
+
+def _is_ascii(word: str) -> bool:
+    try:
+        word.encode("ascii")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class PositionFilter:
+    """
+    Rejects dictionary words that have a letter at a position at which the constraint cannot consume it.
+
+    This complements `prefilter.LetterFilter`, which only counts the letters of a word: a recursive acronym like
+    `<. is? a? [pleasing orange home noise expeller]>` can start with any letter, but its second letter has to be
+    one of only seven. Like the letter filter, words containing non-ASCII characters are never rejected.
+
+    """
+
+    def __init__(self, constraint: "Constraint", min_length: int, max_length: int):
+        self.spans: List[LeafSpan] = leaf_spans(constraint)
+        self.min_length: int = min_length
+        self.max_length: int = max_length
+        # The positions at which the letters are restricted, for each length. The constraint can be far longer than
+        # any dictionary word, so the checks are only computed for the lengths of the words actually seen.
+        self._checks: Dict[int, List[Tuple[int, FrozenSet[str]]]] = {}
+
+    def __bool__(self):
+        """Returns whether this filter might reject any words at all"""
+        return any(letter is not None for letter, _, _, _, _ in self.spans)
+
+    def checks(self, length: int) -> List[Tuple[int, FrozenSet[str]]]:
+        """Returns the positions of a word of `length` letters at which only some letters can occur"""
+        checks = self._checks.get(length)
+        if checks is None:
+            if self.min_length <= length <= self.max_length:
+                checks = [
+                    (position, allowed) for position, allowed in enumerate(position_letters(self.spans, length))
+                    if allowed is not None
+                ]
+            else:
+                # words of other lengths are rejected by the length filter, not this one
+                checks = []
+            self._checks[length] = checks
+        return checks
+
+    def admits(self, word: str) -> bool:
+        checks = self._checks.get(len(word))
+        if checks is None:
+            checks = self.checks(len(word))
+        if not checks or not _is_ascii(word):
+            return True
+        word = word.lower()
+        for position, allowed in checks:
+            if word[position] not in allowed:
+                return False
+        return True
+
+    def filter(self, words: Iterable[str]) -> Iterator[str]:
+        """Yields the words that could match the constraint, in order"""
+        return filter(self.admits, words)
+
+
+class PositionalIndex:
+    """
+    An index of the positions of the letters of the words of a dictionary held in memory.
+
+    The words of each length are numbered in dictionary order, and for every position of a word of that length and
+    every letter, a bitmap records the words having that letter at that position. The words that a constraint
+    could match are found by intersecting, for each position, the union of the bitmaps of the letters that the
+    constraint can consume there (see `position_letters`), without looking at any words at all. Words containing
+    non-ASCII characters are not indexed, and are always candidates.
+
+    """
+
+    def __init__(self, words: Sequence[str]):
+        self.words: Sequence[str] = words
+        self._ids: Dict[int, List[int]] = {}
+        """the ids of the ASCII words of each length, in dictionary order"""
+        self._unindexed: Dict[int, List[int]] = {}
+        """the ids of the words of each length that contain non-ASCII characters"""
+        buckets: Dict[int, List[str]] = {}
+        for word_id, word in enumerate(words):
+            if _is_ascii(word):
+                self._ids.setdefault(len(word), []).append(word_id)
+                buckets.setdefault(len(word), []).append(word.lower())
+            else:
+                self._unindexed.setdefault(len(word), []).append(word_id)
+        self._letters: Dict[Tuple[int, int, str], int] = {}
+        for length, bucket in buckets.items():
+            # the words of a bucket all have the same length, so its columns are the letters at each position
+            for position, column in enumerate(zip(*bucket)):
+                data = "".join(column).encode("ascii")
+                for letter in set(data):
+                    # the bitmap is built from the column with one pass in C, rather than one bit at a time
+                    self._letters[(length, position, chr(letter))] = int(data.translate(_digits(letter))[::-1], 2)
+
+    def __len__(self):
+        return len(self.words)
+
+    def _bucket_candidates(self, length: int, letters: PositionLetters, start: int, end: int) -> Iterator[int]:
+        ids = self._ids.get(length)
+        if not ids:
+            return
+        # ids increase within a bucket, so those in [start, end) are a contiguous range of its bits
+        first, last = bisect_left(ids, start), bisect_left(ids, end)
+        if first == last:
+            return
+        candidates = (1 << last) - (1 << first)
+        for position, allowed in enumerate(letters):
+            if allowed is None:
+                continue
+            union = 0
+            for letter in allowed:
+                union |= self._letters.get((length, position, letter), 0)
+            candidates &= union
+            if not candidates:
+                return
+        for i in _bits(candidates):
+            yield ids[i]
+
+    def candidates(
+            self, constraint: "Constraint", min_length: int, max_length: int, start: int = 0, end: Optional[int] = None
+    ) -> List[int]:
+        """
+        Returns the ids of the words, in order, that could match `constraint` and have a permissible length. Only the
+        ids in the half-open range [start, end) are returned.
+        """
+        if end is None:
+            end = len(self.words)
+        spans = leaf_spans(constraint)
+        word_ids: List[int] = []
+        longest = max(max(self._ids, default=0), max(self._unindexed, default=0))
+        for length in range(max(min_length, 1), min(max_length, longest) + 1):
+            word_ids.extend(self._bucket_candidates(length, position_letters(spans, length), start, end))
+            unindexed = self._unindexed.get(length, [])
+            word_ids.extend(unindexed[bisect_left(unindexed, start):bisect_left(unindexed, end)])
+        word_ids.sort()
+        return word_ids
+
+    def words_for(self, constraint: "Constraint", min_length: int, max_length: int) -> Iterator[str]:
+        """Yields the words, in order, that could match `constraint` and have a permissible length"""
+        for word_id in self.candidates(constraint, min_length, max_length):
+            yield self.words[word_id]
+
+
+_DIGITS: Dict[int, bytes] = {}
+
+
+def _digits(byte: int) -> bytes:
+    """Returns the translation table from each byte to the binary digit of whether it is `byte`"""
+    table = _DIGITS.get(byte)
+    if table is None:
+        digits = bytearray(b"0" * 256)
+        digits[byte] = ord("1")
+        table = _DIGITS[byte] = bytes(digits)
+    return table
+
+
+def _bits(bitmap: int) -> Iterator[int]:
+    """Yields the indexes of the set bits of `bitmap` in increasing order"""
+    # scanning the binary representation finds the set bits of a large integer in linear time
+    digits = bin(bitmap)[:1:-1]
+    i = digits.find("1")
+    while i >= 0:
+        yield i
+        i = digits.find("1", i + 1)
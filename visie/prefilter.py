@@ -0,0 +1,157 @@
+import itertools
+import re
+from string import ascii_lowercase
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .frequencies import LetterFrequencies
+    from .visie import Constraint
+
+# one column per lowercase ASCII letter, plus one for every other ASCII character
+COLUMNS = len(ascii_lowercase) + 1
+OTHER = COLUMNS - 1
+
+# the number of words whose letters are counted at a time
+BLOCK_SIZE = 1 << 14
+
+# the minimum and maximum number of times the letter of each column can occur in a word that matches a constraint
+LetterBounds = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+_NON_LETTER = re.compile(r"[^a-z]")
+
+
+def column(letter: str) -> int:
+    """Returns the column of the letter-count matrix that counts the lowercase `letter`"""
+    if "a" <= letter <= "z":
+        return ord(letter) - ord("a")
+    return OTHER
+
+
+def exactly(letter: str) -> LetterBounds:
+    """The bounds of a constraint that consumes exactly one `letter`"""
+    bounds = [0] * COLUMNS
+    bounds[column(letter)] = 1
+    return tuple(bounds), tuple(bounds)
+
+
+def at_most(count: int) -> LetterBounds:
+    """The bounds of a constraint that consumes at most `count` letters of any kind"""
+    return (0,) * COLUMNS, (count,) * COLUMNS
+
+
+def concatenation(children: Sequence["Constraint"]) -> LetterBounds:
+    """The bounds of a constraint that consumes the letters of every one of `children`"""
+    mins = [0] * COLUMNS
+    maxs = [0] * COLUMNS
+    for child in children:
+        child_mins, child_maxs = child.letter_bounds()
+        for i in range(COLUMNS):
+            mins[i] += child_mins[i]
+            maxs[i] += child_maxs[i]
+    return tuple(mins), tuple(maxs)
+
+
+def vectorized() -> bool:
+    """Returns whether `LetterFilter`s count letters with NumPy, rather than checking each word individually"""
+    return _import_numpy() is not None
+
+
+def _import_numpy():
+    # NumPy is an optional dependency that takes a noticeable fraction of a second to import, so it is only imported
+    # once a filter actually needs it
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class LetterFilter:
+    """
+    Rejects dictionary words whose letter counts fall outside of a constraint's `Constraint.letter_bounds`.
+
+    Every letter of a matching word is consumed by a single `DictionaryWord` (that starts with that letter) or
+    `Wildcard`, so a word that, e.g., contains a letter with which no constraint word starts cannot match. Checking
+    this is much cheaper than calling `Constraint.matches`. If NumPy is installed, the words are counted a block at
+    a time into a `BLOCK_SIZE`×`COLUMNS` matrix and compared against the bounds with a single vectorized
+    comparison; otherwise, each word is checked individually, stopping at the first letter whose count is out of
+    bounds. If the `frequencies` of the letters in the dictionary are known, the letters most likely to reject a
+    word are checked first. Words containing non-ASCII characters are never rejected.
+
+    """
+
+    def __init__(
+            self,
+            constraint: "Constraint",
+            max_length: int,
+            block_size: int = BLOCK_SIZE,
+            frequencies: Optional["LetterFrequencies"] = None
+    ):
+        mins, maxs = constraint.letter_bounds()
+        # only the columns that can actually reject a word of a permissible length need to be checked
+        self.checks: List[Tuple[int, int, int]] = [
+            (i, lo, hi) for i, (lo, hi) in enumerate(zip(mins, maxs)) if lo > 0 or hi < max_length
+        ]
+        self.block_size: int = block_size
+        self._letter_checks: List[Tuple[str, int, int]] = [
+            (ascii_lowercase[i], lo, hi) for i, lo, hi in self.checks if i != OTHER
+        ]
+        if frequencies is not None:
+            self._letter_checks.sort(key=lambda check: -frequencies.rejection_rate(*check))  # type: ignore
+        self._other_check: Optional[Tuple[int, int]] = next(
+            ((lo, hi) for i, lo, hi in self.checks if i == OTHER), None
+        )
+        self._numpy = _import_numpy() if self.checks else None
+        if self._numpy is not None:
+            numpy = self._numpy
+            self._table = numpy.full(256, OTHER, dtype=numpy.intp)
+            self._table[ord("a"):ord("z") + 1] = numpy.arange(OTHER)
+            self._columns = numpy.array([i for i, _, _ in self.checks], dtype=numpy.intp)
+            self._mins = numpy.array([lo for _, lo, _ in self.checks])
+            self._maxs = numpy.array([hi for _, _, hi in self.checks])
+
+    def __bool__(self):
+        """Returns whether this filter can reject any words at all"""
+        return bool(self.checks)
+
+    def admits(self, word: str) -> bool:
+        if _NON_ASCII.search(word):
+            return True
+        word = word.lower()
+        for letter, lo, hi in self._letter_checks:
+            if not lo <= word.count(letter) <= hi:
+                return False
+        if self._other_check is not None:
+            lo, hi = self._other_check
+            return lo <= len(_NON_LETTER.findall(word)) <= hi
+        return True
+
+    def _filter_block(self, words: List[str]) -> Iterator[str]:
+        try:
+            data = "".join(words).lower().encode("ascii")
+        except UnicodeEncodeError:
+            yield from filter(self.admits, words)
+            return
+        numpy = self._numpy
+        lengths = numpy.fromiter(map(len, words), dtype=numpy.intp, count=len(words))
+        rows = numpy.repeat(numpy.arange(len(words)) * COLUMNS, lengths)
+        cells = rows + self._table[numpy.frombuffer(data, dtype=numpy.uint8)]
+        counts = numpy.bincount(cells, minlength=len(words) * COLUMNS).reshape(len(words), COLUMNS)
+        counts = counts[:, self._columns]
+        admitted = ((counts >= self._mins) & (counts <= self._maxs)).all(axis=1)
+        yield from itertools.compress(words, admitted.tolist())
+
+    def filter(self, words: Iterable[str]) -> Iterator[str]:
+        """Yields the words that could match the constraint, in order"""
+        if not self.checks:
+            yield from words
+        elif self._numpy is None:
+            yield from filter(self.admits, words)
+        else:
+            words = iter(words)
+            while True:
+                block = list(itertools.islice(words, self.block_size))
+                if not block:
+                    break
+                yield from self._filter_block(block)
@@ -0,0 +1,252 @@
+from abc import ABC, abstractmethod
+import heapq
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Type
+
+from . import index, visie, wordlist
+
+VOWELS = frozenset("aeiouy")
+
+# the longest runs of consonants and of vowels that are considered easy to pronounce
+MAX_CONSONANT_RUN = 2
+MAX_VOWEL_RUN = 2
+
+
+class FrequencyList:
+    """
+    The ranks of words in a list ordered from the most to the least frequent.
+
+    Each line of the list starts with a word, which may be followed by other columns such as its count. Words are
+    compared case-insensitively, and only the first occurrence of a word is ranked.
+
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.ranks: Dict[str, int] = {}
+        for line in words:
+            fields = line.split()
+            if fields:
+                self.ranks.setdefault(fields[0].lower(), len(self.ranks))
+
+    @staticmethod
+    def load(path: str) -> "FrequencyList":
+        return FrequencyList(wordlist.iter_words(path))
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def rank(self, word: str) -> Optional[int]:
+        """Returns the zero-based rank of `word`, or None if it is not in the list"""
+        return self.ranks.get(word.lower())
+
+
+class Scorer(ABC):
+    """Scores the acronyms matching a constraint; higher scores are better"""
+
+    def __init__(self, constraint: visie.Constraint, frequency_list: Optional[FrequencyList] = None):
+        self.constraint: visie.Constraint = constraint
+        self.frequency_list: Optional[FrequencyList] = frequency_list
+
+    @abstractmethod
+    def score(self, acronym: visie.Acronym) -> float:
+        raise NotImplementedError()
+
+    def bound(self, length: int) -> Optional[float]:
+        """
+        Returns an upper bound on the score of any acronym with `length` letters, or None if there is no better
+        bound than for any other length. The search can stop early when no remaining length can beat the results.
+        """
+        return None
+
+
+class LengthScorer(Scorer):
+    """Longer acronyms are better"""
+
+    def score(self, acronym: visie.Acronym) -> float:
+        return len(acronym.name())
+
+    def bound(self, length: int) -> Optional[float]:
+        return length
+
+
+def _constraint_words(constraint: visie.Constraint) -> FrozenSet[str]:
+    words = set()
+    stack = [constraint]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, visie.DictionaryWord):
+            words.add(node.word)
+        stack.extend(node.children)
+    return frozenset(words)
+
+
+class CoverageScorer(Scorer):
+    """Acronyms that use a greater fraction of the distinct words of the constraint are better"""
+
+    def __init__(self, constraint: visie.Constraint, frequency_list: Optional[FrequencyList] = None):
+        super().__init__(constraint, frequency_list)
+        self.words: FrozenSet[str] = _constraint_words(constraint)
+
+    def score(self, acronym: visie.Acronym) -> float:
+        if not self.words:
+            return 0.0
+        return len(self.words.intersection(acronym)) / len(self.words)
+
+    def bound(self, length: int) -> Optional[float]:
+        # every word of an acronym contributes at least one of its letters
+        if not self.words:
+            return 0.0
+        return min(length, len(self.words)) / len(self.words)
+
+
+class FrequencyScorer(Scorer):
+    """Acronyms that are more frequent words are better; words that are not in the frequency list score zero"""
+
+    def __init__(self, constraint: visie.Constraint, frequency_list: Optional[FrequencyList] = None):
+        if frequency_list is None:
+            raise ValueError("Scoring by frequency requires a frequency list")
+        super().__init__(constraint, frequency_list)
+
+    def score(self, acronym: visie.Acronym) -> float:
+        rank = self.frequency_list.rank(acronym.name())  # type: ignore
+        if rank is None:
+            return 0.0
+        return 1.0 - rank / len(self.frequency_list)  # type: ignore
+
+
+class PronounceabilityScorer(Scorer):
+    """
+    Acronyms that are easier to pronounce are better.
+
+    The score is the fraction of letters that do not extend a run of consonants longer than `MAX_CONSONANT_RUN`
+    or a run of vowels longer than `MAX_VOWEL_RUN`, so it is one for most English words.
+
+    """
+
+    def score(self, acronym: visie.Acronym) -> float:
+        name = acronym.name().lower()
+        if not name:
+            return 0.0
+        awkward = 0
+        run = 0
+        previous_is_vowel: Optional[bool] = None
+        for letter in name:
+            is_vowel = letter in VOWELS
+            run = run + 1 if is_vowel == previous_is_vowel else 1
+            previous_is_vowel = is_vowel
+            if run > (MAX_VOWEL_RUN if is_vowel else MAX_CONSONANT_RUN):
+                awkward += 1
+        return 1.0 - awkward / len(name)
+
+
+SCORERS: Dict[str, Type[Scorer]] = {
+    "length": LengthScorer,
+    "coverage": CoverageScorer,
+    "frequency": FrequencyScorer,
+    "pronounceability": PronounceabilityScorer,
+}
+
+# results are ranked by score, then by length, then by the order in which they were found
+_Key = Tuple[float, int, int]
+
+
+class TopK:
+    """The best `k` scored acronyms seen so far, kept in a heap of at most `k` entries"""
+
+    def __init__(self, k: int):
+        self.k: int = k
+        self._heap: List[Tuple[_Key, visie.Acronym]] = []
+        self._found: int = 0
+
+    def is_full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    def can_improve(self, score: float, length: int) -> bool:
+        """Returns whether an acronym found later with this score and length would be among the best `k`"""
+        if not self.is_full():
+            return self.k > 0
+        worst_score, worst_length, _ = self._heap[0][0]
+        return (score, length) > (worst_score, worst_length)
+
+    def add(self, score: float, acronym: visie.Acronym):
+        # earlier results win ties, so the order in which they were found is negated
+        key = (score, len(acronym.name()), -self._found)
+        self._found += 1
+        if not self.is_full():
+            if self.k > 0:
+                heapq.heappush(self._heap, (key, acronym))
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (key, acronym))
+
+    def results(self) -> List[Tuple[float, visie.Acronym]]:
+        """Returns the (score, acronym) pairs from best to worst"""
+        return [(key[0], acronym) for key, acronym in sorted(self._heap, key=lambda entry: entry[0], reverse=True)]
+
+
+def _lengths_descending(
+        constraints: visie.Constraint, min_length: int, dict_path: str, engine: str, scorer: Scorer, best: TopK
+) -> Iterator[visie.Acronym]:
+    # the words of an index are bucketed by length, so each length can be searched separately, longest first
+    min_length, max_length = visie._length_bounds(constraints, min_length, None)
+    with index.DictionaryIndex(dict_path) as dictionary:
+        max_length = min(max_length, dictionary.max_length)
+    for length in range(max_length, min_length - 1, -1):
+        bound = scorer.bound(length)
+        if bound is not None and not best.can_improve(bound, length):
+            # acronyms only get shorter from here on
+            return
+        yield from visie.generate(
+            constraints, min_length=length, dict_path=dict_path, engine=engine, max_length=length
+        )
+
+
+def _single_pass(
+        constraints: visie.Constraint,
+        min_length: int,
+        use_variants: bool,
+        dict_path: str,
+        engine: str,
+        scorer: Scorer,
+        best: TopK
+) -> Iterator[visie.Acronym]:
+    min_length, max_length = visie._length_bounds(constraints, min_length, None)
+    words = visie._dictionary_words(dict_path, min_length, max_length, use_variants)
+    if not use_variants:
+        # without variants, a word's acronyms are exactly as long as it is, so words that cannot beat the current
+        # results are skipped without matching them
+        words = (word for word in words if _can_improve(scorer, best, len(word)))
+    yield from visie._deduplicate(visie._word_matches(constraints, words, min_length, max_length, use_variants, engine))
+
+
+def _can_improve(scorer: Scorer, best: TopK, length: int) -> bool:
+    bound = scorer.bound(length)
+    return bound is None or best.can_improve(bound, length)
+
+
+def top(
+        constraints: visie.Constraint,
+        k: int,
+        scorer: Scorer,
+        min_length: int = 3,
+        use_variants: bool = False,
+        dict_path: str = visie.DICT_PATH,
+        engine: str = "recursive"
+) -> List[Tuple[float, visie.Acronym]]:
+    """
+    Returns the `k` best (score, acronym) pairs of the acronyms that `visie.generate` would yield, from best to worst.
+
+    Ties are broken in favor of longer acronyms, then of those found first. Only `k` acronyms are kept in memory. If
+    the scorer bounds the scores of acronyms by their length, words that cannot beat the current results are not
+    matched at all, and when the dictionary is an index, its longest words are searched first so that the search
+    can stop as soon as no shorter acronym can beat the results.
+
+    """
+    best = TopK(k)
+    if k <= 0:
+        return best.results()
+    if not use_variants and scorer.bound(constraints.max_length()) is not None and index.is_index(dict_path):
+        acronyms = _lengths_descending(constraints, min_length, dict_path, engine, scorer, best)
+    else:
+        acronyms = _single_pass(constraints, min_length, use_variants, dict_path, engine, scorer, best)
+    for acronym in acronyms:
+        best.add(scorer.score(acronym), acronym)
+    return best.results()
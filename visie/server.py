@@ -0,0 +1,285 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from . import optimizer, parser, positional, visie, wordlist
+from .parallel import SHARDS_PER_JOB
+
+if hasattr(os, "getuid"):
+    DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), f"visie-{os.getuid()}.sock")
+else:
+    DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "visie.sock")
+
+LOCALHOST = "127.0.0.1"
+
+# the words of the dictionary, loaded once by each worker process
+_resident: Dict[str, Any] = {}
+
+SearchResults = List[Tuple[str, List[Tuple[str, ...]]]]
+
+
+class ServerException(Exception):
+    pass
+
+
+def _load_words(dict_path: str):
+    # interrupting the server shuts down its workers, so they should not also be interrupted themselves
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _resident["words"] = list(wordlist.iter_words(dict_path))
+    _resident["positions"] = positional.PositionalIndex(_resident["words"])
+
+
+def _search(constraints: visie.Constraint, min_length: int, use_variants: bool, start: int, end: int) -> SearchResults:
+    min_length, max_length = visie._length_bounds(constraints, min_length, None)
+    min_word_length, max_word_length = visie._word_length_bounds(min_length, max_length, use_variants)
+    if use_variants:
+        words: Iterable[str] = (
+            word for word in _resident["words"][start:end] if min_word_length <= len(word) <= max_word_length
+        )
+    else:
+        # only the words of the shard with letters at positions at which the constraint can consume them are matched
+        words = (
+            _resident["words"][word_id]
+            for word_id in _resident["positions"].candidates(constraints, min_word_length, max_word_length, start, end)
+        )
+    results: SearchResults = []
+    for word, matches in visie._word_matches(constraints, words, min_length, max_length, use_variants, "recursive"):
+        match_words = [tuple(match) for match in matches]
+        if match_words:
+            results.append((word, match_words))
+    return results
+
+
+class _Dictionary:
+    """A snapshot of the word list, held in memory by a pool of worker processes"""
+
+    def __init__(self, dict_path: str, jobs: int):
+        self.signature: Tuple[int, int] = wordlist.signature(dict_path)
+        self.num_words: int = sum(1 for _ in wordlist.iter_words(dict_path))
+        self.jobs: int = jobs
+        # Workers are spawned rather than forked, since forking from the event loop would leak the file descriptors of
+        # any open connections into the workers, preventing those connections from ever being closed
+        self.pool = multiprocessing.get_context("spawn").Pool(jobs, initializer=_load_words, initargs=(dict_path,))
+
+    def shards(self) -> List[Tuple[int, int]]:
+        count = self.jobs * SHARDS_PER_JOB
+        step = max((self.num_words + count - 1) // count, 1)
+        return [(start, min(start + step, self.num_words)) for start in range(0, self.num_words, step)]
+
+    def search(self, *args) -> "asyncio.Future[SearchResults]":
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def set_result(result):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(result))
+
+        def set_exception(e):
+            # the error is reported to the client rather than dropping its connection
+            error = ServerException(f"The search failed: {e}")
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_exception(error))
+
+        self.pool.apply_async(_search, args, callback=set_result, error_callback=set_exception)
+        return future
+
+    def close(self):
+        """Shuts down the workers once the queries that are still running on this snapshot finish"""
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        self.pool.terminate()
+
+
+class QueryServer:
+    """
+    Answers constraint queries over a socket, keeping the dictionary resident in a pool of worker processes.
+
+    The protocol is JSON lines. Each request is an object with a list of `constraints`, in the syntax of
+    `parser.Parser`, and optionally `min_length` and `use_variants`. The matches are streamed back in dictionary
+    order as objects with the acronym's `name` and `words`, followed by `{"done": true}`, or by an object with an
+    `error` message. The word list is reloaded whenever it changes on disk (see `dictionary`).
+
+    """
+
+    def __init__(self, dict_path: str = visie.DICT_PATH, jobs: Optional[int] = None):
+        if dict_path == wordlist.STDIN:
+            raise ServerException("The server cannot read its dictionary from STDIN")
+        self.dict_path: str = dict_path
+        self.jobs: int = jobs or os.cpu_count() or 1
+        self._dictionary: _Dictionary = _Dictionary(dict_path, self.jobs)
+        self._reload: Optional["asyncio.Future[None]"] = None
+
+    async def dictionary(self) -> _Dictionary:
+        """
+        Returns the current snapshot of the word list, reloading it first if it has changed. The current snapshot is
+        kept if the word list cannot be read.
+
+        The new snapshot is loaded in a thread, so other connections are still served in the meantime; queries that
+        arrive during the reload wait for it. The workers of the old snapshot are shut down in the background, once
+        the queries still running on it finish.
+
+        """
+        if self._reload is None:
+            try:
+                changed = wordlist.signature(self.dict_path) != self._dictionary.signature
+            except OSError:
+                # the word list is missing for a moment while it is atomically replaced
+                changed = False
+            if changed:
+                self._reload = asyncio.ensure_future(self._load())
+        if self._reload is not None:
+            # a query that is cancelled while waiting must not cancel the reload for the others
+            await asyncio.shield(self._reload)
+        return self._dictionary
+
+    async def _load(self):
+        loop = asyncio.get_event_loop()
+        try:
+            try:
+                dictionary = await loop.run_in_executor(None, _Dictionary, self.dict_path, self.jobs)
+            except OSError:
+                return
+            old_dictionary, self._dictionary = self._dictionary, dictionary
+        finally:
+            self._reload = None
+        loop.run_in_executor(None, old_dictionary.close)
+
+    async def _query(self, request: Dict[str, Any], writer: asyncio.StreamWriter):
+        texts = request.get("constraints")
+        if isinstance(texts, str):
+            texts = [texts]
+        if not texts or not all(isinstance(text, str) for text in texts):
+            raise ServerException("A request must have a non-empty list of `constraints`")
+        try:
+            constraints = optimizer.optimize(parser.parse_constraints(texts))
+        except Exception as e:
+            raise ServerException(str(e))
+        min_length = request.get("min_length", 3)
+        if not isinstance(min_length, int) or isinstance(min_length, bool):
+            raise ServerException("`min_length` must be an integer")
+        use_variants = request.get("use_variants", False)
+        if not isinstance(use_variants, bool):
+            raise ServerException("`use_variants` must be a boolean")
+        dictionary = await self.dictionary()
+        # all of the shards are queued at once, but their results are streamed back in order
+        searches = [
+            dictionary.search(constraints, min_length, use_variants, start, end) for start, end in dictionary.shards()
+        ]
+        yielded: Set[str] = set()
+        try:
+            for search in searches:
+                for word, matches in await search:
+                    if word.upper() in yielded:
+                        continue
+                    for words in matches:
+                        acronym = visie.Acronym(*words)
+                        yielded.add(acronym.name())
+                        _write(writer, {"name": acronym.name(), "words": words})
+                    await writer.drain()
+        finally:
+            for search in searches:
+                search.cancel()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ServerException("Each request must be a JSON object")
+                    await self._query(request, writer)
+                    _write(writer, {"done": True})
+                except (ServerException, ValueError) as e:
+                    _write(writer, {"error": str(e)})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, socket_path: Optional[str] = None, port: Optional[int] = None):
+        """Starts listening on the Unix socket at `socket_path`, or on localhost TCP `port` if one is given"""
+        if port is not None:
+            return await asyncio.start_server(self.handle, LOCALHOST, port)
+        if socket_path is None:
+            socket_path = DEFAULT_SOCKET_PATH
+        if os.path.exists(socket_path):
+            try:
+                with _connect(socket_path, None):
+                    raise ServerException(f"A server is already listening on {socket_path}")
+            except ConnectionError:
+                # the socket was left behind by a server that is no longer running
+                os.unlink(socket_path)
+        return await asyncio.start_unix_server(self.handle, socket_path)
+
+    def close(self):
+        self._dictionary.terminate()
+
+
+def _write(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def serve(
+        dict_path: str = visie.DICT_PATH,
+        socket_path: Optional[str] = None,
+        port: Optional[int] = None,
+        jobs: Optional[int] = None
+):
+    """Runs a `QueryServer` until it is interrupted"""
+    query_server = QueryServer(dict_path, jobs)
+    loop = asyncio.new_event_loop()
+    server = None
+    try:
+        server = loop.run_until_complete(query_server.start(socket_path, port))
+        loop.run_forever()
+    finally:
+        if server is not None:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            if port is None:
+                os.unlink(socket_path or DEFAULT_SOCKET_PATH)
+        query_server.close()
+        loop.close()
+
+
+def _connect(socket_path: Optional[str], port: Optional[int]) -> socket.socket:
+    if port is not None:
+        return socket.create_connection((LOCALHOST, port))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path or DEFAULT_SOCKET_PATH)
+    except (ConnectionError, FileNotFoundError) as e:
+        sock.close()
+        raise ConnectionRefusedError(str(e))
+    return sock
+
+
+def query(
+        constraints: Iterable[str],
+        min_length: int = 3,
+        use_variants: bool = False,
+        socket_path: Optional[str] = None,
+        port: Optional[int] = None
+) -> Iterator[visie.Acronym]:
+    """Sends a query to a running `QueryServer` and yields the matching acronyms as they are received"""
+    request = {"constraints": list(constraints), "min_length": min_length, "use_variants": use_variants}
+    with _connect(socket_path, port) as sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode("utf-8") + b"\n")
+        stream.flush()
+        for line in stream:
+            response = json.loads(line)
+            if "error" in response:
+                raise ServerException(response["error"])
+            elif response.get("done"):
+                return
+            yield visie.Acronym(*response["words"])
+    raise ServerException("The server closed the connection before the query finished")
@@ -0,0 +1,215 @@
+from contextlib import contextmanager
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, TYPE_CHECKING
+
+from .dedupe import format_bytes
+
+if TYPE_CHECKING:
+    from .visie import Acronym, Constraint
+
+
+class NodeStats:
+    """Counts of the calls to a single constraint's `match` method"""
+
+    __slots__ = ("constraint", "children", "calls", "matches", "partials", "backtracks")
+
+    def __init__(self, constraint: "Constraint", children: List["NodeStats"]):
+        self.constraint: "Constraint" = constraint
+        self.children: List[NodeStats] = children
+        self.calls: int = 0
+        """the number of times the constraint was matched against a word or a remainder of one"""
+        self.matches: int = 0
+        """the number of complete matches produced"""
+        self.partials: int = 0
+        """the number of partial matches produced, i.e., those leaving a remainder for the next constraint"""
+        self.backtracks: int = 0
+        """the number of calls that produced no matches at all"""
+
+    def label(self) -> str:
+        from .visie import DictionaryWord, Wildcard
+
+        if isinstance(self.constraint, DictionaryWord):
+            return str(self.constraint)
+        elif isinstance(self.constraint, Wildcard):
+            return "."
+        return type(self.constraint).__name__
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "constraint": self.label(),
+            "calls": self.calls,
+            "matches": self.matches,
+            "partials": self.partials,
+            "backtracks": self.backtracks,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+def _instrumented(match, node: NodeStats):
+    def instrumented_match(word: str) -> Iterator["Acronym"]:
+        node.calls += 1
+        produced = False
+        for acronym in match(word):
+            produced = True
+            if acronym:
+                node.matches += 1
+            else:
+                node.partials += 1
+            yield acronym
+        if not produced:
+            node.backtracks += 1
+
+    return instrumented_match
+
+
+class SearchStats:
+    """
+    Statistics about a single search of the dictionary, collected by passing an instance to `visie.generate`.
+
+    Collecting statistics wraps the `match` method of every node of the constraint tree, and every stage of the
+    dictionary pipeline, for the duration of the search. None of this happens unless statistics are requested, so
+    it costs nothing otherwise.
+
+    """
+
+    def __init__(self):
+        self.words_read: int = 0
+        """the number of lines read from the dictionary, before any filtering (for an index, all of its words)"""
+        self.words_of_length: int = 0
+        """the number of words that passed the length filter"""
+        self.words_of_letters: int = 0
+        """the number of words that passed the letter-count prefilter"""
+        self.words_of_positions: int = 0
+        """the number of words that passed the letter-position prefilter"""
+        self.words_matched: int = 0
+        """the number of words that matched the constraint"""
+        self.duplicates: int = 0
+        """the number of matching words that were suppressed because they had already been yielded"""
+        self.dedupe_mode: str = "exact"
+        """how the yielded acronyms were remembered"""
+        self.dedupe_entries: int = 0
+        """the number of acronyms remembered for deduplication, if measured"""
+        self.dedupe_bytes: int = 0
+        """the memory used for deduplication, if measured; for external deduplication, the peak memory buffered"""
+        self.load_seconds: float = 0.0
+        self.total_seconds: float = 0.0
+        self.root: Optional[NodeStats] = None
+
+    @property
+    def match_seconds(self) -> float:
+        return max(self.total_seconds - self.load_seconds, 0.0)
+
+    def _node(self, constraint: "Constraint") -> NodeStats:
+        return NodeStats(constraint, [self._node(child) for child in constraint.children])
+
+    @contextmanager
+    def instrument(self, constraint: "Constraint"):
+        """Counts the calls to the `match` method of every node of `constraint` while the context is active"""
+        self.root = self._node(constraint)
+        stack = [self.root]
+        nodes: List[NodeStats] = []
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(node.children)
+        for node in nodes:
+            # shadowing the method with an instance attribute affects only this tree, and is trivially undone
+            node.constraint.match = _instrumented(node.constraint.match, node)  # type: ignore
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds += time.perf_counter() - start
+            for node in nodes:
+                if "match" in vars(node.constraint):
+                    del node.constraint.match  # type: ignore
+
+    def lines_read(self, count: int):
+        """Counts lines read from the dictionary; passed to `wordlist.iter_words`"""
+        self.words_read += count
+
+    def load(self, words: Iterable[str]) -> Iterator[str]:
+        """Counts the time spent reading the words of the dictionary"""
+        words = iter(words)
+        while True:
+            start = time.perf_counter()
+            try:
+                word = next(words)
+            except StopIteration:
+                self.load_seconds += time.perf_counter() - start
+                return
+            self.load_seconds += time.perf_counter() - start
+            yield word
+
+    def count(self, words: Iterable[str], *counters: str) -> Iterator[str]:
+        """Passes `words` through, adding the number of them to each of the attributes named `counters`"""
+        count = 0
+        try:
+            for word in words:
+                count += 1
+                yield word
+        finally:
+            for counter in counters:
+                setattr(self, counter, getattr(self, counter) + count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "words": {
+                "read": self.words_read,
+                "dropped_by_length": self.words_read - self.words_of_length,
+                "dropped_by_letters": self.words_of_length - self.words_of_letters,
+                "dropped_by_positions": self.words_of_letters - self.words_of_positions,
+                "matched": self.words_matched,
+                "duplicates": self.duplicates,
+            },
+            "dedupe": {
+                "mode": self.dedupe_mode,
+                "entries": self.dedupe_entries,
+                "bytes": self.dedupe_bytes,
+            },
+            "seconds": {
+                "load": self.load_seconds,
+                "match": self.match_seconds,
+                "total": self.total_seconds,
+            },
+            "constraints": None if self.root is None else self.root.to_dict(),
+        }
+
+    def report(self, stream: TextIO):
+        """Writes a human-readable report of the statistics, including the tree of constraints, to `stream`"""
+        stats = self.to_dict()
+        words = stats["words"]
+        seconds = stats["seconds"]
+        dedupe = stats["dedupe"]
+        stream.write(
+            f"Dictionary words read:              {words['read']}\n"
+            f"    dropped by the length filter:   {words['dropped_by_length']}\n"
+            f"    dropped by the letter filter:   {words['dropped_by_letters']}\n"
+            f"    dropped by the position filter: {words['dropped_by_positions']}\n"
+            f"    matched:                        {words['matched']}\n"
+            f"    suppressed as duplicates:       {words['duplicates']}\n"
+            f"Deduplication memory:               {format_bytes(dedupe['bytes'])} for {dedupe['entries']} entries "
+            f"({dedupe['mode']})\n"
+            f"Time loading the dictionary:        {seconds['load']:.3f}s\n"
+            f"Time matching:                      {seconds['match']:.3f}s\n"
+        )
+        if self.root is None:
+            return
+        stream.write("Constraint evaluation (calls / complete matches / partial matches / backtracks):\n")
+        lines = []
+        stack = [(self.root, "", "")]
+        while stack:
+            node, prefix, child_prefix = stack.pop()
+            lines.append((f"{prefix}{node.label()}", node))
+            children = node.children
+            for i, child in reversed(list(enumerate(children))):
+                if i == len(children) - 1:
+                    stack.append((child, f"{child_prefix}└── ", f"{child_prefix}    "))
+                else:
+                    stack.append((child, f"{child_prefix}├── ", f"{child_prefix}│   "))
+        width = max(len(label) for label, _ in lines)
+        for label, node in lines:
+            stream.write(
+                f"    {label:<{width}}  {node.calls:>10} / {node.matches:>8} / {node.partials:>10} / "
+                f"{node.backtracks:>10}\n"
+            )
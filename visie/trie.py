@@ -0,0 +1,67 @@
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, TYPE_CHECKING
+
+from .automaton import Automaton
+
+if TYPE_CHECKING:
+    from .visie import Acronym, Constraint
+
+# the key under which a trie node stores the words that end at that node; no letter lowercases to the empty string
+TERMINAL = ""
+
+
+class Trie:
+    """
+    A prefix tree of dictionary words.
+
+    Words are keyed by their lowercased letters, since that is how constraints compare them. Each word is stored
+    together with its ordinal in the order in which it was added, so that search results can be put back into
+    dictionary order.
+
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._root: Dict[str, Any] = {}
+        self._size: int = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        node = self._root
+        for c in word:
+            letter = c.lower()
+            child = node.get(letter)
+            if child is None:
+                child = node[letter] = {}
+            node = child
+        node.setdefault(TERMINAL, []).append((self._size, word))
+        self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def search(self, constraint: "Constraint") -> Iterator[Tuple[int, str]]:
+        """
+        Yields the (ordinal, word) pairs of all words that fully match `constraint`.
+
+        The trie is descended together with the constraint's `Automaton`, so any subtree whose prefix cannot be
+        produced by the constraint is never visited.
+
+        """
+        automaton = Automaton(constraint)
+        stack: List[Tuple[Dict[str, Any], int]] = [(self._root, automaton.initial)]
+        while stack:
+            node, state = stack.pop()
+            for letter, child in node.items():
+                if letter == TERMINAL:
+                    if automaton.is_accepting(state):
+                        yield from child
+                    continue
+                next_state = automaton.step(state, letter)
+                if next_state != Automaton.DEAD:
+                    stack.append((child, next_state))
+
+
+def trie_matches(constraint: "Constraint", words: Iterable[str]) -> Iterator[Tuple[str, Iterable["Acronym"]]]:
+    """Loads `words` into a `Trie` and yields the words that match `constraint`, in their original order"""
+    for _, word in sorted(Trie(words).search(constraint)):
+        yield word, constraint.matches(word)
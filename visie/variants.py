@@ -1,5 +1,7 @@
 import itertools
-from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from .automaton import Automaton
 
 VARIATION_MAPPING: Dict[str, Tuple[str, ...]] = {
     'c': ('k',),
@@ -24,11 +26,17 @@ VARIATION_MAPPING: Dict[str, Tuple[str, ...]] = {
 T = TypeVar("T", bound=Hashable)
 
 
-def unique_everseen(iterable: Iterable[T], key: Optional[Callable[[T], Hashable]] = None) -> Iterator[T]:
-    """List unique elements, preserving order. Remember all elements ever seen."""
+def unique_everseen(
+        iterable: Iterable[T], key: Optional[Callable[[T], Hashable]] = None, seen: Optional[Any] = None
+) -> Iterator[T]:
+    """
+    List unique elements, preserving order. Remember all elements ever seen, in `seen` if provided, which can be
+    any object with `add` and `__contains__` methods, such as a `dedupe.SeenSet`.
+    """
     # unique_everseen('AAAABBBCCDAABBB') --> A B C D
     # unique_everseen('ABBCcAD', str.lower) --> A B C D
-    seen: Set[Hashable] = set()
+    if seen is None:
+        seen = set()
     seen_add: Callable[[Hashable], None] = seen.add
     if key is None:
         for element in itertools.filterfalse(seen.__contains__, iterable):
@@ -42,10 +50,14 @@ def unique_everseen(iterable: Iterable[T], key: Optional[Callable[[T], Hashable]
                 yield element
 
 
-def generate_variants(word: str) -> Iterator[str]:
-    word = word.strip().lower()
-    if not word:
-        return
+def _variations(word: str) -> List[Tuple[str, ...]]:
+    """
+    Returns the alternatives for each successive part of a variant of `word`.
+
+    Every variant is the product of these alternatives: the word itself, followed by one respelling of each of its
+    one- or two-letter units.
+
+    """
     variations: List[Tuple[str, ...]] = [(word,)]
     skip = False
     for c, next_c in zip(word, word[1:] + ' '):
@@ -60,5 +72,74 @@ def generate_variants(word: str) -> Iterator[str]:
             variations.append(VARIATION_MAPPING[c])
         else:
             variations.append((c,))
+    return variations
+
+
+def generate_variants(word: str) -> Iterator[str]:
+    word = word.strip().lower()
+    if not word:
+        return
+    yield from unique_everseen(("".join(s) for s in itertools.product(*_variations(word))))
+
+
+def matching_variants(
+        word: str,
+        automaton: Automaton,
+        min_length: int = 0,
+        max_length: Optional[int] = None,
+        seen: Optional[Any] = None
+) -> Iterator[str]:
+    """
+    Yields the variants of `word` that `automaton` accepts and whose lengths are within the given bounds.
+
+    This yields exactly the same variants in the same order as filtering `generate_variants`, but the variants are
+    never expanded: the automaton consumes each alternative spelling as the variations are walked, so a branch is
+    abandoned as soon as its prefix cannot match. Branches that yield nothing are memoized by their position, length,
+    and automaton state, so they are never walked twice. The variants already yielded are remembered in `seen`, as
+    for `unique_everseen`.
+
+    """
+    word = word.strip().lower()
+    if not word:
+        return
+    variations = _variations(word)
+    # the minimum and maximum lengths of the remainder of a variant after each variation
+    min_remaining: List[int] = [0] * (len(variations) + 1)
+    max_remaining: List[int] = [0] * (len(variations) + 1)
+    for i in range(len(variations) - 1, -1, -1):
+        min_remaining[i] = min_remaining[i + 1] + min(map(len, variations[i]))
+        max_remaining[i] = max_remaining[i + 1] + max(map(len, variations[i]))
+    if max_length is None:
+        max_length = max_remaining[0]
+
+    dead_ends: Set[Tuple[int, int, int]] = set()
+    parts: List[str] = []
+
+    def walk(i: int, state: int, length: int) -> Iterator[str]:
+        if i == len(variations):
+            if min_length <= length and automaton.is_accepting(state):
+                yield "".join(parts)
+            return
+        elif (i, state, length) in dead_ends:
+            return
+        found = False
+        for alternative in variations[i]:
+            alternative_length = length + len(alternative)
+            if alternative_length + min_remaining[i + 1] > max_length \
+                    or alternative_length + max_remaining[i + 1] < min_length:
+                continue
+            next_state = state
+            for letter in alternative:
+                next_state = automaton.step(next_state, letter)
+                if next_state == automaton.DEAD:
+                    break
+            else:
+                parts.append(alternative)
+                for variant in walk(i + 1, next_state, alternative_length):
+                    found = True
+                    yield variant
+                parts.pop()
+        if not found:
+            dead_ends.add((i, state, length))
 
-    yield from unique_everseen(("".join(s) for s in itertools.product(*variations)))
+    yield from unique_everseen(walk(0, automaton.initial, 0), seen=seen)
@@ -1,36 +1,80 @@
 from abc import ABC, abstractmethod
 import itertools
 import os
-from typing import FrozenSet, Iterable, Iterator, Optional, Set, Tuple
+import sys
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
-from . import variants
+from . import automaton, dedupe, frequencies, positional, prefilter, stats, trie, variants, wordlist
+from .budget import SearchBudget
 
 DICT_PATH = os.path.join(os.path.sep, 'usr', 'share', 'dict', 'words')
 
 
 class Acronym:
+    """
+    A sequence of matched words, and the remainder of the dictionary word that has not yet been matched.
+
+    Acronyms are immutable and persistent: concatenating two of them is constant time, since the result just
+    references both of its operands. The words are only flattened into a tuple when they are actually needed,
+    e.g., when a match is yielded to the user.
+
+    """
+
+    __slots__ = ("_left", "_right", "_matches", "_remainder", "_name")
+
     def __init__(self, *matches: str, remainder: Optional[str] = None):
-        self._matches: Tuple[str, ...] = matches
+        self._left: Optional[Acronym] = None
+        self._right: Optional[Acronym] = None
+        self._matches: Optional[Tuple[str, ...]] = matches
         self._remainder: Optional[str] = remainder
+        self._name: Optional[str] = None
 
     @property
     def remainder(self) -> Optional[str]:
         return self._remainder
 
+    def _flatten(self) -> Tuple[str, ...]:
+        if self._matches is None:
+            words: List[str] = []
+            stack: List[Acronym] = [self]
+            while stack:
+                acronym = stack.pop()
+                if acronym._matches is not None:
+                    words.extend(acronym._matches)
+                else:
+                    stack.append(acronym._right)  # type: ignore
+                    stack.append(acronym._left)  # type: ignore
+            self._matches = tuple(words)
+            self._left = self._right = None
+        return self._matches
+
     def name(self) -> str:
-        return "".join(map(lambda w: w[0].upper(), self))
+        if self._name is None:
+            self._name = "".join(map(lambda w: w[0].upper(), self))
+        return self._name
 
     def is_partial(self) -> bool:
         return bool(self._remainder)
 
     def __add__(self, acronym: "Acronym") -> "Acronym":
-        return Acronym(*(self._matches + acronym._matches), remainder=acronym.remainder)
+        if self._matches == ():
+            # the concatenation has the same words and remainder as `acronym`, and acronyms are immutable
+            return acronym
+        ret = Acronym.__new__(Acronym)
+        if acronym._matches == ():
+            # optional constraints produce empty matches, so avoid an extra level of indirection
+            ret._left, ret._right, ret._matches = self._left, self._right, self._matches
+        else:
+            ret._left, ret._right, ret._matches = self, acronym, None
+        ret._remainder = acronym._remainder
+        ret._name = None
+        return ret
 
     def __bool__(self):
         return not self.is_partial()
 
     def __iter__(self) -> Iterator[str]:
-        return iter(self._matches)
+        return iter(self._flatten())
 
     def __str__(self):
         words = ' '.join(map(str, self))
@@ -40,10 +84,81 @@ class Acronym:
             return words
 
     def __repr__(self):
-        ret = repr(self._matches)
+        ret = repr(self._flatten())
         if self._remainder:
             ret = f"{ret}, remainder={self.remainder!r}"
-        return f"{type(self).__name__}({ret})"        
+        return f"{type(self).__name__}({ret})"
+
+
+Frame = Tuple["Constraint", Any]
+Stack = Tuple[Frame, ...]
+
+# the initials are used to skip the children that cannot match a remainder without calling them
+ChildBits = Tuple[Tuple[int, int, Optional[FrozenSet[str]]], ...]
+
+# the number of matches of a constraint that leave each remainder of a word, keyed by the offset at which it starts
+Counts = Dict[int, int]
+
+
+class MatchState:
+    """
+    The state of matching a constraint against a word one letter at a time.
+
+    A state is the set of leaf constraints (`DictionaryWord`s and `Wildcard`s) that could consume the next letter,
+    each with the stack of its enclosing constraints, plus whether the letters consumed so far are a full match.
+    Stepping through a word this way accepts exactly the words for which `Constraint.matches` is non-empty, but
+    allows a search to be abandoned as soon as a prefix cannot be produced by the constraint.
+    """
+
+    __slots__ = ("leaves", "accepting")
+
+    def __init__(self, leaves: FrozenSet[Tuple[Stack, "Constraint"]] = frozenset(), accepting: bool = False):
+        self.leaves: FrozenSet[Tuple[Stack, Constraint]] = leaves
+        self.accepting: bool = accepting
+
+    def is_dead(self) -> bool:
+        """Returns whether this state cannot consume any more letters"""
+        return not self.leaves
+
+    def step(self, letter: str) -> "MatchState":
+        """Consumes the next letter of the word. The letter must already be lowercase."""
+        closure = _Closure()
+        for stack, leaf in self.leaves:
+            if leaf._consumes(letter):
+                _finish(stack, closure)
+        return closure.state()
+
+    def __eq__(self, other):
+        return isinstance(other, MatchState) and self.accepting == other.accepting and self.leaves == other.leaves
+
+    def __hash__(self):
+        return hash((self.leaves, self.accepting))
+
+
+class _Closure:
+    def __init__(self):
+        self.leaves: Set[Tuple[Stack, Constraint]] = set()
+        self.accepting: bool = False
+
+    def state(self) -> MatchState:
+        return MatchState(frozenset(self.leaves), self.accepting)
+
+
+def _finish(stack: Stack, closure: _Closure, needs_more: bool = False, end_required: bool = False):
+    """
+    Called when the constraint whose ancestors are on `stack` has finished consuming letters.
+
+    `needs_more` is set when a constraint was started since the last letter was consumed, which is only valid if
+    the word has more letters. `end_required` is set when a constraint finished that only matches at the end of a
+    word (`AnyOfConstraint` never produces partial matches).
+
+    """
+    if not stack:
+        if not needs_more:
+            closure.accepting = True
+        return
+    parent, data = stack[-1]
+    parent._resume(data, stack[:-1], closure, needs_more, end_required)
 
 
 class Constraint(ABC):
@@ -52,6 +167,11 @@ class Constraint(ABC):
 
     def __init__(self, children: Iterable["Constraint"] = ()):
         self._children: Tuple[Constraint, ...] = tuple(children)
+        self._initials: Optional[FrozenSet[str]] = None
+        self._initials_known: bool = False
+        self._bits: Optional[ChildBits] = None
+        self._lengths: Optional[int] = None
+        self._shortest: int = 0
 
     @property
     def children(self) -> Tuple["Constraint", ...]:
@@ -69,9 +189,105 @@ class Constraint(ABC):
     def max_length(self) -> int:
         raise NotImplementedError()
 
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        """Returns bounds on the number of times each letter can occur in a word that this constraint matches"""
+        return prefilter.at_most(self.max_length())
+
+    def nullable(self) -> bool:
+        """Returns whether a match of this constraint against a non-empty word can consume no letters of it"""
+        return self.min_length() == 0
+
+    def initials(self) -> Optional[FrozenSet[str]]:
+        """
+        Returns the lowercase letters with which a word must start for this constraint to match any of it, or None
+        if the constraint can match a word starting with any letter, or can match none of the word at all
+        """
+        if not self._initials_known:
+            self._initials = None if self.nullable() else _first_letters(self)
+            self._initials_known = True
+        return self._initials
+
+    def lengths(self) -> int:
+        """
+        Returns a bitset of the numbers of letters that a match of this constraint can consume: bit `k` is set if a
+        match can consume exactly `k` letters. Unlike `min_length` and `max_length`, this accounts for lengths in
+        between that cannot occur, e.g., `{orange <home noise>}` can consume one, two, or three letters, but
+        `<orange [home noise]>` can only consume three.
+        """
+        if self._lengths is None:
+            self._lengths = self._length_set()
+            lowest = self._lengths & -self._lengths
+            # a constraint that cannot match at all needs more letters than any word has
+            self._shortest = lowest.bit_length() - 1 if lowest else sys.maxsize
+        return self._lengths
+
+    def shortest(self) -> int:
+        """Returns the fewest letters that a match of this constraint can consume, according to `lengths`"""
+        self.lengths()
+        return self._shortest
+
+    def _length_set(self) -> int:
+        return ((1 << (self.max_length() + 1)) - 1) & ~((1 << self.min_length()) - 1)
+
+    def mandatory_children(self) -> FrozenSet[int]:
+        """Returns the indexes of the children that consume at least one letter of every match of this constraint"""
+        return frozenset()
+
+    def _child_bits(self) -> "ChildBits":
+        """Returns the index, bitmask bit, and initials of each child, for matching subsets of the children"""
+        if self._bits is None:
+            self._bits = tuple((i, 1 << i, child.initials()) for i, child in enumerate(self.children))
+        return self._bits
+
     def matches(self, word: str) -> Iterator[Acronym]:
         return filter(lambda m: bool(m), self.match(word))
 
+    def count(self, word: str) -> int:
+        """
+        Returns the number of acronyms that `matches(word)` would yield, without building any of them.
+
+        The matches of every constraint that start at each offset of the word are counted once, by the offset at
+        which they stop, and combined by dynamic programming; the matches of the subsets of the children of an
+        `AllOfConstraint` or `AnyOfConstraint` are likewise counted once per offset and subset.
+
+        """
+        if not word:
+            return 0
+        return self._count(0, _CountMemo(word)).get(len(word), 0)
+
+    def _count(self, start: int, memo: "_CountMemo") -> Counts:
+        key = (id(self), start)
+        counts = memo.counts.get(key)
+        if counts is None:
+            counts = memo.counts[key] = self._counts(start, memo)
+        return counts
+
+    def _counts(self, start: int, memo: "_CountMemo") -> Counts:
+        """Counts the matches of this constraint against the remainder of the word starting at offset `start`"""
+        # constraints that do not know how to count their matches without building them count what they build
+        counts: Counts = {}
+        for match in self.match(memo.word[start:]):
+            end = memo.length - len(match.remainder or "")
+            counts[end] = counts.get(end, 0) + 1
+        return counts
+
+    def initial_state(self) -> MatchState:
+        """Returns the state for matching this constraint against a word one letter at a time"""
+        closure = _Closure()
+        self._enter((), closure)
+        return closure.state()
+
+    def _enter(self, stack: Stack, closure: _Closure):
+        """Starts matching this constraint, which requires at least one more letter"""
+        raise NotImplementedError()
+
+    def _resume(self, data: Any, stack: Stack, closure: _Closure, needs_more: bool, end_required: bool):
+        """Called when one of this constraint's children has finished consuming letters"""
+        _finish(stack, closure, needs_more, end_required)
+
+    def _consumes(self, letter: str) -> bool:
+        return False
+
     def __str__(self):
         return f"{self.BEGIN_DELIM}{' '.join(map(str, self.children))}{self.END_DELIM}"
 
@@ -92,12 +308,32 @@ class DictionaryWord(Constraint):
         if word[0].lower() == self.word[0].lower():
             yield Acronym(self.word, remainder=word[1:])
 
+    def _enter(self, stack: Stack, closure: _Closure):
+        closure.leaves.add((stack, self))
+
+    def _consumes(self, letter: str) -> bool:
+        return letter == self.word[0].lower()
+
+    def _counts(self, start: int, memo: "_CountMemo") -> Counts:
+        if memo.letters[start] == self.word[0].lower():
+            return {start + 1: 1}
+        return {}
+
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        return prefilter.exactly(self.word[0].lower())
+
+    def nullable(self) -> bool:
+        return False
+
     def min_length(self) -> int:
         return 1
 
     def max_length(self) -> int:
         return 1
 
+    def _length_set(self) -> int:
+        return 0b10
+
     def __str__(self):
         return self.word
 
@@ -105,24 +341,166 @@ class DictionaryWord(Constraint):
         return repr(self.word)
 
 
+class _SubsetMemo:
+    """
+    The memo table for matching subsets of a constraint's children against a single word.
+
+    Every remainder passed to the children is a suffix of the same word, so the (remainder, remaining children
+    bitmask) pairs that cannot produce a match are keyed by the remainder's length. A failing branch is therefore
+    only ever explored once, making the search polynomial in the length of the word times the number of subsets of
+    children, rather than factorial in the number of children.
+
+    """
+
+    def __init__(self, constraint: Constraint):
+        self.children: Tuple[Constraint, ...] = constraint.children
+        self.bits: ChildBits = constraint._child_bits()
+        self.infeasible: Set[Tuple[int, int]] = set()
+
+
+class _CountMemo:
+    """The memo table for counting the matches of a constraint against a single word (see `Constraint.count`)"""
+
+    def __init__(self, word: str):
+        self.word: str = word
+        self.length: int = len(word)
+        self.letters: List[str] = [c.lower() for c in word]
+        self.counts: Dict[Tuple[int, ...], Counts] = {}
+
+
+def _add(counts: Counts, end: int, ways: int):
+    counts[end] = counts.get(end, 0) + ways
+
+
+def _sequence_counts(children: Tuple[Constraint, ...], start: int, memo: _CountMemo) -> Counts:
+    """Counts the matches of `OrderedConstraint._match`: only the last child may consume the rest of the word"""
+    if not children:
+        return {}
+    counts: Counts = {start: 1}
+    last = len(children) - 1
+    for t, child in enumerate(children):
+        following: Counts = {}
+        for position, ways in counts.items():
+            for end, child_ways in child._count(position, memo).items():
+                if t == last or end < memo.length:
+                    _add(following, end, ways * child_ways)
+        counts = following
+        if not counts:
+            break
+    return counts
+
+
+def _set_bits(bitset: int) -> Iterator[int]:
+    while bitset:
+        lowest = bitset & -bitset
+        yield lowest.bit_length() - 1
+        bitset ^= lowest
+
+
+def _concatenated_lengths(children: Tuple[Constraint, ...]) -> int:
+    """Returns the `Constraint.lengths` of matching every one of `children`, one after the other"""
+    if not children:
+        return 0
+    lengths = 1
+    for child in children:
+        combined = 0
+        for k in _set_bits(child.lengths()):
+            combined |= lengths << k
+        lengths = combined
+        if not lengths:
+            break
+    return lengths
+
+
+def _non_nullable(children: Tuple[Constraint, ...]) -> FrozenSet[int]:
+    return frozenset(i for i, child in enumerate(children) if not child.nullable())
+
+
 class AnyOfConstraint(Constraint):
     """{any can occur in any order}"""
     BEGIN_DELIM = "{"
     END_DELIM = "}"
 
-    def _match(self, remainder: Optional[str], children: Tuple[Constraint, ...]) -> Iterator[Acronym]:
+    def _match(self, remainder: Optional[str], children: int, memo: _SubsetMemo) -> Iterator[Acronym]:
         if remainder is None:
             remainder = ""
-        for i, child in enumerate(children):
-            for match in child.match(remainder):
+        key = (len(remainder), children)
+        if key in memo.infeasible:
+            return
+        feasible = False
+        initial = remainder[:1].lower()
+        for i, bit, initials in memo.bits:
+            if not children & bit or (initials is not None and initial not in initials):
+                continue
+            for match in memo.children[i].match(remainder):
                 if match:
+                    feasible = True
                     yield match
-                else:
-                    for m in self._match(match.remainder, children[:i] + children[i+1:]):
+                elif children != bit:
+                    for m in self._match(match.remainder, children & ~bit, memo):
+                        feasible = True
                         yield match + m
+        if not feasible:
+            memo.infeasible.add(key)
 
     def match(self, word: str) -> Iterator:
-        yield from self._match(word, self.children)
+        # only complete matches are produced, so they must consume exactly the whole word
+        if self.lengths() >> len(word) & 1:
+            yield from self._match(word, (1 << len(self.children)) - 1, _SubsetMemo(self))
+
+    def _subset_count(self, start: int, children: int, memo: _CountMemo) -> int:
+        """Counts the complete matches of the `children` bitmask against the remainder starting at `start`"""
+        key = (id(self), start, children)
+        counts = memo.counts.get(key)
+        if counts is not None:
+            return counts.get(memo.length, 0)
+        total = 0
+        initial = memo.letters[start]
+        for i, bit, initials in self._child_bits():
+            if not children & bit or (initials is not None and initial not in initials):
+                continue
+            for end, ways in self.children[i]._count(start, memo).items():
+                if end == memo.length:
+                    total += ways
+                elif children != bit:
+                    total += ways * self._subset_count(end, children & ~bit, memo)
+        memo.counts[key] = {memo.length: total}
+        return total
+
+    def _counts(self, start: int, memo: _CountMemo) -> Counts:
+        if not self.lengths() >> (memo.length - start) & 1:
+            return {}
+        total = self._subset_count(start, (1 << len(self.children)) - 1, memo)
+        return {memo.length: total} if total else {}
+
+    def _enter(self, stack: Stack, closure: _Closure):
+        self._resume((1 << len(self.children)) - 1, stack, closure, True, False)
+
+    def _resume(self, data: int, stack: Stack, closure: _Closure, needs_more: bool, end_required: bool):
+        if not needs_more:
+            _finish(stack, closure, False, True)
+        if not end_required:
+            for i, child in enumerate(self.children):
+                if data & (1 << i):
+                    child._enter(stack + ((self, data & ~(1 << i)),), closure)
+
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        return prefilter.at_most(0)[0], prefilter.concatenation(self.children)[1]
+
+    def _length_set(self) -> int:
+        # the sums of the lengths of every subset of the children
+        sums = 1
+        for child in self.children:
+            extended = sums
+            for k in _set_bits(child.lengths()):
+                extended |= sums << k
+            sums = extended
+        # only complete matches are produced, and a complete match of a non-empty word consumes some of it
+        return sums & ~1
+
+    def nullable(self) -> bool:
+        # only complete matches are produced, and a complete match of a non-empty word consumes all of it
+        return False
 
     def min_length(self) -> int:
         return 0
@@ -152,8 +530,37 @@ class OrderedConstraint(Constraint):
                     yield match + m
 
     def match(self, word: str) -> Iterator[Acronym]:
+        if len(word) < self.shortest():
+            return iter(())
         return self._match(word, self.children)
 
+    def _counts(self, start: int, memo: _CountMemo) -> Counts:
+        if memo.length - start < self.shortest():
+            return {}
+        return _sequence_counts(self.children, start, memo)
+
+    def _enter(self, stack: Stack, closure: _Closure):
+        if self.children:
+            self.children[0]._enter(stack + ((self, 0),), closure)
+
+    def _resume(self, data: int, stack: Stack, closure: _Closure, needs_more: bool, end_required: bool):
+        if data + 1 == len(self.children):
+            _finish(stack, closure, needs_more, end_required)
+        elif not end_required:
+            self.children[data + 1]._enter(stack + ((self, data + 1),), closure)
+
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        return prefilter.concatenation(self.children)
+
+    def _length_set(self) -> int:
+        return _concatenated_lengths(self.children)
+
+    def mandatory_children(self) -> FrozenSet[int]:
+        return _non_nullable(self.children)
+
+    def nullable(self) -> bool:
+        return all(c.nullable() for c in self.children)
+
     def min_length(self) -> int:
         return sum(c.min_length() for c in self.children)
 
@@ -179,7 +586,20 @@ class AnyOrderedConstraint(Constraint):
                     yield match + m
 
     def match(self, word: str) -> Iterator[Acronym]:
-        yield from self._match(word, self.children)
+        if len(word) >= self.shortest():
+            yield from self._match(word, self.children)
+
+    _counts = OrderedConstraint._counts
+    _enter = OrderedConstraint._enter
+    _resume = OrderedConstraint._resume
+    # the children are matched exactly as those of an `OrderedConstraint` are
+    _length_set = OrderedConstraint._length_set
+    mandatory_children = OrderedConstraint.mandatory_children
+
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        return prefilter.at_most(0)[0], prefilter.concatenation(self.children)[1]
+
+    nullable = OrderedConstraint.nullable
 
     def min_length(self) -> int:
         return 0
@@ -193,22 +613,79 @@ class AllOfConstraint(Constraint):
     BEGIN_DELIM = '['
     END_DELIM = ']'
 
-    def _match(self, remainder: Optional[str], children: FrozenSet[int]) -> Iterator[Acronym]:
+    def _match(self, remainder: Optional[str], children: int, memo: _SubsetMemo) -> Iterator[Acronym]:
         if remainder is None:
             remainder = ""
-        for i, child in ((c, self.children[c]) for c in children):
-            for match in child.match(remainder):
-                if match:
-                    if len(children) == 1:
-                        yield match
-                elif len(children) == 1:
+        key = (len(remainder), children)
+        if key in memo.infeasible:
+            return
+        feasible = False
+        initial = remainder[:1].lower()
+        for i, bit, initials in memo.bits:
+            if not children & bit or (initials is not None and initial not in initials):
+                continue
+            for match in memo.children[i].match(remainder):
+                if children == bit:
+                    feasible = True
                     yield match
-                else:
-                    for m in self._match(match.remainder, children - {i}):
+                elif not match:
+                    for m in self._match(match.remainder, children & ~bit, memo):
+                        feasible = True
                         yield match + m
+        if not feasible:
+            memo.infeasible.add(key)
 
     def match(self, word) -> Iterator[Acronym]:
-        yield from self._match(word, frozenset(range(len(self.children))))
+        if self.children and len(word) >= self.shortest():
+            yield from self._match(word, (1 << len(self.children)) - 1, _SubsetMemo(self))
+
+    def _subset_counts(self, start: int, children: int, memo: _CountMemo) -> Counts:
+        """Counts the matches of the `children` bitmask, in any order, against the remainder starting at `start`"""
+        key = (id(self), start, children)
+        counts = memo.counts.get(key)
+        if counts is not None:
+            return counts
+        counts = memo.counts[key] = {}
+        initial = memo.letters[start]
+        for i, bit, initials in self._child_bits():
+            if not children & bit or (initials is not None and initial not in initials):
+                continue
+            for end, ways in self.children[i]._count(start, memo).items():
+                if children == bit:
+                    _add(counts, end, ways)
+                elif end < memo.length:
+                    for rest_end, rest_ways in self._subset_counts(end, children & ~bit, memo).items():
+                        _add(counts, rest_end, ways * rest_ways)
+        return counts
+
+    def _counts(self, start: int, memo: _CountMemo) -> Counts:
+        if not self.children or memo.length - start < self.shortest():
+            return {}
+        return self._subset_counts(start, (1 << len(self.children)) - 1, memo)
+
+    def _enter(self, stack: Stack, closure: _Closure):
+        if self.children:
+            self._resume((1 << len(self.children)) - 1, stack, closure, True, False)
+
+    def _resume(self, data: int, stack: Stack, closure: _Closure, needs_more: bool, end_required: bool):
+        if not data:
+            _finish(stack, closure, needs_more, end_required)
+        elif not end_required:
+            for i, child in enumerate(self.children):
+                if data & (1 << i):
+                    child._enter(stack + ((self, data & ~(1 << i)),), closure)
+
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        return prefilter.concatenation(self.children)
+
+    def _length_set(self) -> int:
+        return _concatenated_lengths(self.children)
+
+    def mandatory_children(self) -> FrozenSet[int]:
+        return _non_nullable(self.children)
+
+    def nullable(self) -> bool:
+        return all(c.nullable() for c in self.children)
 
     def min_length(self) -> int:
         return sum(c.min_length() for c in self.children)
@@ -223,8 +700,48 @@ class ExactlyOneConstraint(Constraint):
     END_DELIM = ')'
 
     def match(self, word: str) -> Iterator[Acronym]:
+        initial = word[:1].lower()
+        for child in self.children:
+            initials = child.initials()
+            if initials is None or initial in initials:
+                yield from child.match(word)
+
+    def _counts(self, start: int, memo: _CountMemo) -> Counts:
+        counts: Counts = {}
+        initial = memo.letters[start]
         for child in self.children:
-            yield from child.match(word)
+            initials = child.initials()
+            if initials is None or initial in initials:
+                for end, ways in child._count(start, memo).items():
+                    _add(counts, end, ways)
+        return counts
+
+    def _enter(self, stack: Stack, closure: _Closure):
+        for child in self.children:
+            child._enter(stack + ((self, None),), closure)
+
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        if not self.children:
+            return prefilter.at_most(0)
+        bounds = [c.letter_bounds() for c in self.children]
+        return (
+            tuple(map(min, zip(*(mins for mins, _ in bounds)))),
+            tuple(map(max, zip(*(maxs for _, maxs in bounds))))
+        )
+
+    def _length_set(self) -> int:
+        lengths = 0
+        for child in self.children:
+            lengths |= child.lengths()
+        return lengths
+
+    def mandatory_children(self) -> FrozenSet[int]:
+        if len(self.children) == 1:
+            return _non_nullable(self.children)
+        return frozenset()
+
+    def nullable(self) -> bool:
+        return any(c.nullable() for c in self.children)
 
     def min_length(self) -> int:
         return min(c.min_length() for c in self.children)
@@ -239,12 +756,27 @@ class Wildcard(Constraint):
     def match(self, word: str) -> Iterator[Acronym]:
         yield Acronym(word[0], remainder=word[1:])
 
+    def _enter(self, stack: Stack, closure: _Closure):
+        closure.leaves.add((stack, self))
+
+    def _consumes(self, letter: str) -> bool:
+        return True
+
+    def _counts(self, start: int, memo: _CountMemo) -> Counts:
+        return {start + 1: 1}
+
+    def nullable(self) -> bool:
+        return False
+
     def min_length(self) -> int:
         return 1
 
     def max_length(self) -> int:
         return 1
 
+    def _length_set(self) -> int:
+        return 0b10
+
     def __str__(self):
         return 'Wildcard<.>'
 
@@ -256,6 +788,30 @@ class OptionalConstraint(OrderedConstraint):
     def match(self, word) -> Iterator[Acronym]:
         return itertools.chain((Acronym(remainder=word),), super().match(word))
 
+    def _counts(self, start: int, memo: _CountMemo) -> Counts:
+        counts = super()._counts(start, memo)
+        # the empty match
+        _add(counts, start, 1)
+        return counts
+
+    def _enter(self, stack: Stack, closure: _Closure):
+        # the empty match
+        _finish(stack, closure, True, False)
+        super()._enter(stack, closure)
+
+    def letter_bounds(self) -> prefilter.LetterBounds:
+        return prefilter.at_most(0)[0], super().letter_bounds()[1]
+
+    def _length_set(self) -> int:
+        # the empty match
+        return super()._length_set() | 1
+
+    def mandatory_children(self) -> FrozenSet[int]:
+        return frozenset()
+
+    def nullable(self) -> bool:
+        return True
+
     def min_length(self):
         return 0
 
@@ -266,25 +822,408 @@ class OptionalConstraint(OrderedConstraint):
             return f"{super().__str__()}?"
 
 
-def generate(
+def _word_length_bounds(min_length: int, max_length: int, use_variants: bool) -> Tuple[int, int]:
+    """Returns bounds on the lengths of the dictionary words that can produce a match of a permissible length"""
+    if use_variants:
+        # Each variant is the word followed by a respelling of it. Every one- or two-letter unit of the word is
+        # respelled with one or two letters, so a variant is at least one and a half times as long as its word.
+        return 1, (2 * max_length) // 3
+    return min_length, max_length
+
+
+def _length_bounds(constraints: Constraint, min_length: int, max_length: Optional[int]) -> Tuple[int, int]:
+    """Returns the bounds on the lengths of the acronyms to search for, narrowed to those that `constraints` allows"""
+    longest = constraints.lengths().bit_length() - 1
+    # even a constraint that can match nothing at all only ever produces acronyms of at least one letter
+    return max(constraints.shortest(), min_length, 1), longest if max_length is None else min(longest, max_length)
+
+
+def _dictionary_words(
+        dict_path: str,
+        min_length: int,
+        max_length: int,
+        use_variants: bool,
+        lines_read: Optional[Callable[[int], None]] = None
+) -> Iterator[str]:
+    min_word_length, max_word_length = _word_length_bounds(min_length, max_length, use_variants)
+    return wordlist.iter_words(dict_path, min_word_length, max_word_length, lines_read=lines_read)
+
+
+def _recursive_matches(constraints: Constraint, words: Iterable[str]) -> Iterator[Tuple[str, Iterable[Acronym]]]:
+    for word in words:
+        yield word, constraints.matches(word)
+
+
+# Each engine takes a constraint and the dictionary words of a permissible length, and yields (word, matches) pairs
+# in dictionary order. Words for which an engine yields no pair are assumed to have no matches.
+ENGINES: Dict[str, Callable[[Constraint, Iterable[str]], Iterator[Tuple[str, Iterable[Acronym]]]]] = {
+    "recursive": _recursive_matches,
+    "automaton": automaton.automaton_matches,
+    "trie": trie.trie_matches,
+}
+
+
+def _word_matches(
         constraints: Constraint,
-        min_length: int = 3,
-        use_variants: bool = False,
-        dict_path: str = DICT_PATH
+        words: Iterable[str],
+        min_length: int,
+        max_length: int,
+        use_variants: bool,
+        engine: str,
+        search_stats: Optional[stats.SearchStats] = None,
+        letter_frequencies: Optional[frequencies.LetterFrequencies] = None,
+        variant_seen_set: Optional[Callable[[], dedupe.SeenSet]] = None
+) -> Iterator[Tuple[str, Iterable[Acronym]]]:
+    if use_variants:
+        # Variants are matched by walking the automaton over each word's alternative spellings, rather than by
+        # expanding every variant and passing it to the engine
+        matcher = automaton.Automaton(constraints)
+        if search_stats is not None:
+            # variants are filtered by length and letters as they are generated, not before
+            words = search_stats.count(words, "words_of_length", "words_of_letters", "words_of_positions")
+        return (
+            (variant, constraints.matches(variant))
+            for word in words
+            for variant in variants.matching_variants(
+                word, matcher, min_length, max_length, seen=None if variant_seen_set is None else variant_seen_set()
+            )
+        )
+    lengths = constraints.lengths()
+    words = (word for word in words if min_length <= len(word) <= max_length and lengths >> len(word) & 1)
+    if search_stats is not None:
+        words = search_stats.count(words, "words_of_length")
+    letter_filter = prefilter.LetterFilter(constraints, max_length, frequencies=letter_frequencies)
+    if letter_filter:
+        # only the words whose letter counts could possibly match are passed to the engine
+        words = letter_filter.filter(words)
+    if search_stats is not None:
+        words = search_stats.count(words, "words_of_letters")
+    position_filter = positional.PositionFilter(constraints, min_length, max_length)
+    if position_filter:
+        # the few words left are checked for letters at positions at which the constraint cannot consume them
+        words = position_filter.filter(words)
+    if search_stats is not None:
+        words = search_stats.count(words, "words_of_positions")
+    return ENGINES[engine](constraints, words)
+
+
+def _deduplicate(
+        word_matches: Iterable[Tuple[str, Iterable[Acronym]]],
+        search_stats: Optional[stats.SearchStats] = None,
+        seen: Optional[dedupe.SeenSet] = None
 ) -> Iterator[Acronym]:
-    min_length = max(constraints.min_length(), min_length)
-    max_length = constraints.max_length()
-    with open(dict_path, 'r') as dictionary:
-        yielded: Set[str] = set()
-        dict_words: Iterable[str] = (w.strip() for w in dictionary.readlines())
-        if use_variants:
-            dict_words = itertools.chain.from_iterable(map(variants.generate_variants, dict_words))
-        for word in dict_words:
+    yielded: Union[Set[str], dedupe.SeenSet] = set() if seen is None else seen
+    try:
+        for word, matches in word_matches:
             if word.upper() in yielded:
+                if search_stats is not None:
+                    search_stats.duplicates += 1
                 continue
-            word_len = len(word)
-            if word_len < min_length or word_len > max_length:
-                continue
-            for match in constraints.matches(word):
+            matched = False
+            for match in matches:
+                matched = True
                 yielded.add(match.name())
                 yield match
+            if matched and search_stats is not None:
+                search_stats.words_matched += 1
+    finally:
+        if search_stats is not None and seen is not None:
+            search_stats.dedupe_entries = len(seen)
+            search_stats.dedupe_bytes = seen.memory_bytes
+
+
+def _deduplicate_externally(
+        word_matches: Iterable[Tuple[str, Iterable[Acronym]]],
+        search_stats: Optional[stats.SearchStats] = None,
+        max_bytes: Optional[int] = None
+) -> Iterator[Acronym]:
+    def on_finish(duplicates: int, entries: int, peak_bytes: int):
+        if search_stats is not None:
+            # every word was matched, including those that turned out to be duplicates
+            search_stats.words_matched -= duplicates
+            search_stats.duplicates += duplicates
+            search_stats.dedupe_entries = entries
+            search_stats.dedupe_bytes = peak_bytes
+
+    def count_matched(matches: Iterable[Acronym]) -> Iterator[Acronym]:
+        matched = False
+        for match in matches:
+            if not matched and search_stats is not None:
+                matched = True
+                search_stats.words_matched += 1
+            yield match
+
+    if search_stats is not None:
+        word_matches = ((word, count_matched(matches)) for word, matches in word_matches)
+    for words in dedupe.external_deduplicate(word_matches, max_bytes, on_finish):
+        yield Acronym(*words)
+
+
+class _Deduplication:
+    """How `generate` deduplicates its results"""
+
+    def __init__(self, mode: str, max_bytes: Optional[int]):
+        if mode not in dedupe.MODES:
+            raise ValueError(f"Unknown deduplication mode {mode!r}; expected one of {', '.join(dedupe.MODES)}")
+        self.mode: str = mode
+        self.max_bytes: Optional[int] = max_bytes
+
+    def variant_seen_set(self) -> dedupe.SeenSet:
+        # the variants of each word are deduplicated as they are generated, so they cannot be deduplicated externally
+        return dedupe.seen_set("fingerprint" if self.mode == "fingerprint" else "exact", self.max_bytes)
+
+    def __call__(
+            self,
+            word_matches: Iterable[Tuple[str, Iterable[Acronym]]],
+            search_stats: Optional[stats.SearchStats] = None
+    ) -> Iterator[Acronym]:
+        if self.mode == "external":
+            return _deduplicate_externally(word_matches, search_stats, self.max_bytes)
+        elif self.mode == "exact" and self.max_bytes is None and search_stats is None:
+            # a plain set is the fastest when its memory use does not need to be bounded or measured
+            return _deduplicate(word_matches)
+        return _deduplicate(word_matches, search_stats, dedupe.seen_set(self.mode, self.max_bytes))
+
+
+def generate(
+        constraints: Constraint,
+        min_length: int = 3,
+        use_variants: bool = False,
+        dict_path: str = DICT_PATH,
+        engine: str = "recursive",
+        jobs: int = 1,
+        ordered: bool = True,
+        search_stats: Optional[stats.SearchStats] = None,
+        max_length: Optional[int] = None,
+        dedupe_mode: str = "exact",
+        dedupe_memory: Optional[int] = None,
+        budget: Optional[SearchBudget] = None,
+        frequency_path: Optional[str] = None
+) -> Iterator[Acronym]:
+    """
+    Yields the acronyms in the dictionary that match `constraints`, and are at least `min_length` letters long and
+    at most `max_length` letters long, if provided.
+
+    If `jobs` is greater than one, the dictionary is split into shards that are searched by a pool of that many
+    worker processes. If `ordered` is False, results are yielded as soon as each shard completes rather than in
+    dictionary order. If `search_stats` is provided, statistics about the search are collected into it; this is
+    not supported with multiple jobs.
+
+    Acronyms that have already been yielded are remembered in one of the `dedupe.MODES`, using at most
+    `dedupe_memory` bytes if provided. A `dedupe.DedupeMemoryError` is raised if that is not enough. With the
+    `external` mode, nothing is yielded until the search is complete.
+
+    If a `budget` is provided, the search stops early once it is exceeded, after which `budget.finished` says
+    whether the whole dictionary was searched.
+
+    If a `frequency_path` is provided, the letter frequencies of the dictionary are saved there and reused by later
+    searches to check the letters most likely to reject a word first (see `frequencies.counting`). Nothing is saved
+    otherwise.
+
+    """
+    if budget is None:
+        yield from _generate(
+            constraints, min_length, use_variants, dict_path, engine, jobs, ordered, search_stats, max_length,
+            dedupe_mode, dedupe_memory, frequency_path=frequency_path
+        )
+        return
+    yield from budget.limit(
+        _generate(
+            constraints, min_length, use_variants, dict_path, engine, jobs, ordered, search_stats, max_length,
+            dedupe_mode, dedupe_memory, budget, frequency_path
+        )
+    )
+
+
+def count(
+        constraints: Constraint,
+        min_length: int = 3,
+        use_variants: bool = False,
+        dict_path: str = DICT_PATH,
+        max_length: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Returns the number of distinct acronyms in the dictionary that match `constraints`, and the number of results
+    that `generate` would yield with the same arguments, i.e., the total number of expansions of those acronyms.
+
+    Words are first checked with the constraint's `automaton.Automaton`, and the matches of the words that it
+    accepts are counted with `Constraint.count`, so no acronyms are ever built.
+
+    """
+    min_length, max_length = _length_bounds(constraints, min_length, max_length)
+    # like `_deduplicate`, a word is skipped if an acronym with the same name was already counted
+    counted: Set[str] = set()
+    acronyms = expansions = 0
+    for word, _ in _word_matches(
+            constraints, _dictionary_words(dict_path, min_length, max_length, use_variants), min_length, max_length,
+            use_variants, "automaton"
+    ):
+        name = word.upper()
+        if name in counted:
+            continue
+        matches = constraints.count(word)
+        if matches:
+            counted.add(name)
+            acronyms += 1
+            expansions += matches
+    return acronyms, expansions
+
+
+def _generate(
+        constraints: Constraint,
+        min_length: int,
+        use_variants: bool,
+        dict_path: str,
+        engine: str,
+        jobs: int,
+        ordered: bool,
+        search_stats: Optional[stats.SearchStats],
+        max_length: Optional[int],
+        dedupe_mode: str,
+        dedupe_memory: Optional[int],
+        budget: Optional[SearchBudget] = None,
+        frequency_path: Optional[str] = None
+) -> Iterator[Acronym]:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {', '.join(ENGINES.keys())}")
+    if search_stats is not None and jobs > 1:
+        raise ValueError("Search statistics cannot be collected with multiple jobs")
+    deduplicate = _Deduplication(dedupe_mode, dedupe_memory)
+    if search_stats is not None:
+        search_stats.dedupe_mode = dedupe_mode
+    min_length, max_length = _length_bounds(constraints, min_length, max_length)
+    letter_frequencies = _letter_frequencies(
+        constraints, min_length, max_length, use_variants, dict_path, frequency_path
+    )
+    if jobs > 1:
+        from . import parallel
+        yield from parallel.generate(
+            constraints, min_length, max_length, use_variants, dict_path, engine, jobs, ordered, letter_frequencies,
+            deduplicate, budget
+        )
+        return
+    variant_seen_set = None if dedupe_mode == "exact" and dedupe_memory is None else deduplicate.variant_seen_set
+    dict_words = _dictionary_words(
+        dict_path, min_length, max_length, use_variants, None if search_stats is None else search_stats.lines_read
+    )
+    if frequency_path is not None and letter_frequencies is None \
+            and _uses_letter_frequencies(constraints, max_length, use_variants):
+        # the frequencies are counted as the words are read, for the next search of the dictionary
+        dict_words = frequencies.counting(frequency_path, dict_path, dict_words, min_length, max_length)
+    if budget is not None:
+        dict_words = budget.words(dict_words)
+    if search_stats is None:
+        yield from deduplicate(
+            _word_matches(
+                constraints, dict_words, min_length, max_length, use_variants, engine,
+                letter_frequencies=letter_frequencies, variant_seen_set=variant_seen_set
+            )
+        )
+        return
+    with search_stats.instrument(constraints):
+        yield from deduplicate(
+            _word_matches(
+                constraints, search_stats.load(dict_words), min_length, max_length, use_variants, engine, search_stats,
+                letter_frequencies, variant_seen_set
+            ),
+            search_stats
+        )
+
+
+def _uses_letter_frequencies(constraints: Constraint, max_length: int, use_variants: bool) -> bool:
+    """Returns whether the letter frequencies of the dictionary would speed up the search"""
+    # the order in which letters are checked only matters when words are checked one at a time
+    return not use_variants and not prefilter.vectorized() and bool(prefilter.LetterFilter(constraints, max_length))
+
+
+def _letter_frequencies(
+        constraints: Constraint,
+        min_length: int,
+        max_length: int,
+        use_variants: bool,
+        dict_path: str,
+        frequency_path: Optional[str]
+) -> Optional[frequencies.LetterFrequencies]:
+    """Returns the saved letter frequencies of the dictionary if they would speed up the search, or None otherwise"""
+    if frequency_path is None or not _uses_letter_frequencies(constraints, max_length, use_variants):
+        return None
+    return frequencies.load(frequency_path, dict_path, min_length, max_length)
+
+
+def _first_letters(constraint: Constraint) -> Optional[FrozenSet[str]]:
+    """Returns the lowercase letters with which a word matching `constraint` can start, or None for any letter"""
+    letters: Set[str] = set()
+    for _, leaf in constraint.initial_state().leaves:
+        if isinstance(leaf, DictionaryWord):
+            letters.add(leaf.word[0].lower())
+        else:
+            return None
+    return frozenset(letters)
+
+
+class _BatchQuery:
+    """A single query of `generate_many`, along with the state for matching it and deduplicating its results"""
+
+    def __init__(self, constraint: Constraint, min_length: int, use_variants: bool):
+        self.constraint: Constraint = constraint
+        self.min_length, self.max_length = _length_bounds(constraint, min_length, None)
+        self.use_variants: bool = use_variants
+        self.word_bounds: Tuple[int, int] = _word_length_bounds(self.min_length, self.max_length, use_variants)
+        self.automaton: automaton.Automaton = automaton.Automaton(constraint)
+        self.yielded: Set[str] = set()
+
+    def word_matches(self, word: str) -> Iterator[Tuple[str, Iterable[Acronym]]]:
+        if not self.word_bounds[0] <= len(word) <= self.word_bounds[1]:
+            return
+        if self.use_variants:
+            for variant in variants.matching_variants(word, self.automaton, self.min_length, self.max_length):
+                yield variant, self.constraint.matches(variant)
+        elif self.automaton.accepts(word):
+            yield word, self.constraint.matches(word)
+
+
+def generate_many(
+        constraints: Iterable[Constraint],
+        min_length: int = 3,
+        use_variants: bool = False,
+        dict_path: str = DICT_PATH
+) -> Iterator[Tuple[int, Acronym]]:
+    """
+    Yields (query id, acronym) pairs for the acronyms in the dictionary that match any of `constraints`.
+
+    The query id of a constraint is its position in `constraints`. The dictionary is only read once, and each word
+    is only dispatched to the queries that can match a word starting with its first letter. Each query's results are
+    deduplicated exactly as `generate` does, and results are yielded in dictionary order, then query order.
+
+    """
+    queries = [_BatchQuery(constraint, min_length, use_variants) for constraint in constraints]
+    if not queries:
+        return
+    # the queries that can match a word starting with each letter, plus those whose first letter can be anything
+    letter_queries: Dict[str, List[int]] = {}
+    any_letter_queries: List[int] = []
+    for query_id, query in enumerate(queries):
+        letters = _first_letters(query.constraint)
+        if letters is None:
+            any_letter_queries.append(query_id)
+        else:
+            for letter in letters:
+                letter_queries.setdefault(letter, []).append(query_id)
+    dispatch: Dict[str, List[int]] = {}
+    min_word_length = min(query.word_bounds[0] for query in queries)
+    max_word_length = max(query.word_bounds[1] for query in queries)
+    for word in wordlist.iter_words(dict_path, min_word_length, max_word_length):
+        if not word:
+            continue
+        first_letter = word[0].lower()
+        query_ids = dispatch.get(first_letter)
+        if query_ids is None:
+            query_ids = dispatch[first_letter] = sorted(letter_queries.get(first_letter, []) + any_letter_queries)
+        for query_id in query_ids:
+            query = queries[query_id]
+            for matched_word, matches in query.word_matches(word):
+                if matched_word.upper() in query.yielded:
+                    continue
+                for match in matches:
+                    query.yielded.add(match.name())
+                    yield query_id, match
@@ -0,0 +1,107 @@
+import bz2
+import gzip
+import lzma
+import os
+import sys
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from . import index
+
+STDIN = "-"
+
+# the number of characters read from the word list at a time
+CHUNK_SIZE = 1 << 20
+
+COMPRESSED_OPENERS: Dict[str, Callable[..., TextIO]] = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+
+def is_streamed(path: str) -> bool:
+    """Returns whether the word list at `path` can only be read sequentially, i.e., it is stdin or compressed"""
+    return path == STDIN or any(path.endswith(extension) for extension in COMPRESSED_OPENERS)
+
+
+def exists(path: str) -> bool:
+    if path == STDIN:
+        return True
+    try:
+        with open(path, "rb"):
+            return True
+    except OSError:
+        return False
+
+
+def signature(path: str) -> Tuple[int, int]:
+    """Returns the modification time and size of the word list at `path`, which change whenever it is modified"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def open_word_list(path: str) -> TextIO:
+    """Opens a word list for reading as text; `-` is stdin, and `.gz`, `.bz2`, and `.xz` files are decompressed"""
+    if path == STDIN:
+        return sys.stdin
+    for extension, opener in COMPRESSED_OPENERS.items():
+        if path.endswith(extension):
+            return opener(path, "rt")
+    return open(path, "r")
+
+
+def _filter_lines(lines: Iterable[str], min_length: int, max_length: Optional[int]) -> Iterator[str]:
+    for line in lines:
+        length = len(line)
+        if length < min_length:
+            # stripping can only make the line shorter
+            continue
+        if (max_length is not None and length > max_length) or line[:1].isspace() or line[-1:].isspace():
+            line = line.strip()
+            length = len(line)
+            if length < min_length or (max_length is not None and length > max_length):
+                continue
+        yield line
+
+
+def iter_words(
+        path: str,
+        min_length: int = 0,
+        max_length: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+        lines_read: Optional[Callable[[int], None]] = None
+) -> Iterator[str]:
+    """
+    Yields the stripped words of a word list whose lengths are within the given bounds, in constant memory.
+
+    The word list is read in chunks of `chunk_size` characters, and lines are filtered by length before they are
+    stripped. `path` may also be a dictionary index, in which case only the permissible length buckets are read.
+    If given, `lines_read` is called with the number of lines of each chunk as it is read, before any of them are
+    filtered; the words of an index are all counted up front, since those of other lengths are skipped unread.
+
+    """
+    if path != STDIN and index.is_index(path):
+        with index.DictionaryIndex(path) as dictionary:
+            if lines_read is not None:
+                lines_read(len(dictionary))
+            yield from dictionary.words(min_length, max_length)
+        return
+    stream = open_word_list(path)
+    try:
+        pending = ""
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            lines = (pending + chunk).split("\n")
+            pending = lines.pop()
+            if lines_read is not None:
+                lines_read(len(lines))
+            yield from _filter_lines(lines, min_length, max_length)
+        if pending:
+            if lines_read is not None:
+                lines_read(1)
+            yield from _filter_lines((pending,), min_length, max_length)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()